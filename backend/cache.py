@@ -0,0 +1,90 @@
+"""
+In-process LRU cache with per-entry TTL, bounded by entry count and by bytes.
+
+Used from the event loop only, so it takes no locks. Entry sizes are estimated
+from the JSON encoding of the cached value.
+"""
+
+import json
+import time
+from collections import OrderedDict
+
+
+def estimate_size(value):
+    """Approximate memory cost of a cached value, in bytes"""
+    return len(json.dumps(value, default=str))
+
+
+class TTLCache:
+    """LRU + TTL cache with hit/miss counters"""
+
+    def __init__(self, max_entries=1000, max_bytes=16 * 1024 * 1024, ttl_seconds=30.0):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()  # key -> (expires_at, size, value)
+        self._bytes = 0
+        # Bumped on every invalidation so reads that started earlier are not cached
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        expires_at, _, value = entry
+        if expires_at < time.monotonic():
+            self._remove(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key, value, generation=None):
+        if generation is not None and generation != self.generation:
+            # An invalidation happened while the value was being loaded
+            return
+        size = estimate_size(value)
+        if size > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, size, value)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def invalidate(self, predicate):
+        """Drop every entry whose key matches ``predicate``"""
+        self.generation += 1
+        for key in [key for key in self._entries if predicate(key)]:
+            self._remove(key)
+
+    def clear(self):
+        self.generation += 1
+        self._entries.clear()
+        self._bytes = 0
+
+    def _remove(self, key):
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "evictions": self.evictions,
+        }
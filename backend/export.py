@@ -0,0 +1,73 @@
+"""
+Streaming export of the restaurants collection as NDJSON or CSV.
+
+Documents arrive in batches (a store's sharded scan, or cursor pages) and are
+encoded as they arrive, so memory use depends on the batch size, not on the
+size of the collection.
+"""
+
+import csv
+import io
+import json
+import zlib
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+# Column order for CSV exports; unknown fields are dropped, missing ones left empty
+CSV_FIELDS = [
+    "id", "restaurant_key", "restaurant_name", "street_address", "city", "state", "zipcode",
+    "primary_phone", "secondary_phone", "third_phone", "website_url", "menu_url", "menu_comments",
+    "gm_name", "gm_phone", "doordash_url", "uber_eats_url", "grubhub_url", "notes",
+    "created_at", "updated_at", "created_by", "latitude", "longitude",
+]
+
+
+async def iter_restaurants(batches):
+    """Flatten an async iterator of restaurant lists"""
+    async for restaurants in batches:
+        for restaurant in restaurants:
+            yield restaurant
+
+
+async def iter_ndjson(restaurants):
+    async for restaurant in restaurants:
+        yield (json.dumps(restaurant, default=str) + "\n").encode("utf-8")
+
+
+async def iter_csv(restaurants):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction="ignore")
+    writer.writeheader()
+    async for restaurant in restaurants:
+        writer.writerow(restaurant)
+        # Flush per row so the buffer never holds more than one record
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+async def iter_gzip(chunks, flush_bytes=64 * 1024):
+    """gzip-compress a byte stream, emitting compressed output roughly every ``flush_bytes``"""
+    compressor = zlib.compressobj(level=6, wbits=31)
+    pending = 0
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        pending += len(chunk)
+        if compressed:
+            yield compressed
+        if pending >= flush_bytes:
+            yield compressor.flush(zlib.Z_SYNC_FLUSH)
+            pending = 0
+    yield compressor.flush()
+
+
+def export_stream(batches, format="ndjson", gzip=False):
+    """Byte stream of the restaurants in ``batches`` in ``format``, optionally gzip-compressed"""
+    restaurants = iter_restaurants(batches)
+    chunks = iter_csv(restaurants) if format == "csv" else iter_ndjson(restaurants)
+    return iter_gzip(chunks) if gzip else chunks
@@ -0,0 +1,494 @@
+"""
+In-process fake of the subset of the Firestore client API used by the backend.
+Lets the store layer and the benchmarks run offline. An optional per-call
+latency (seconds) simulates the network round trip of the real client, and
+read_latency (seconds per document a query returns) its transfer time.
+
+Collection listeners (on_snapshot) are fed from the fake's own writes, which
+makes it usable as a change feed; fail_watches() simulates a dropped stream.
+SERVER_TIMESTAMP fields get the commit time, which, as in Firestore, is shared
+by every write of a commit and increases from one commit to the next.
+"""
+
+import copy
+import enum
+import functools
+import heapq
+import operator
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+MAX_BATCH_WRITES = 500
+
+
+class FakeDocumentSnapshot:
+    def __init__(self, reference, data):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+
+    @property
+    def exists(self):
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+    def get(self, field):
+        return self._data.get(field) if self._data else None
+
+
+class FakeDocumentReference:
+    def __init__(self, client, collection_name, document_id):
+        self._client = client
+        self._collection = collection_name
+        self.id = document_id
+
+    @property
+    def path(self):
+        return f"{self._collection}/{self.id}"
+
+    def collection(self, name):
+        return FakeCollectionReference(self._client, f"{self.path}/{name}")
+
+    def get(self, transaction=None):
+        self._client._sleep()
+        with self._client._lock:
+            data = self._client._docs(self._collection).get(self.id)
+            return FakeDocumentSnapshot(self, copy.deepcopy(data))
+
+    def set(self, data, merge=False):
+        self._client._sleep()
+        self._client._apply_writes([("set", self, data, merge)])
+
+    def update(self, data):
+        self._client._sleep()
+        self._client._apply_writes([("update", self, data, True)])
+
+    def delete(self):
+        self._client._sleep()
+        self._client._apply_writes([("delete", self, None, False)])
+
+
+_RANGE_OPS = {"<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge}
+
+
+class FakeQuery:
+    def __init__(self, client, collection_name, filters=None, orders=None, limit=None, start=None, end=None,
+                 projection=None):
+        self._client = client
+        self._collection = collection_name
+        self._filters = filters or []
+        self._orders = orders or []
+        self._limit = limit
+        self._start = start  # (cursor values, inclusive)
+        self._end = end
+        self._projection = projection
+
+    def _copy(self, **kwargs):
+        params = {
+            "filters": list(self._filters),
+            "orders": list(self._orders),
+            "limit": self._limit,
+            "start": self._start,
+            "end": self._end,
+            "projection": self._projection,
+        }
+        params.update(kwargs)
+        return FakeQuery(self._client, self._collection, **params)
+
+    def where(self, field, op, value):
+        if op not in ("==", "<", "<=", ">", ">=", "array_contains"):
+            raise NotImplementedError(f"Unsupported operator: {op}")
+        return self._copy(filters=self._filters + [(field, op, value)])
+
+    def order_by(self, field, direction="ASCENDING"):
+        return self._copy(orders=self._orders + [(field, direction)])
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def select(self, field_paths):
+        return self._copy(projection=list(field_paths))
+
+    def _cursor(self, document_fields):
+        if not self._orders:
+            raise ValueError("Cursors require at least one order_by()")
+        if isinstance(document_fields, FakeDocumentSnapshot):
+            return dict(document_fields._data or {}, __name__=document_fields.id)
+        return dict(document_fields)
+
+    def start_after(self, document_fields):
+        return self._copy(start=(self._cursor(document_fields), False))
+
+    def start_at(self, document_fields):
+        return self._copy(start=(self._cursor(document_fields), True))
+
+    def end_before(self, document_fields):
+        return self._copy(end=(self._cursor(document_fields), False))
+
+    def _compare_to_cursor(self, doc_id, data, values):
+        """-1, 0 or 1 as the document sorts before, level with or after the cursor"""
+        for field, direction in self._orders:
+            if field not in values:
+                break
+            value = doc_id if field == "__name__" else data.get(field)
+            left, right = _sort_key(value), _sort_key(values[field])
+            if left != right:
+                return 1 if (left > right) != (direction == "DESCENDING") else -1
+        return 0
+
+    def _in_range(self, doc_id, data):
+        """Whether the document falls between the start and end cursors"""
+        if self._start is not None:
+            values, inclusive = self._start
+            if self._compare_to_cursor(doc_id, data, values) < (0 if inclusive else 1):
+                return False
+        if self._end is not None:
+            values, inclusive = self._end
+            if self._compare_to_cursor(doc_id, data, values) >= (1 if inclusive else 0):
+                return False
+        return True
+
+    def _matches(self, data):
+        # Like Firestore, documents missing an ordered field are left out
+        if any(field != "__name__" and field not in data for field, _ in self._orders):
+            return False
+        for field, op, value in self._filters:
+            if op == "array_contains":
+                if value not in (data.get(field) or []):
+                    return False
+            elif op == "==":
+                if data.get(field) != value:
+                    return False
+            elif field not in data or not _RANGE_OPS[op](_sort_key(data[field]), _sort_key(value)):
+                return False
+        return True
+
+    def _compare(self, left, right):
+        for field, direction in self._orders:
+            a = _sort_key(left[0] if field == "__name__" else left[1].get(field))
+            b = _sort_key(right[0] if field == "__name__" else right[1].get(field))
+            if a != b:
+                return (1 if a > b else -1) * (-1 if direction == "DESCENDING" else 1)
+        return 0
+
+    def _ordered(self, items, limit=None):
+        """The first ``limit`` (or all) items in query order; ties keep collection order, like a stable sort"""
+        key = functools.cmp_to_key(self._compare)
+        if limit is None:
+            return sorted(items, key=key)
+        # A heap of ``limit`` entries, so a page costs memory for the page only
+        return heapq.nsmallest(limit, items, key=key)
+
+    def _id_bounds(self):
+        # Document-ID range scans get their bounds applied before sorting the whole collection
+        if not self._orders or self._orders[0] != ("__name__", "ASCENDING"):
+            return None, None
+        low = self._start[0].get("__name__") if self._start else None
+        high = self._end[0].get("__name__") if self._end else None
+        return low, high
+
+    def stream(self):
+        self._client._sleep()
+        low, high = self._id_bounds()
+        with self._client._lock:
+            matching = (
+                (doc_id, data)
+                for doc_id, data in self._client._docs(self._collection).items()
+                if (low is None or doc_id >= low) and (high is None or doc_id <= high)
+                and self._matches(data) and self._in_range(doc_id, data)
+            )
+            # Writes replace stored documents rather than mutate them, so holding
+            # references is a consistent snapshot; each one is copied as it is yielded
+            items = self._ordered(matching, self._limit)
+        if self._client.read_latency:
+            time.sleep(self._client.read_latency * len(items))
+        for doc_id, data in items:
+            if self._projection is not None:
+                data = {field: data[field] for field in self._projection if field in data}
+            else:
+                data = dict(data)
+            reference = FakeDocumentReference(self._client, self._collection, doc_id)
+            yield FakeDocumentSnapshot(reference, data)
+
+    def get(self):
+        return list(self.stream())
+
+
+class FakeQueryPartition:
+    def __init__(self, start_at, end_at):
+        self.start_at = start_at
+        self.end_at = end_at
+
+
+class FakeCollectionGroup:
+    def __init__(self, client, collection_id):
+        self._client = client
+        self._collection_id = collection_id
+
+    def get_partitions(self, partition_count):
+        """Split points evenly spaced over the sorted document IDs, like PartitionQuery"""
+        self._client._sleep()
+        with self._client._lock:
+            doc_ids = sorted(self._client._docs(self._collection_id))
+        step = len(doc_ids) / (partition_count + 1)
+        points = sorted({doc_ids[int(step * number)] for number in range(1, partition_count + 1)} if doc_ids else set())
+        start_at = None
+        for doc_id in points:
+            end_at = FakeDocumentReference(self._client, self._collection_id, doc_id)
+            yield FakeQueryPartition(start_at, end_at)
+            start_at = end_at
+        yield FakeQueryPartition(start_at, None)
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client, name):
+        super().__init__(client, name)
+        self.id = name
+
+    def on_snapshot(self, callback):
+        watch = FakeWatch(self._client, self._collection, callback)
+        with self._client._lock:
+            self._client._watches.append(watch)
+            docs = [
+                FakeDocumentSnapshot(self.document(doc_id), dict(data))
+                for doc_id, data in self._client._docs(self._collection).items()
+            ]
+        # Like the real listener, the first snapshot reports every document as added
+        watch._deliver(docs, [FakeDocumentChange(ChangeType.ADDED, doc) for doc in docs])
+        return watch
+
+    def document(self, document_id=None):
+        return FakeDocumentReference(self._client, self._collection, document_id or uuid.uuid4().hex[:20])
+
+    def add(self, data):
+        reference = self.document()
+        reference.set(data)
+        return time.time(), reference
+
+
+class ChangeType(enum.Enum):
+    ADDED = 1
+    REMOVED = 2
+    MODIFIED = 3
+
+
+class FakeDocumentChange:
+    def __init__(self, type, document):
+        self.type = type
+        self.document = document
+
+
+class FakeWatch:
+    """Listener handle returned by on_snapshot()"""
+
+    def __init__(self, client, collection_name, callback):
+        self._client = client
+        self._collection = collection_name
+        self._callback = callback
+        self._active = True
+
+    @property
+    def is_active(self):
+        return self._active
+
+    def _deliver(self, docs, changes):
+        if self._active:
+            self._callback(docs, changes, time.time())
+
+    def unsubscribe(self):
+        self._active = False
+        with self._client._lock:
+            if self in self._client._watches:
+                self._client._watches.remove(self)
+
+    close = unsubscribe
+
+
+class FakeWriteBatch:
+    """Buffers writes and applies them atomically on commit()"""
+
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(("set", reference, data, merge))
+
+    def create(self, reference, data):
+        self._writes.append(("create", reference, data, False))
+
+    def update(self, reference, data):
+        self._writes.append(("update", reference, data, True))
+
+    def delete(self, reference):
+        self._writes.append(("delete", reference, None, False))
+
+    def commit(self):
+        from google.api_core.exceptions import InvalidArgument
+
+        self._client._sleep()
+        if len(self._writes) > MAX_BATCH_WRITES:
+            raise InvalidArgument(f"A batch can contain at most {MAX_BATCH_WRITES} writes")
+        writes, self._writes = self._writes, []
+        self._client._apply_writes(writes)
+        return writes
+
+
+class FakeTransaction(FakeWriteBatch):
+    """Serializable transaction usable with ``firestore.transactional``
+
+    The fake simply holds the client lock from begin to commit, so reads
+    inside the transaction see a consistent view and never need a retry.
+    """
+
+    def __init__(self, client, max_attempts=5):
+        super().__init__(client)
+        self._id = None
+        self._max_attempts = max_attempts
+        self._read_only = False
+
+    def _clean_up(self):
+        self._writes = []
+        self._id = None
+
+    def _begin(self, retry_id=None):
+        self._client._lock.acquire()
+        self._id = uuid.uuid4().bytes
+
+    def _commit(self):
+        try:
+            return self.commit()
+        finally:
+            self._id = None
+            self._client._lock.release()
+
+    def _rollback(self):
+        self._writes = []
+        if self._id is not None:
+            self._id = None
+            self._client._lock.release()
+
+
+class FakeFirestore:
+    """Thread-safe, dict-backed stand-in for ``firestore.client()``"""
+
+    def __init__(self, latency=0.0, read_latency=0.0):
+        self.latency = latency
+        self.read_latency = read_latency
+        self._lock = threading.RLock()
+        self._collections = {}
+        self._watches = []
+        self._last_commit_time = datetime.min.replace(tzinfo=timezone.utc)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def transaction(self, max_attempts=5):
+        return FakeTransaction(self, max_attempts=max_attempts)
+
+    def get_all(self, references, transaction=None):
+        # One round trip for the whole batch of references
+        self._sleep()
+        with self._lock:
+            for reference in references:
+                data = self._docs(reference._collection).get(reference.id)
+                yield FakeDocumentSnapshot(reference, copy.deepcopy(data))
+
+    def fail_watches(self):
+        """Drop every active listener, as a stream error would"""
+        with self._lock:
+            watches, self._watches = self._watches, []
+        for watch in watches:
+            watch._active = False
+
+    def _apply_writes(self, writes):
+        from google.api_core.exceptions import AlreadyExists, NotFound
+        from google.cloud.firestore_v1 import SERVER_TIMESTAMP
+
+        changes = []
+        with self._lock:
+            commit_time = max(datetime.now(timezone.utc), self._last_commit_time + timedelta(microseconds=1))
+            self._last_commit_time = commit_time
+            transforms = {SERVER_TIMESTAMP: commit_time}
+            # Validate preconditions first so a failed batch writes nothing
+            for op, reference, _, _ in writes:
+                exists = reference.id in self._docs(reference._collection)
+                if op == "create" and exists:
+                    raise AlreadyExists(f"Document already exists: {reference.path}")
+                if op == "update" and not exists:
+                    raise NotFound(f"No document to update: {reference.path}")
+            for op, reference, data, merge in writes:
+                docs = self._docs(reference._collection)
+                existed = reference.id in docs
+                if op == "delete":
+                    if existed:
+                        changes.append((reference, ChangeType.REMOVED, docs.pop(reference.id)))
+                    continue
+                if merge:
+                    docs[reference.id] = _merge(docs.get(reference.id) or {}, data, transforms)
+                else:
+                    docs[reference.id] = _merge({}, data, transforms)
+                change_type = ChangeType.MODIFIED if existed else ChangeType.ADDED
+                changes.append((reference, change_type, docs[reference.id]))
+            watches = list(self._watches)
+            snapshots = {}
+            for watch in watches:
+                if any(reference._collection == watch._collection for reference, _, _ in changes):
+                    snapshots[watch] = [
+                        FakeDocumentSnapshot(FakeDocumentReference(self, watch._collection, doc_id), dict(doc))
+                        for doc_id, doc in self._docs(watch._collection).items()
+                    ]
+
+        # Listeners are called outside the lock, as the real client calls them from its own thread
+        for watch, docs in snapshots.items():
+            watch_changes = [
+                FakeDocumentChange(change_type, FakeDocumentSnapshot(reference, dict(data)))
+                for reference, change_type, data in changes
+                if reference._collection == watch._collection
+            ]
+            watch._deliver(docs, watch_changes)
+
+    def _sleep(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _docs(self, collection_name):
+        return self._collections.setdefault(collection_name, {})
+
+    def collection(self, name):
+        return FakeCollectionReference(self, name)
+
+    def collection_group(self, collection_id):
+        # Only top-level collections; the fake has no same-named subcollections to merge
+        return FakeCollectionGroup(self, collection_id)
+
+
+def _merge(target, data, transforms=None):
+    """Merge ``data`` into a copy of ``target``, applying Increment and sentinel transforms"""
+    transforms = transforms or {}
+    merged = copy.deepcopy(target)
+    for key, value in data.items():
+        if isinstance(value, dict):
+            merged[key] = _merge(merged.get(key) or {}, value, transforms)
+        elif type(value).__name__ == "Sentinel" and value in transforms:
+            merged[key] = transforms[value]
+        elif type(value).__name__ == "Increment":
+            merged[key] = (merged.get(key) or 0) + value.value
+        else:
+            merged[key] = copy.deepcopy(value)
+    return merged
+
+
+def _sort_key(value):
+    # Firestore orders null before numbers before strings; mirror that loosely
+    if value is None:
+        return (0, "")
+    if isinstance(value, (int, float)):
+        return (1, value)
+    if isinstance(value, datetime):
+        return (2, value)
+    return (3, str(value))
@@ -0,0 +1,684 @@
+"""
+Firestore engine for the restaurants collection.
+
+The Firestore Admin SDK client is blocking, so every call is run on a bounded
+thread pool instead of directly on the event loop. The pool size caps how many
+Firestore calls a single uvicorn worker has in flight at once.
+
+The document count and the per-city, per-state and per-creator breakdowns are
+materialized in sharded stats documents (counters/{collection}/shards). Each
+create and delete updates one shard in the same batch or transaction as the
+document write, so neither counting nor the admin stats need a collection scan.
+Every commit that changes restaurants also increments a shard's version; the
+sum over the shards is the collection version behind the list ETags.
+
+Each restaurant is stored under its restaurant_key as the document ID. Lookups
+by key are a single point read, and key uniqueness is enforced by Firestore
+when the document is created. Each restaurant is written with a derived
+search_tokens array (see search.py), which is stripped from every read, and,
+when it has coordinates, a geohash (see geo.py).
+
+Every write that changes what a client sees stamps changed_at with the commit
+time, and deletes leave a tombstone in {collection}_tombstones, so the changes
+feed is two ordered range queries. Tombstones carry an expire_at for a
+Firestore TTL policy; tokens older than the retention get ChangeTokenExpired.
+Batch deletes can first copy each document to {collection}_archive in the
+same transaction.
+
+Full-collection scans (exports, stats reconciliation) are split into
+document-ID ranges at the split points of a partition query, and the ranges
+are read concurrently, each a page at a time (see scan.py), instead of as one
+sequential stream.
+
+Document reads, writes and deletes are recorded against the current request
+(see metrics.py) as Firestore bills them: counter shard updates are writes, and
+a query that matches nothing still costs one read.
+"""
+
+import asyncio
+import contextvars
+import functools
+import logging
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from google.api_core import exceptions as google_exceptions
+from google.api_core.exceptions import AlreadyExists
+from google.cloud.firestore_v1 import SERVER_TIMESTAMP, Increment, transactional
+
+from geo import encode_geohash, normalize_zipcode
+from metrics import record
+from scan import SCAN_PAGE_SIZE, SHARDS_PER_WORKER, ordered_streams
+from search import document_tokens
+from store import (
+    INTERNAL_FIELDS,
+    SORT_FIELDS,
+    STATS_FIELDS,
+    TOMBSTONE_RETENTION_DAYS,
+    ChangeTokenExpired,
+    DuplicateRestaurantKey,
+    InvalidPageToken,
+    decode_change_token,
+    created_in_range,
+    decode_page_token,
+    encode_change_token,
+    encode_page_token,
+    is_valid_document_id,
+    project,
+    with_derived_fields,
+)
+
+COUNTERS_COLLECTION = "counters"
+
+# Errors worth retrying a bulk chunk commit for
+RETRYABLE_ERRORS = (
+    google_exceptions.Aborted,
+    google_exceptions.DeadlineExceeded,
+    google_exceptions.InternalServerError,
+    google_exceptions.ResourceExhausted,
+    google_exceptions.ServiceUnavailable,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def stats_delta(documents, amount):
+    """Shard update adding ``amount`` per document to the count and breakdown buckets"""
+    delta = {'count': Increment(amount * len(documents)), 'version': Increment(1)}
+    for field, stats_map in STATS_FIELDS.items():
+        buckets = {}
+        for data in documents:
+            bucket = data.get(field) or "Unknown"
+            buckets[bucket] = buckets.get(bucket, 0) + amount
+        delta[stats_map] = {bucket: Increment(total) for bucket, total in buckets.items()}
+    return delta
+
+
+def record_query_reads(count):
+    """Record the reads of a query that returned ``count`` documents"""
+    record("read", max(1, count))
+
+
+def snapshot_to_dict(doc):
+    """Convert a Firestore document snapshot to a response dict"""
+    data = doc.to_dict()
+    for field in INTERNAL_FIELDS:
+        data.pop(field, None)
+    data['id'] = doc.id
+    return data
+
+
+class FirestoreRestaurantStore:
+    """Restaurant reads and writes against Firestore, off the event loop"""
+
+    def __init__(self, client, max_concurrency=16, collection="restaurants", counter_shards=10,
+                 tombstone_retention_days=TOMBSTONE_RETENTION_DAYS, scan_parallelism=8):
+        self.client = client
+        self.collection_name = collection
+        self.max_concurrency = max_concurrency
+        # Shards of one scan read at once; capped by the pool, which other requests share
+        self.scan_parallelism = max(1, min(scan_parallelism, max_concurrency))
+        self.counter_shards = counter_shards
+        self.tombstone_retention = timedelta(days=tombstone_retention_days)
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrency,
+            thread_name_prefix="firestore",
+        )
+
+    @property
+    def collection(self):
+        return self.client.collection(self.collection_name)
+
+    @property
+    def tombstones_collection(self):
+        return self.client.collection(f"{self.collection_name}_tombstones")
+
+    @property
+    def archive_collection(self):
+        return self.client.collection(f"{self.collection_name}_archive")
+
+    @property
+    def counter_shards_collection(self):
+        return self.client.collection(COUNTERS_COLLECTION).document(self.collection_name).collection('shards')
+
+    def _random_counter_shard(self):
+        # Spreading increments over shards avoids the 1 write/sec/document limit
+        return self.counter_shards_collection.document(str(random.randrange(self.counter_shards)))
+
+    def _bump_version(self, batch):
+        """Add a collection version increment to ``batch``"""
+        batch.set(self._random_counter_shard(), {'version': Increment(1)}, merge=True)
+
+    def _tombstone(self, data):
+        return {
+            'restaurant_key': data.get('restaurant_key'),
+            'deleted_at': SERVER_TIMESTAMP,
+            'expire_at': datetime.now(timezone.utc) + self.tombstone_retention,
+        }
+
+    async def _run(self, fn, *args, **kwargs):
+        loop = asyncio.get_running_loop()
+        # Run in a copy of the caller's context so operation counts reach its request
+        context = contextvars.copy_context()
+        return await loop.run_in_executor(self._executor, functools.partial(context.run, fn, *args, **kwargs))
+
+    def close(self):
+        self._executor.shutdown(wait=False)
+
+    # Blocking implementations - only ever called from the executor
+
+    def _ping_sync(self):
+        self.client.collection('health_check').document('test').get()
+        record("read")
+
+    def _add_sync(self, data, idempotency_key=None):
+        # create() fails the whole batch if the key is taken, so stats stay exact
+        doc_ref = self.collection.document(data['restaurant_key'])
+        document = dict(with_derived_fields(data), changed_at=SERVER_TIMESTAMP)
+        if idempotency_key:
+            document['idempotency_key'] = idempotency_key
+        batch = self.client.batch()
+        batch.create(doc_ref, document)
+        batch.set(self._random_counter_shard(), stats_delta([data], 1), merge=True)
+        try:
+            batch.commit()
+        except AlreadyExists:
+            # Only the losing side of a conflict pays for the read
+            if idempotency_key:
+                existing = doc_ref.get()
+                record("read")
+                if existing.exists and (existing.to_dict() or {}).get('idempotency_key') == idempotency_key:
+                    return doc_ref.id
+            raise DuplicateRestaurantKey(f"Restaurant key '{data['restaurant_key']}' already exists")
+        record("write", 2)
+        return doc_ref.id
+
+    def _bulk_add_sync(self, documents, max_attempts=5):
+        """Create up to BULK_CHUNK_SIZE documents in one batch; returns {key: status}"""
+        refs = {data['restaurant_key']: self.collection.document(data['restaurant_key']) for data in documents}
+        results = {}
+
+        for attempt in range(max_attempts):
+            # Skip keys that already exist so create() cannot fail the whole batch
+            existing = {doc.id for doc in self.client.get_all(list(refs.values())) if doc.exists}
+            record("read", len(refs))
+            results.update({key: "duplicate" for key in existing})
+            to_create = [data for data in documents if data['restaurant_key'] not in results]
+            if not to_create:
+                return results
+
+            batch = self.client.batch()
+            for data in to_create:
+                batch.create(refs[data['restaurant_key']], dict(with_derived_fields(data), changed_at=SERVER_TIMESTAMP))
+            batch.set(self._random_counter_shard(), stats_delta(to_create, 1), merge=True)
+            try:
+                batch.commit()
+                record("write", len(to_create) + 1)
+                results.update({data['restaurant_key']: "created" for data in to_create})
+                return results
+            except AlreadyExists:
+                # A concurrent writer took one of the keys; re-check and try again
+                continue
+            except RETRYABLE_ERRORS as e:
+                if attempt == max_attempts - 1:
+                    raise
+                delay = min(0.2 * 2 ** attempt, 5.0) * (0.5 + random.random())
+                logger.warning(f"Bulk chunk commit failed ({e}); retrying in {delay:.2f}s")
+                time.sleep(delay)
+
+        raise google_exceptions.Aborted(f"Bulk chunk not committed after {max_attempts} attempts")
+
+    def _list_page_sync(self, sort_by, order, limit, page_token, fields=None):
+        if sort_by not in SORT_FIELDS:
+            sort_by = None
+        direction = "ASCENDING" if order == "asc" else "DESCENDING"
+        # Document ID is the tie-breaker so the cursor is stable across equal sort values
+        query = self.collection
+        if sort_by:
+            query = query.order_by(sort_by, direction=direction)
+        query = query.order_by('__name__', direction=direction)
+        if page_token:
+            query = query.start_after(decode_page_token(page_token, sort_by, order))
+        if fields is not None:
+            # Only the projected fields cross the wire; the sort field is kept for the cursor
+            query = query.select(sorted(set(fields) | ({sort_by} if sort_by else set())))
+
+        # Fetch one extra document to learn whether another page exists
+        restaurants = [snapshot_to_dict(doc) for doc in query.limit(limit + 1).stream()]
+        record_query_reads(len(restaurants))
+        next_page_token = None
+        if len(restaurants) > limit:
+            restaurants = restaurants[:limit]
+            next_page_token = encode_page_token(sort_by, order, restaurants[-1])
+        if fields is not None:
+            restaurants = [project(restaurant, fields) for restaurant in restaurants]
+        return restaurants, next_page_token
+
+    def _partition_bounds_sync(self, shard_count):
+        """Document ID ranges [start, end) that together cover the collection, at most ``shard_count``"""
+        if shard_count <= 1:
+            return [(None, None)]
+        # Partition queries only exist for collection groups. Split points from a
+        # same-named subcollection would still be valid ID bounds, just uneven ones.
+        partitions = list(self.client.collection_group(self.collection_name).get_partitions(shard_count - 1))
+        record_query_reads(len(partitions))
+        return [
+            (partition.start_at.id if partition.start_at else None, partition.end_at.id if partition.end_at else None)
+            for partition in partitions
+        ]
+
+    def _scan_page_sync(self, start, end, after, fields, page_size):
+        """Up to ``page_size`` restaurants of the range [start, end) with IDs after ``after``"""
+        query = self.collection.order_by('__name__')
+        if after is not None:
+            query = query.start_after({'__name__': after})
+        elif start is not None:
+            query = query.start_at({'__name__': start})
+        if end is not None:
+            query = query.end_before({'__name__': end})
+        if fields is not None:
+            query = query.select(list(fields))
+        restaurants = [snapshot_to_dict(doc) for doc in query.limit(page_size).stream()]
+        record_query_reads(len(restaurants))
+        return restaurants
+
+    async def _scan_range(self, start, end, fields=None, page_size=SCAN_PAGE_SIZE):
+        after = None
+        while True:
+            restaurants = await self._run(self._scan_page_sync, start, end, after, fields, page_size)
+            if restaurants:
+                yield restaurants
+            if len(restaurants) < page_size:
+                return
+            after = restaurants[-1]['id']
+
+    def _get_by_key_sync(self, restaurant_key):
+        if not is_valid_document_id(restaurant_key):
+            return None
+        doc = self.collection.document(restaurant_key).get()
+        record("read")
+        if doc.exists:
+            return snapshot_to_dict(doc)
+
+        # Documents written before keys became IDs; unnecessary once migrate-keys has run
+        query = self.collection.where('restaurant_key', '==', restaurant_key).limit(1)
+        record("read")
+        for doc in query.stream():
+            return snapshot_to_dict(doc)
+        return None
+
+    def _search_sync(self, tokens, candidate_limit):
+        """Documents containing the most selective query token; ranking happens in the caller"""
+        # Longer tokens are rarer, so they make the smallest candidate set
+        anchor = max(tokens, key=len)
+        query = self.collection.where('search_tokens', 'array_contains', anchor).limit(candidate_limit + 1)
+        candidates = [snapshot_to_dict(doc) for doc in query.stream()]
+        record_query_reads(len(candidates))
+        return candidates[:candidate_limit], len(candidates) > candidate_limit
+
+    def _geohash_range_sync(self, start, end):
+        query = self.collection.where('geohash', '>=', start).where('geohash', '<=', end)
+        candidates = [snapshot_to_dict(doc) for doc in query.stream()]
+        record_query_reads(len(candidates))
+        return candidates
+
+    def _changes_sync(self, since, limit):
+        """Upserts and tombstones after ``since``, merged in commit-time order"""
+        after = None
+        if since:
+            position = decode_change_token(since)
+            try:
+                # A null time is the start of the feed, handed out when it was empty
+                if position['t'] is not None:
+                    after = (datetime.fromisoformat(position['t']), str(position['id']))
+                    if after[0].tzinfo is None:
+                        raise ValueError(position['t'])
+            except (KeyError, TypeError, ValueError):
+                raise InvalidPageToken("Malformed changes token")
+            if after is not None and after[0] < datetime.now(timezone.utc) - self.tombstone_retention:
+                raise ChangeTokenExpired("Changes token is older than the tombstone retention")
+
+        def ordered(collection, time_field):
+            query = collection.order_by(time_field).order_by('__name__')
+            if after is not None:
+                query = query.start_after({time_field: after[0], '__name__': after[1]})
+            docs = list(query.limit(limit + 1).stream())
+            record_query_reads(len(docs))
+            return docs
+
+        # One commit stamps all its writes alike, so the document ID breaks ties
+        entries = [(doc.get('changed_at'), doc.id, "upsert", doc) for doc in ordered(self.collection, 'changed_at')]
+        if since:
+            # A first sync starts from nothing, so it has no use for tombstones
+            entries += [(doc.get('deleted_at'), doc.id, "delete", doc)
+                        for doc in ordered(self.tombstones_collection, 'deleted_at')]
+        entries.sort(key=lambda entry: entry[:2])
+
+        changes = []
+        for _, doc_id, change_type, doc in entries[:limit]:
+            if change_type == "upsert":
+                changes.append({"type": "upsert", "id": doc_id, "restaurant": snapshot_to_dict(doc)})
+            else:
+                changes.append({"type": "delete", "id": doc_id, "restaurant_key": doc.get('restaurant_key')})
+
+        if changes:
+            last_time, last_id = entries[len(changes) - 1][:2]
+            next_token = encode_change_token({'t': last_time.isoformat(), 'id': last_id})
+        else:
+            next_token = since or encode_change_token({'t': None})
+        return changes, next_token, len(entries) > limit
+
+    def _delete_sync(self, restaurant_id):
+        doc_ref = self.collection.document(restaurant_id)
+        shard_ref = self._random_counter_shard()
+
+        @transactional
+        def delete_in_transaction(transaction):
+            # Only decrement the counter if the document actually existed
+            snapshot = doc_ref.get(transaction=transaction)
+            record("read")
+            if not snapshot.exists:
+                return None
+            transaction.delete(doc_ref)
+            transaction.set(self.tombstones_collection.document(restaurant_id), self._tombstone(snapshot.to_dict()))
+            transaction.set(shard_ref, stats_delta([snapshot.to_dict()], -1), merge=True)
+            record("delete")
+            record("write", 2)
+            return snapshot_to_dict(snapshot)
+
+        return delete_in_transaction(self.client.transaction())
+
+    def _delete_many_sync(self, restaurant_ids, archive=False):
+        refs = [self.collection.document(restaurant_id) for restaurant_id in restaurant_ids]
+        shard_ref = self._random_counter_shard()
+
+        @transactional
+        def delete_in_transaction(transaction):
+            # One round trip reads the whole chunk; only documents that still exist are counted
+            snapshots = [snapshot for snapshot in self.client.get_all(refs, transaction=transaction) if snapshot.exists]
+            record("read", len(refs))
+            if not snapshots:
+                return []
+            documents = [snapshot.to_dict() for snapshot in snapshots]
+            for snapshot, data in zip(snapshots, documents):
+                if archive:
+                    transaction.set(self.archive_collection.document(snapshot.id), dict(data, archived_at=SERVER_TIMESTAMP))
+                transaction.delete(snapshot.reference)
+                transaction.set(self.tombstones_collection.document(snapshot.id), self._tombstone(data))
+            transaction.set(shard_ref, stats_delta(documents, -1), merge=True)
+            record("delete", len(snapshots))
+            record("write", (3 if archive else 2) * len(snapshots))
+            return [snapshot_to_dict(snapshot) for snapshot in snapshots]
+
+        return delete_in_transaction(self.client.transaction())
+
+    def _matching_ids_sync(self, created_by, created_from, created_before):
+        query = self.collection
+        if created_by is not None:
+            # Equality plus a range would need a composite index, so the range is checked here instead
+            query = query.where('created_by', '==', created_by)
+        else:
+            if created_from is not None:
+                query = query.where('created_at', '>=', created_from)
+            if created_before is not None:
+                query = query.where('created_at', '<', created_before)
+        docs = list(query.select(['created_at']).stream())
+        record_query_reads(len(docs))
+        return [doc.id for doc in docs if created_in_range(doc.to_dict() or {}, created_from, created_before)]
+
+    def _migrate_keys_sync(self, dry_run=False, batch_size=150):
+        summary = {"scanned": 0, "migrated": 0, "already_keyed": 0, "duplicates": [], "invalid": []}
+        pending = []
+
+        def move_batch(moves):
+            batch = self.client.batch()
+            for doc, target in moves:
+                batch.create(target, dict(doc.to_dict(), changed_at=SERVER_TIMESTAMP))
+                batch.delete(doc.reference)
+                # Synced clients hold the document under its old ID
+                batch.set(self.tombstones_collection.document(doc.id), self._tombstone(doc.to_dict()))
+            self._bump_version(batch)
+            batch.commit()
+
+        def flush():
+            if not pending or dry_run:
+                summary["migrated"] += len(pending)
+                pending.clear()
+                return
+            try:
+                move_batch(pending)
+                summary["migrated"] += len(pending)
+            except AlreadyExists:
+                # Some target IDs are taken; retry one document at a time to find them
+                for move in pending:
+                    try:
+                        move_batch([move])
+                        summary["migrated"] += 1
+                    except AlreadyExists:
+                        summary["duplicates"].append(move[0].id)
+            pending.clear()
+
+        for doc in self.collection.stream():
+            summary["scanned"] += 1
+            restaurant_key = doc.to_dict().get('restaurant_key')
+            if doc.id == restaurant_key:
+                summary["already_keyed"] += 1
+            elif not is_valid_document_id(restaurant_key or ""):
+                summary["invalid"].append(doc.id)
+            elif any(target.id == restaurant_key for _, target in pending):
+                summary["duplicates"].append(doc.id)
+            else:
+                pending.append((doc, self.collection.document(restaurant_key)))
+                if len(pending) >= batch_size:
+                    flush()
+        flush()
+        return summary
+
+    def _backfill_search_tokens_sync(self, batch_size=400):
+        summary = {"scanned": 0, "updated": 0}
+        fields = ["restaurant_name", "city", "zipcode", "primary_phone", "search_tokens"]
+        batch, pending = self.client.batch(), 0
+        for doc in self.collection.select(fields).stream():
+            summary["scanned"] += 1
+            data = doc.to_dict()
+            tokens = document_tokens(data)
+            if data.get('search_tokens') == tokens:
+                continue
+            batch.update(doc.reference, {'search_tokens': tokens})
+            pending += 1
+            if pending >= batch_size:
+                self._bump_version(batch)
+                batch.commit()
+                summary["updated"] += pending
+                batch, pending = self.client.batch(), 0
+        if pending:
+            self._bump_version(batch)
+            batch.commit()
+            summary["updated"] += pending
+        return summary
+
+    def _backfill_changed_at_sync(self, batch_size=400):
+        """Stamp changed_at on documents written before the changes feed existed"""
+        summary = {"scanned": 0, "updated": 0}
+        batch, pending = self.client.batch(), 0
+        for doc in self.collection.select(['changed_at']).stream():
+            summary["scanned"] += 1
+            if doc.to_dict().get('changed_at') is not None:
+                continue
+            batch.update(doc.reference, {'changed_at': SERVER_TIMESTAMP})
+            pending += 1
+            if pending >= batch_size:
+                batch.commit()
+                summary["updated"] += pending
+                batch, pending = self.client.batch(), 0
+        if pending:
+            batch.commit()
+            summary["updated"] += pending
+        return summary
+
+    def _geocode_sync(self, centroids, overwrite=False, dry_run=False, batch_size=400):
+        """Locate restaurants at their zipcode centroid; returns a summary"""
+        summary = {"scanned": 0, "geocoded": 0, "already_located": 0, "unmatched": 0}
+        fields = ["zipcode", "latitude", "longitude", "geocode_source"]
+        batch, pending = self.client.batch(), 0
+        for doc in self.collection.select(fields).stream():
+            summary["scanned"] += 1
+            data = doc.to_dict()
+            located = data.get('latitude') is not None and data.get('longitude') is not None
+            # Coordinates entered with the restaurant are better than a centroid; never replace them
+            if located and (not overwrite or data.get('geocode_source') != "zipcode_centroid"):
+                summary["already_located"] += 1
+                continue
+            centroid = centroids.get(normalize_zipcode(data.get('zipcode')))
+            if centroid is None:
+                summary["unmatched"] += 1
+                continue
+            summary["geocoded"] += 1
+            if dry_run:
+                continue
+            latitude, longitude = centroid
+            batch.update(doc.reference, {
+                'latitude': latitude,
+                'longitude': longitude,
+                'geohash': encode_geohash(latitude, longitude),
+                'geocode_source': "zipcode_centroid",
+                'changed_at': SERVER_TIMESTAMP,
+            })
+            pending += 1
+            if pending >= batch_size:
+                self._bump_version(batch)
+                batch.commit()
+                batch, pending = self.client.batch(), 0
+        if pending:
+            self._bump_version(batch)
+            batch.commit()
+        return summary
+
+    def _stats_sync(self):
+        shards = list(self.counter_shards_collection.stream())
+        record_query_reads(len(shards))
+        if not shards:
+            # Stats were never initialized (e.g. data written before they existed)
+            return None
+
+        stats = {'count': 0, 'version': 0}
+        stats.update({stats_map: {} for stats_map in STATS_FIELDS.values()})
+        for shard in shards:
+            shard_data = shard.to_dict()
+            stats['count'] += shard_data.get('count', 0)
+            stats['version'] += shard_data.get('version', 0)
+            for stats_map in STATS_FIELDS.values():
+                for bucket, amount in (shard_data.get(stats_map) or {}).items():
+                    stats[stats_map][bucket] = stats[stats_map].get(bucket, 0) + amount
+
+        # Buckets decremented to zero by deletes are left behind in the shards
+        for stats_map in STATS_FIELDS.values():
+            stats[stats_map] = {bucket: amount for bucket, amount in stats[stats_map].items() if amount > 0}
+        return stats
+
+    def _write_stats_sync(self, stats):
+        # The shards are rewritten below; carry the version forward (and past the current one)
+        shards = list(self.counter_shards_collection.stream())
+        record_query_reads(len(shards))
+        stats['version'] = sum(shard.to_dict().get('version', 0) for shard in shards) + 1
+
+        # Writes that land between the scan and this batch are lost; run when idle
+        batch = self.client.batch()
+        for shard in range(self.counter_shards):
+            shard_data = stats if shard == 0 else {'count': 0}
+            batch.set(self.counter_shards_collection.document(str(shard)), shard_data)
+        batch.commit()
+        record("write", self.counter_shards)
+        return stats
+
+    # Async API used by the routes
+
+    async def ensure_indexes(self):
+        # Firestore indexes are declared in the project, not created by the client
+        pass
+
+    async def ping(self):
+        return await self._run(self._ping_sync)
+
+    async def add(self, data, idempotency_key=None):
+        return await self._run(self._add_sync, data, idempotency_key)
+
+    async def bulk_add(self, documents):
+        return await self._run(self._bulk_add_sync, documents)
+
+    async def list_page(self, sort_by="created_at", order="desc", limit=50, page_token=None, fields=None):
+        return await self._run(self._list_page_sync, sort_by, order, limit, page_token, fields)
+
+    async def get_by_key(self, restaurant_key):
+        return await self._run(self._get_by_key_sync, restaurant_key)
+
+    async def search(self, tokens, candidate_limit=1000):
+        return await self._run(self._search_sync, tokens, candidate_limit)
+
+    async def geohash_candidates(self, ranges):
+        """Restaurants whose geohash falls in any of ``ranges``, one query per range in parallel"""
+        pages = await asyncio.gather(*(self._run(self._geohash_range_sync, start, end) for start, end in ranges))
+        candidates = {}
+        for page in pages:
+            for restaurant in page:
+                candidates[restaurant['id']] = restaurant
+        return list(candidates.values())
+
+    async def delete(self, restaurant_id):
+        return await self._run(self._delete_sync, restaurant_id)
+
+    async def delete_many(self, restaurant_ids, archive=False):
+        return await self._run(self._delete_many_sync, list(restaurant_ids), archive)
+
+    async def matching_ids(self, created_by=None, created_from=None, created_before=None):
+        return await self._run(self._matching_ids_sync, created_by, created_from, created_before)
+
+    async def changes(self, since=None, limit=500):
+        return await self._run(self._changes_sync, since, limit)
+
+    async def count(self):
+        return (await self.stats())['count']
+
+    async def migrate_keys(self, dry_run=False):
+        return await self._run(self._migrate_keys_sync, dry_run)
+
+    async def backfill_search_tokens(self):
+        return await self._run(self._backfill_search_tokens_sync)
+
+    async def backfill_changed_at(self):
+        return await self._run(self._backfill_changed_at_sync)
+
+    async def geocode(self, centroids, overwrite=False, dry_run=False):
+        return await self._run(self._geocode_sync, centroids, overwrite, dry_run)
+
+    async def stats(self):
+        stats = await self._run(self._stats_sync)
+        if stats is None:
+            stats = await self.reconcile_stats()
+        return stats
+
+    async def version(self):
+        # Costs one read per counter shard
+        return (await self.stats())['version']
+
+    async def reconcile_stats(self):
+        # Projected scan: only the bucketed fields are read back
+        stats = {'count': 0}
+        stats.update({stats_map: {} for stats_map in STATS_FIELDS.values()})
+        async for restaurants in self.scan(fields=list(STATS_FIELDS)):
+            stats['count'] += len(restaurants)
+            for data in restaurants:
+                for field, stats_map in STATS_FIELDS.items():
+                    bucket = data.get(field) or "Unknown"
+                    stats[stats_map][bucket] = stats[stats_map].get(bucket, 0) + 1
+        return await self._run(self._write_stats_sync, stats)
+
+    async def scan(self, fields=None, parallelism=None):
+        """Yield every restaurant, in lists, in document-ID order; ranges are read concurrently"""
+        parallelism = max(1, min(parallelism or self.scan_parallelism, self.max_concurrency))
+        bounds = await self._run(self._partition_bounds_sync, parallelism * SHARDS_PER_WORKER)
+        ranges = [functools.partial(self._scan_range, start, end, fields) for start, end in bounds]
+        async for restaurants in ordered_streams(ranges, parallelism):
+            yield restaurants
@@ -0,0 +1,153 @@
+"""
+Geohash encoding and proximity helpers for "restaurants near me".
+
+A geohash interleaves longitude and latitude bits into a base32 string, so
+locations inside one cell share a prefix and a prefix is a contiguous range of
+the sorted geohash index. A radius search covers the circle's bounding box with
+the smallest cells that keep the cell count under MAX_QUERY_CELLS. It runs one
+range query per cell and then drops candidates that are outside the exact
+haversine distance.
+"""
+
+import csv
+import math
+
+BASE32 = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9  # roughly 5m x 5m cells
+EARTH_RADIUS_KM = 6371.0088
+KM_PER_DEGREE_LAT = 110.574
+
+# Upper bound on range queries per nearby search
+MAX_QUERY_CELLS = 16
+
+# Greater than every base32 character, so prefix + RANGE_END bounds a prefix range
+RANGE_END = "~"
+
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    """Base32 geohash of a point"""
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    chars, bits, value, even = [], 0, 0, True
+    while len(chars) < precision:
+        interval, coordinate = (lng_range, lng) if even else (lat_range, lat)
+        middle = (interval[0] + interval[1]) / 2
+        value <<= 1
+        if coordinate >= middle:
+            value |= 1
+            interval[0] = middle
+        else:
+            interval[1] = middle
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(BASE32[value])
+            bits, value = 0, 0
+    return "".join(chars)
+
+
+def cell_size_degrees(precision):
+    """(lat, lng) extent in degrees of a geohash cell at ``precision``"""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / 2 ** lat_bits, 360.0 / 2 ** lng_bits
+
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    """Great-circle distance between two points in kilometres"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lng2 - lng1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def bounding_box(lat, lng, radius_km):
+    """(min_lat, min_lng, max_lat, max_lng) enclosing the search circle"""
+    d_lat = radius_km / KM_PER_DEGREE_LAT
+    # Longitude degrees are narrowest at the circle's edge farthest from the equator
+    edge_lat = min(89.9, abs(lat) + d_lat)
+    d_lng = min(180.0, radius_km / (KM_PER_DEGREE_LAT * math.cos(math.radians(edge_lat))))
+    return max(-90.0, lat - d_lat), lng - d_lng, min(90.0, lat + d_lat), lng + d_lng
+
+
+def _steps(low, high, size):
+    # Points no more than one cell apart from low to high, so every cell in between is hit
+    value = low
+    while value < high:
+        yield value
+        value += size
+    yield high
+
+
+def covering_cells(lat, lng, radius_km, max_cells=MAX_QUERY_CELLS):
+    """Geohash prefixes of the cells overlapping the circle's bounding box, at the
+    finest precision that needs no more than ``max_cells`` of them"""
+    min_lat, min_lng, max_lat, max_lng = bounding_box(lat, lng, radius_km)
+    for precision in range(GEOHASH_PRECISION, 0, -1):
+        lat_size, lng_size = cell_size_degrees(precision)
+        rows = math.floor(max_lat / lat_size) - math.floor(min_lat / lat_size) + 1
+        columns = math.floor(max_lng / lng_size) - math.floor(min_lng / lng_size) + 1
+        if rows * columns <= max_cells or precision == 1:
+            break
+    cells = set()
+    for cell_lat in _steps(min_lat, max_lat, lat_size):
+        for cell_lng in _steps(min_lng, max_lng, lng_size):
+            cells.add(encode_geohash(cell_lat, (cell_lng + 180.0) % 360.0 - 180.0, precision))
+    return sorted(cells)
+
+
+def query_ranges(lat, lng, radius_km):
+    """[start, end] geohash ranges, one per covering cell"""
+    return [(prefix, prefix + RANGE_END) for prefix in covering_cells(lat, lng, radius_km)]
+
+
+def within_radius(restaurants, lat, lng, radius_km):
+    """Restaurants inside the circle, nearest first, each with ``distance_km``"""
+    nearby = []
+    for restaurant in restaurants:
+        latitude, longitude = restaurant.get('latitude'), restaurant.get('longitude')
+        if latitude is None or longitude is None:
+            continue
+        distance = haversine_km(lat, lng, latitude, longitude)
+        if distance <= radius_km:
+            nearby.append(dict(restaurant, distance_km=round(distance, 3)))
+    nearby.sort(key=lambda restaurant: (restaurant['distance_km'], restaurant['id']))
+    return nearby
+
+
+def normalize_zipcode(zipcode):
+    """Five-digit ZIP code from e.g. '78701-1234' or '2134', or None"""
+    digits = "".join(char for char in str(zipcode or "") if char.isdigit())
+    if len(digits) in (5, 9):
+        return digits[:5]
+    if 3 <= len(digits) < 5:
+        # Leading zeros dropped by a spreadsheet
+        return digits.zfill(5)
+    return None
+
+
+def load_zipcode_centroids(path):
+    """Read a zipcode,latitude,longitude CSV (header names are matched loosely)"""
+    centroids = {}
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        reader = csv.DictReader(f)
+        columns = {name.strip().lower(): name for name in reader.fieldnames or []}
+
+        def column(*candidates):
+            for candidate in candidates:
+                if candidate in columns:
+                    return columns[candidate]
+            raise ValueError(f"{path} has no {candidates[0]} column (found: {', '.join(columns)})")
+
+        zip_column = column("zipcode", "zip", "zip_code", "postal_code", "zcta")
+        lat_column = column("latitude", "lat", "intptlat")
+        lng_column = column("longitude", "lng", "lon", "long", "intptlong")
+        for row in reader:
+            zipcode = normalize_zipcode(row[zip_column])
+            try:
+                centroids[zipcode] = (float(row[lat_column]), float(row[lng_column]))
+            except (TypeError, ValueError):
+                continue
+    centroids.pop(None, None)
+    return centroids
@@ -0,0 +1,87 @@
+"""
+Coalescing of duplicate write requests.
+
+Mobile clients on flaky connections retry creates whose first attempt may
+still be running or may already have succeeded. Coalescer.run() starts one
+write per key. Duplicates that arrive while it is in flight await the same
+task. Unless told not to remember it, a successful result is then replayed
+for ``window_seconds`` instead of running the write again. Failures are
+never remembered, so a retry after an error really retries.
+
+State is per process and touched from the event loop only, so it takes no
+locks. Retries that land on another worker are caught by the store, which
+keeps the Idempotency-Key on the document it created.
+"""
+
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+
+class IdempotencyKeyReused(ValueError):
+    """Raised when an Idempotency-Key comes back with a different request body"""
+
+
+def fingerprint(payload):
+    """Stable digest of a JSON-encodable request payload"""
+    encoded = json.dumps(payload, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(encoded.encode()).hexdigest()
+
+
+class Coalescer:
+    """One in-flight write per key, its outcome shared with duplicates and its success replayed"""
+
+    def __init__(self, window_seconds=300.0, max_entries=10000):
+        self.window_seconds = window_seconds
+        self.max_entries = max_entries
+        self._in_flight = {}  # key -> (fingerprint, task)
+        self._completed = OrderedDict()  # key -> (expires_at, fingerprint, result)
+        self.coalesced = 0
+        self.replayed = 0
+
+    async def run(self, key, request_fingerprint, write, remember=True):
+        """Result of ``write()`` for ``key``, running it only if no duplicate is in flight or recent"""
+        entry = self._completed.get(key)
+        if entry is not None:
+            expires_at, stored_fingerprint, result = entry
+            if expires_at < time.monotonic():
+                del self._completed[key]
+            else:
+                self._check(key, stored_fingerprint, request_fingerprint)
+                self.replayed += 1
+                return result
+
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            stored_fingerprint, task = in_flight
+            self._check(key, stored_fingerprint, request_fingerprint)
+            self.coalesced += 1
+        else:
+            # A task of its own, so a client that disconnects does not cancel the write for the others
+            task = asyncio.ensure_future(write())
+            self._in_flight[key] = (request_fingerprint, task)
+            task.add_done_callback(lambda done: self._finish(key, request_fingerprint, done, remember))
+        return await asyncio.shield(task)
+
+    def _check(self, key, stored_fingerprint, request_fingerprint):
+        if stored_fingerprint != request_fingerprint:
+            raise IdempotencyKeyReused(f"Idempotency-Key {key[1]!r} was already used with a different request")
+
+    def _finish(self, key, request_fingerprint, task, remember):
+        self._in_flight.pop(key, None)
+        if task.cancelled() or task.exception() is not None or not remember:
+            return
+        self._completed[key] = (time.monotonic() + self.window_seconds, request_fingerprint, task.result())
+        self._completed.move_to_end(key)
+        while len(self._completed) > self.max_entries:
+            self._completed.popitem(last=False)
+
+    def stats(self):
+        return {
+            "in_flight": len(self._in_flight),
+            "remembered": len(self._completed),
+            "coalesced": self.coalesced,
+            "replayed": self.replayed,
+        }
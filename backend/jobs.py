@@ -0,0 +1,76 @@
+"""
+Background jobs for admin operations too long for one request.
+
+JobRegistry.start() runs a coroutine as an asyncio task and returns its job
+record at once. The coroutine updates its record's progress fields as it goes,
+and the registry sets status, error and finished_at when it ends, so a client
+polls the record instead of holding a request open. Records are kept per
+process, newest last, up to ``max_jobs``; finished ones are dropped first.
+With several workers, a job is only visible on the worker that started it.
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+logger = logging.getLogger(__name__)
+
+
+def utc_now():
+    return datetime.now(timezone.utc).isoformat()
+
+
+class JobRegistry:
+    """Running and recently finished jobs by ID"""
+
+    def __init__(self, max_jobs=100):
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()  # job ID -> record
+        self._tasks = {}  # job ID -> task, held so running jobs are not garbage collected
+
+    def start(self, kind, run, **progress):
+        """Start ``run(job)`` in the background; returns the job record with ``progress`` as its initial fields"""
+        job = {
+            "id": uuid.uuid4().hex,
+            "kind": kind,
+            "status": "running",
+            "created_at": utc_now(),
+            "finished_at": None,
+            "error": None,
+            **progress,
+        }
+        self._jobs[job["id"]] = job
+        self._trim()
+        task = asyncio.create_task(self._run(job, run))
+        self._tasks[job["id"]] = task
+        task.add_done_callback(lambda done: self._tasks.pop(job["id"], None))
+        return job
+
+    async def _run(self, job, run):
+        try:
+            await run(job)
+            job["status"] = "succeeded"
+        except asyncio.CancelledError:
+            job["status"] = "cancelled"
+            raise
+        except Exception as e:
+            logger.error(f"Job {job['id']} ({job['kind']}) failed: {str(e)}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = utc_now()
+
+    def _trim(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job["finished_at"] is not None]
+        while len(self._jobs) > self.max_jobs and finished:
+            del self._jobs[finished.pop(0)]
+
+    def get(self, job_id):
+        """The job's record, or None if it is unknown or was dropped"""
+        return self._jobs.get(job_id)
+
+    def cancel_all(self):
+        for task in list(self._tasks.values()):
+            task.cancel()
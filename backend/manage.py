@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""
+Maintenance commands for the Firestore restaurant backend.
+
+Usage: python manage.py <command>
+
+A standalone MongoDB server cannot update the stats counters in the same
+transaction as the documents, so schedule reconcile-stats there (e.g. nightly
+from cron) to repair any drift left by interrupted writes.
+"""
+
+import argparse
+import asyncio
+import sys
+
+
+def reconcile_stats(args):
+    """Recompute the sharded restaurant count and breakdowns from scratch"""
+    from server import store
+
+    stats = asyncio.run(store.reconcile_stats())
+    print(f"✅ Restaurant stats reconciled: {stats['count']} documents, "
+          f"{len(stats['cities'])} cities, {len(stats['states'])} states")
+
+
+def refresh_snapshot(args):
+    """Write the Parquet analytics snapshot, or apply the changes since its last refresh"""
+    from server import RESTAURANT_SNAPSHOT_PATH, store
+    from snapshot import RestaurantSnapshot
+
+    path = args.path or RESTAURANT_SNAPSHOT_PATH
+    if not path:
+        sys.exit("❌ No snapshot path: pass --path or set RESTAURANT_SNAPSHOT_PATH")
+    summary = asyncio.run(RestaurantSnapshot(path).refresh(store))
+    action = "Rebuilt" if summary['full'] else "Refreshed"
+    print(f"✅ {action} {path}: {summary['changes']} changes applied, {summary['rows']} restaurants")
+
+
+def require_firestore_store():
+    """The server's store, exiting unless it is the Firestore engine"""
+    from server import RESTAURANT_STORE, store
+
+    if RESTAURANT_STORE != "firestore":
+        sys.exit(f"❌ This command only applies to the Firestore store (RESTAURANT_STORE={RESTAURANT_STORE})")
+    return store
+
+
+def migrate_keys(args):
+    """Re-key existing restaurants so their document ID is the restaurant_key"""
+    store = require_firestore_store()
+
+    summary = asyncio.run(store.migrate_keys(dry_run=args.dry_run))
+    action = "Would migrate" if args.dry_run else "Migrated"
+    print(f"✅ {action} {summary['migrated']} of {summary['scanned']} documents "
+          f"({summary['already_keyed']} already keyed)")
+    if summary['duplicates']:
+        print(f"⚠️  Key already taken, left in place: {', '.join(summary['duplicates'])}")
+    if summary['invalid']:
+        print(f"⚠️  Missing or invalid restaurant_key, left in place: {', '.join(summary['invalid'])}")
+
+
+def backfill_search(args):
+    """Write search tokens for restaurants created before search existed"""
+    store = require_firestore_store()
+
+    summary = asyncio.run(store.backfill_search_tokens())
+    print(f"✅ Search tokens updated on {summary['updated']} of {summary['scanned']} documents")
+
+
+def backfill_changes(args):
+    """Stamp changed_at on restaurants written before the changes feed existed"""
+    store = require_firestore_store()
+
+    summary = asyncio.run(store.backfill_changed_at())
+    print(f"✅ changed_at stamped on {summary['updated']} of {summary['scanned']} documents")
+
+
+def geocode(args):
+    """Locate restaurants without coordinates at their zipcode centroid (offline)"""
+    from geo import load_zipcode_centroids
+
+    store = require_firestore_store()
+
+    centroids = load_zipcode_centroids(args.centroids)
+    print(f"📍 Loaded {len(centroids)} zipcode centroids from {args.centroids}")
+    summary = asyncio.run(store.geocode(centroids, overwrite=args.overwrite, dry_run=args.dry_run))
+    action = "Would geocode" if args.dry_run else "Geocoded"
+    print(f"✅ {action} {summary['geocoded']} of {summary['scanned']} documents "
+          f"({summary['already_located']} already located, {summary['unmatched']} zipcodes not in the table)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Restaurant backend maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("reconcile-stats", help=reconcile_stats.__doc__).set_defaults(func=reconcile_stats)
+
+    migrate = commands.add_parser("migrate-keys", help=migrate_keys.__doc__)
+    migrate.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    migrate.set_defaults(func=migrate_keys)
+
+    commands.add_parser("backfill-search", help=backfill_search.__doc__).set_defaults(func=backfill_search)
+    commands.add_parser("backfill-changes", help=backfill_changes.__doc__).set_defaults(func=backfill_changes)
+
+    snapshot_parser = commands.add_parser("refresh-snapshot", help=refresh_snapshot.__doc__)
+    snapshot_parser.add_argument("--path", help="Snapshot file (default: RESTAURANT_SNAPSHOT_PATH)")
+    snapshot_parser.set_defaults(func=refresh_snapshot)
+
+    geocode_parser = commands.add_parser("geocode", help=geocode.__doc__)
+    geocode_parser.add_argument("centroids", help="CSV with zipcode, latitude and longitude columns")
+    geocode_parser.add_argument("--overwrite", action="store_true",
+                                help="Recompute coordinates that came from an earlier centroid run")
+    geocode_parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    geocode_parser.set_defaults(func=geocode)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,370 @@
+"""
+In-memory restaurant storage.
+
+RestaurantIndex holds documents together with the indexes the API reads
+through: a sorted (value, id) list per ordered field, a restaurant_key lookup,
+search-token postings and the stats buckets. Every index is updated in place
+on each write, and each write bumps the index version. The replica keeps one of these fed from a snapshot listener.
+MemoryRestaurantStore serves one directly, as a store engine for local runs,
+load tests and benchmarks. It records the documents it returns, writes and
+deletes (see metrics.py) so that request costs compare across engines. Its
+changes feed is an append-only log of document IDs in which entry i holds
+change sequence i + 1, so a token resumes by index.
+"""
+
+import bisect
+import threading
+import uuid
+
+from metrics import record
+from scan import iter_pages
+from search import document_tokens
+from store import (
+    INTERNAL_FIELDS,
+    SORT_FIELDS,
+    STATS_FIELDS,
+    ChangeTokenExpired,
+    DuplicateRestaurantKey,
+    InvalidPageToken,
+    created_in_range,
+    decode_change_token,
+    decode_page_token,
+    encode_change_token,
+    encode_page_token,
+    project,
+    with_derived_fields,
+)
+
+
+def rank(value):
+    """Sort key approximating Firestore's cross-type ordering"""
+    if value is None:
+        return (0, 0)
+    if isinstance(value, bool):
+        return (1, value)
+    if isinstance(value, (int, float)):
+        return (2, value)
+    return (3, str(value))
+
+
+class RestaurantIndex:
+    """Restaurant documents with sorted, key, search and stats indexes kept in step"""
+
+    def __init__(self):
+        self.lock = threading.RLock()
+        # Versions from different processes must never compare equal
+        self._epoch = uuid.uuid4().hex[:12]
+        self._changes = 0
+        self.clear()
+
+    def clear(self):
+        with self.lock:
+            self._docs = {}  # document ID -> restaurant dict (with 'id')
+            self._key_index = {}  # restaurant_key -> document ID, for documents not keyed by it
+            self._postings = {}  # search token -> set of document IDs
+            self._buckets = {stats_map: {} for stats_map in STATS_FIELDS.values()}
+            self._sorted = {}  # field -> ascending [(rank, id)], built on first use
+            self._changes += 1
+
+    @property
+    def version(self):
+        """Changes on every write to the index"""
+        return f"{self._epoch}-{self._changes}"
+
+    def __len__(self):
+        return len(self._docs)
+
+    def __contains__(self, doc_id):
+        return doc_id in self._docs
+
+    # Writes
+
+    def upsert(self, doc_id, data):
+        with self.lock:
+            self.remove(doc_id)
+            self._changes += 1
+            restaurant = dict(data, id=doc_id)
+            for field in INTERNAL_FIELDS:
+                restaurant.pop(field, None)
+            self._docs[doc_id] = restaurant
+            restaurant_key = restaurant.get('restaurant_key')
+            if restaurant_key and restaurant_key != doc_id:
+                self._key_index[restaurant_key] = doc_id
+            # Tokens are recomputed rather than read, so documents not yet backfilled are searchable
+            for token in document_tokens(restaurant):
+                self._postings.setdefault(token, set()).add(doc_id)
+            for field, keys in self._sorted.items():
+                if field is None or field in restaurant:
+                    bisect.insort(keys, self._sort_entry(field, restaurant))
+            self._count(restaurant, 1)
+
+    def remove(self, doc_id):
+        """Drop a document; returns it, or None if it was not there"""
+        with self.lock:
+            restaurant = self._docs.pop(doc_id, None)
+            if restaurant is None:
+                return None
+            self._changes += 1
+            if self._key_index.get(restaurant.get('restaurant_key')) == doc_id:
+                del self._key_index[restaurant['restaurant_key']]
+            for token in document_tokens(restaurant):
+                postings = self._postings.get(token)
+                if postings is not None:
+                    postings.discard(doc_id)
+                    if not postings:
+                        del self._postings[token]
+            for field, keys in self._sorted.items():
+                if field is None or field in restaurant:
+                    entry = self._sort_entry(field, restaurant)
+                    position = bisect.bisect_left(keys, entry)
+                    if position < len(keys) and keys[position] == entry:
+                        del keys[position]
+            self._count(restaurant, -1)
+            return restaurant
+
+    def _count(self, restaurant, amount):
+        for field, stats_map in STATS_FIELDS.items():
+            buckets = self._buckets[stats_map]
+            bucket = restaurant.get(field) or "Unknown"
+            buckets[bucket] = buckets.get(bucket, 0) + amount
+            if buckets[bucket] <= 0:
+                del buckets[bucket]
+
+    # Reads (same shapes as FirestoreRestaurantStore)
+
+    @staticmethod
+    def _sort_entry(field, restaurant):
+        return (rank(restaurant.get(field) if field else None), restaurant['id'])
+
+    def _sorted_keys(self, field):
+        keys = self._sorted.get(field)
+        if keys is None:
+            keys = sorted(
+                self._sort_entry(field, restaurant)
+                for restaurant in self._docs.values()
+                # Firestore leaves documents without the ordered field out of the results
+                if field is None or field in restaurant
+            )
+            self._sorted[field] = keys
+        return keys
+
+    def list_page(self, sort_by="created_at", order="desc", limit=50, page_token=None, fields=None):
+        if sort_by not in SORT_FIELDS:
+            sort_by = None
+        with self.lock:
+            keys = self._sorted_keys(sort_by)
+            cursor = None
+            if page_token:
+                values = decode_page_token(page_token, sort_by, order)
+                cursor = (rank(values.get(sort_by) if sort_by else None), values['__name__'])
+
+            if order == "asc":
+                start = bisect.bisect_right(keys, cursor) if cursor else 0
+                selected = keys[start:start + limit + 1]
+            else:
+                end = bisect.bisect_left(keys, cursor) if cursor else len(keys)
+                selected = keys[max(0, end - limit - 1):end][::-1]
+
+            next_page_token = None
+            if len(selected) > limit:
+                selected = selected[:limit]
+                next_page_token = encode_page_token(sort_by, order, self._docs[selected[-1][1]])
+            # Projecting copies only the requested fields
+            if fields is None:
+                restaurants = [dict(self._docs[doc_id]) for _, doc_id in selected]
+            else:
+                restaurants = [project(self._docs[doc_id], fields) for _, doc_id in selected]
+        return restaurants, next_page_token
+
+    def get(self, doc_id):
+        with self.lock:
+            restaurant = self._docs.get(doc_id)
+            return dict(restaurant) if restaurant else None
+
+    def find_ids(self, predicate):
+        """IDs of the documents ``predicate`` accepts"""
+        with self.lock:
+            return [doc_id for doc_id, restaurant in self._docs.items() if predicate(restaurant)]
+
+    def get_by_key(self, restaurant_key):
+        with self.lock:
+            doc_id = restaurant_key if restaurant_key in self._docs else self._key_index.get(restaurant_key)
+            return self.get(doc_id) if doc_id else None
+
+    def search(self, tokens):
+        """Every restaurant containing all of ``tokens``, unranked"""
+        with self.lock:
+            postings = sorted((self._postings.get(token, set()) for token in tokens), key=len)
+            doc_ids = set.intersection(*postings) if postings else set()
+            return [dict(self._docs[doc_id]) for doc_id in doc_ids]
+
+    def geohash_candidates(self, ranges):
+        """Restaurants whose geohash falls in any of ``ranges``"""
+        with self.lock:
+            keys = self._sorted_keys('geohash')
+            doc_ids = set()
+            for start, end in ranges:
+                low = bisect.bisect_left(keys, (rank(start),))
+                high = bisect.bisect_right(keys, (rank(end), chr(0x10FFFF)))
+                doc_ids.update(doc_id for _, doc_id in keys[low:high])
+            return [dict(self._docs[doc_id]) for doc_id in doc_ids]
+
+    def stats(self):
+        with self.lock:
+            stats = {'count': len(self._docs), 'version': self.version}
+            stats.update({stats_map: dict(buckets) for stats_map, buckets in self._buckets.items()})
+            return stats
+
+
+class MemoryRestaurantStore:
+    """Process-local restaurant store with the FirestoreRestaurantStore async API"""
+
+    def __init__(self):
+        self._index = RestaurantIndex()
+        # Tokens from another process (or before a restart) must not be trusted
+        self._epoch = uuid.uuid4().hex[:12]
+        self._change_log = []  # document ID changed at sequence i + 1
+        self._latest_change = {}  # document ID -> (sequence, tombstone or None)
+        self._idempotency_keys = {}  # document ID -> Idempotency-Key it was created with
+        self.archive = {}  # document ID -> restaurant copied there by delete_many(archive=True)
+
+    def _log_change(self, doc_id, tombstone=None):
+        self._change_log.append(doc_id)
+        self._latest_change[doc_id] = (len(self._change_log), tombstone)
+
+    async def ensure_indexes(self):
+        pass
+
+    async def ping(self):
+        pass
+
+    async def add(self, data, idempotency_key=None):
+        with self._index.lock:
+            if data['restaurant_key'] in self._index:
+                if idempotency_key and self._idempotency_keys.get(data['restaurant_key']) == idempotency_key:
+                    return data['restaurant_key']
+                raise DuplicateRestaurantKey(f"Restaurant key '{data['restaurant_key']}' already exists")
+            self._index.upsert(data['restaurant_key'], with_derived_fields(data))
+            self._log_change(data['restaurant_key'])
+            if idempotency_key:
+                self._idempotency_keys[data['restaurant_key']] = idempotency_key
+        record("write")
+        return data['restaurant_key']
+
+    async def bulk_add(self, documents):
+        results = {}
+        with self._index.lock:
+            for data in documents:
+                if data['restaurant_key'] in self._index:
+                    results[data['restaurant_key']] = "duplicate"
+                else:
+                    self._index.upsert(data['restaurant_key'], with_derived_fields(data))
+                    self._log_change(data['restaurant_key'])
+                    results[data['restaurant_key']] = "created"
+        record("write", sum(status == "created" for status in results.values()))
+        return results
+
+    async def list_page(self, sort_by="created_at", order="desc", limit=50, page_token=None, fields=None):
+        restaurants, next_page_token = self._index.list_page(sort_by, order, limit, page_token, fields)
+        record("read", len(restaurants))
+        return restaurants, next_page_token
+
+    async def get_by_key(self, restaurant_key):
+        record("read")
+        return self._index.get_by_key(restaurant_key)
+
+    async def search(self, tokens, candidate_limit=1000):
+        candidates = self._index.search(tokens)
+        record("read", min(len(candidates), candidate_limit))
+        return candidates[:candidate_limit], len(candidates) > candidate_limit
+
+    async def geohash_candidates(self, ranges):
+        candidates = self._index.geohash_candidates(ranges)
+        record("read", len(candidates))
+        return candidates
+
+    async def delete(self, restaurant_id):
+        with self._index.lock:
+            deleted = self._index.remove(restaurant_id)
+            self._idempotency_keys.pop(restaurant_id, None)
+            if deleted is not None:
+                self._log_change(restaurant_id, {"restaurant_key": deleted.get('restaurant_key')})
+        if deleted is not None:
+            record("delete")
+        return deleted
+
+    async def delete_many(self, restaurant_ids, archive=False):
+        deleted = []
+        with self._index.lock:
+            for restaurant_id in restaurant_ids:
+                restaurant = self._index.remove(restaurant_id)
+                self._idempotency_keys.pop(restaurant_id, None)
+                if restaurant is None:
+                    continue
+                if archive:
+                    self.archive[restaurant_id] = dict(restaurant)
+                self._log_change(restaurant_id, {"restaurant_key": restaurant.get('restaurant_key')})
+                deleted.append(restaurant)
+        record("delete", len(deleted))
+        if archive:
+            record("write", len(deleted))
+        return deleted
+
+    async def matching_ids(self, created_by=None, created_from=None, created_before=None):
+        ids = self._index.find_ids(lambda restaurant: (
+            (created_by is None or restaurant.get('created_by') == created_by)
+            and created_in_range(restaurant, created_from, created_before)
+        ))
+        record("read", len(ids))
+        return ids
+
+    async def scan(self, fields=None, parallelism=None):
+        async for restaurants in iter_pages(self.list_page, fields=fields):
+            yield restaurants
+
+    async def changes(self, since=None, limit=500):
+        after = 0
+        if since:
+            position = decode_change_token(since)
+            if position.get('e') != self._epoch:
+                raise ChangeTokenExpired("Changes token was issued by another store instance")
+            if not isinstance(position.get('t'), int) or position['t'] < 0:
+                raise InvalidPageToken("Malformed changes token")
+            after = position['t']
+
+        changes, last, has_more = [], after, False
+        with self._index.lock:
+            for position in range(after, len(self._change_log)):
+                doc_id = self._change_log[position]
+                sequence, tombstone = self._latest_change[doc_id]
+                if sequence != position + 1:
+                    # Superseded by a later change to the same document
+                    continue
+                if len(changes) == limit:
+                    has_more = True
+                    break
+                last = sequence
+                if tombstone is None:
+                    changes.append({"type": "upsert", "id": doc_id, "restaurant": self._index.get(doc_id)})
+                elif since:
+                    # A first sync starts from nothing, so it has no use for tombstones
+                    changes.append({"type": "delete", "id": doc_id, **tombstone})
+
+        record("read", len(changes))
+        return changes, encode_change_token({'e': self._epoch, 't': last}), has_more
+
+    async def count(self):
+        return len(self._index)
+
+    async def stats(self):
+        return self._index.stats()
+
+    async def version(self):
+        return self._index.version
+
+    async def reconcile_stats(self):
+        # Buckets are maintained exactly on every write; nothing to repair
+        return self._index.stats()
+
+    def close(self):
+        pass
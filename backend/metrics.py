@@ -0,0 +1,168 @@
+"""
+Request metrics in Prometheus text format.
+
+MetricsMiddleware times every HTTP request into a latency histogram per
+(method, route template, status). Each request also gets an OperationCounts,
+and the stores add their document reads, writes and deletes to it through
+record(). The counts travel in a context variable, so work done in tasks the
+request spawns, or on executor threads that run with a copy of its context,
+is attributed to the request. Per-route operation totals and a reads-per-request
+histogram make full-collection scans stand out.
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+READS_BUCKETS = (0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000, 50000)
+OPERATIONS = ("read", "write", "delete")
+
+# Label for requests no route matched, so 404 probes cannot grow the series count
+UNMATCHED_ROUTE = "unmatched"
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_current_counts = contextvars.ContextVar("store_operation_counts", default=None)
+
+
+class OperationCounts:
+    """Document reads, writes and deletes made on behalf of one request"""
+
+    def __init__(self):
+        # Parallel executor threads of one request may add at the same time
+        self._lock = threading.Lock()
+        self.read = 0
+        self.write = 0
+        self.delete = 0
+
+    def add(self, operation, amount):
+        with self._lock:
+            setattr(self, operation, getattr(self, operation) + amount)
+
+
+def record(operation, amount=1):
+    """Attribute ``amount`` document operations to the current request, if there is one"""
+    counts = _current_counts.get()
+    if counts is not None and amount:
+        counts.add(operation, amount)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(names, values, **extra):
+    pairs = list(zip(names, values)) + list(extra.items())
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Prometheus histogram keyed by a tuple of label values"""
+
+    def __init__(self, name, help_text, label_names, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # label values -> [per-bucket counts (last is +Inf), sum]
+
+    def observe(self, label_values, value):
+        series = self._series.get(label_values)
+        if series is None:
+            series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0]
+        # Buckets are upper bounds, so a value equal to a bound belongs in it
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        for label_values, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                cumulative += count
+                le = bound if bound == "+Inf" else _number(bound)
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, label_values, le=le)} {cumulative}")
+            labels = _labels(self.label_names, label_values)
+            lines.append(f"{self.name}_sum{labels} {_number(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """Per-route request latency and store operation metrics"""
+
+    def __init__(self):
+        self.latency = Histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency by route",
+            ("method", "route", "status"),
+            LATENCY_BUCKETS,
+        )
+        self.reads_per_request = Histogram(
+            "store_document_reads_per_request",
+            "Store documents read by one request",
+            ("method", "route"),
+            READS_BUCKETS,
+        )
+        self.operations = {}  # (method, route, operation) -> total
+
+    def observe_request(self, method, route, status_code, seconds, counts):
+        self.latency.observe((method, route, str(status_code)), seconds)
+        self.reads_per_request.observe((method, route), counts.read)
+        for operation in OPERATIONS:
+            key = (method, route, operation)
+            self.operations[key] = self.operations.get(key, 0) + getattr(counts, operation)
+
+    def render(self):
+        lines = self.latency.render() + self.reads_per_request.render()
+        lines.append("# HELP store_document_operations_total Store document operations by route")
+        lines.append("# TYPE store_document_operations_total counter")
+        for key, total in sorted(self.operations.items()):
+            lines.append(f"store_document_operations_total{_labels(('method', 'route', 'operation'), key)} {total}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware feeding Metrics; optionally reports operation counts in response headers"""
+
+    def __init__(self, app, metrics, debug_headers=False):
+        self.app = app
+        self.metrics = metrics
+        self.debug_headers = debug_headers
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counts = OperationCounts()
+        token = _current_counts.set(counts)
+        status_code = 500
+        start = time.perf_counter()
+
+        async def send_with_counts(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                if self.debug_headers:
+                    # Streaming bodies keep reading after this; their totals are only in /metrics
+                    headers = list(message.get("headers", []))
+                    headers += [(f"x-document-{operation}s".encode(), str(getattr(counts, operation)).encode())
+                                for operation in OPERATIONS]
+                    message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_counts)
+        finally:
+            _current_counts.reset(token)
+            # The router stores the matched route in the scope; its template keeps label values bounded
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or UNMATCHED_ROUTE
+            self.metrics.observe_request(scope["method"], route_path, status_code, time.perf_counter() - start, counts)
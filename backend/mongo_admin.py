@@ -1,23 +1,115 @@
 import streamlit as st
-import asyncio
-from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import MongoClient
+from pymongo.errors import PyMongoError
 import os
+import re
 import pandas as pd
 from dotenv import load_dotenv
 import json
 from datetime import datetime
+from mongo_store import ensure_indexes_sync
+from snapshot import RestaurantSnapshot, frame_analytics
 
 # Load environment variables
 load_dotenv()
 
-# MongoDB connection
+# MongoDB connection: one pooled, thread-safe client per Streamlit process, shared by every
+# session and rerun. Loaders call it directly, so a cache miss reuses a warm connection
+# instead of opening one on a new event loop.
 @st.cache_resource
 def get_mongo_client():
-    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
-    return client[os.environ['DB_NAME']]
+    client = MongoClient(
+        os.environ['MONGO_URL'],
+        maxPoolSize=int(os.environ.get('MONGO_ADMIN_MAX_POOL_SIZE', '10')),
+        minPoolSize=int(os.environ.get('MONGO_ADMIN_MIN_POOL_SIZE', '1')),
+        maxIdleTimeMS=int(os.environ.get('MONGO_ADMIN_MAX_IDLE_MS', '300000')),
+        serverSelectionTimeoutMS=int(os.environ.get('MONGO_ADMIN_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    )
+    database = client[os.environ['DB_NAME']]
+    # Keyset pages and filters need the API's indexes, which it only creates when it runs on Mongo.
+    # Existing indexes are left as they are, so this costs one round trip each per process.
+    try:
+        ensure_indexes_sync(database)
+    except PyMongoError as e:
+        st.warning(f"Could not create the restaurant indexes; pages may scan the collection: {e}")
+    return database
 
 db = get_mongo_client()
 
+# Parquet analytics snapshot kept by the API server or `manage.py refresh-snapshot`; optional
+SNAPSHOT_PATH = os.environ.get('RESTAURANT_SNAPSHOT_PATH', '')
+
+@st.cache_resource
+def get_snapshot():
+    # Shared across sessions; load() only re-reads the file after it has been rewritten
+    return RestaurantSnapshot(SNAPSHOT_PATH)
+
+# Restaurants per city, counted by the server so only one row per city comes back
+CITY_COUNTS_PIPELINE = [
+    {"$group": {"_id": {"$ifNull": ["$city", "Unknown"]}, "count": {"$sum": 1}}},
+    {"$sort": {"count": -1, "_id": 1}},
+]
+
+# Rows per page offered by the browsers; a page is one indexed range query
+PAGE_SIZES = [25, 50, 100]
+
+# Fields read for the restaurant table, with their column titles
+TABLE_COLUMNS = {
+    "restaurant_name": "Name",
+    "city": "City",
+    "state": "State",
+    "zipcode": "Zipcode",
+    "primary_phone": "Phone",
+    "website_url": "Website",
+    "gm_name": "GM",
+    "restaurant_key": "Key",
+    "created_at": "Created",
+}
+
+
+def restaurant_filter(city, state, created_by, name_prefix):
+    """Mongo filter for the browser's column filters; blank filters are ignored"""
+    query = {}
+    if city:
+        query["city"] = city
+    if state:
+        query["state"] = state
+    if created_by:
+        query["created_by"] = created_by
+    if name_prefix:
+        # Anchored and case-sensitive, so it can be answered from an index
+        query["restaurant_name"] = {"$regex": f"^{re.escape(name_prefix)}"}
+    return query
+
+
+def after_cursor(query, cursor):
+    """``query`` narrowed to the documents after ``cursor`` in newest-first (created_at, _id) order"""
+    if cursor is None:
+        return query
+    created_at, doc_id = cursor
+    return {"$and": [query, {"$or": [
+        {"created_at": {"$lt": created_at}},
+        {"created_at": created_at, "_id": {"$lt": doc_id}},
+    ]}]}
+
+
+def page_cursors(browser, reset_on):
+    """Start cursors of the pages visited so far; back to the first page whenever ``reset_on`` changes"""
+    if st.session_state.get(f"{browser}_reset_on") != reset_on:
+        st.session_state[f"{browser}_reset_on"] = reset_on
+        st.session_state[f"{browser}_cursors"] = [None]
+    return st.session_state[f"{browser}_cursors"]
+
+
+def pager(browser, cursors, next_cursor):
+    """Previous/Next buttons; the callbacks move the cursor stack before the rerun renders"""
+    col_previous, col_page, col_next = st.columns([1, 2, 1])
+    col_previous.button("← Previous", key=f"{browser}_previous", disabled=len(cursors) == 1, on_click=cursors.pop)
+    col_page.write(f"Page {len(cursors)}")
+    col_next.button("Next →", key=f"{browser}_next", disabled=next_cursor is None,
+                    on_click=cursors.append, args=(next_cursor,))
+
+
 st.set_page_config(
     page_title="Restaurant Database Admin",
     page_icon="🏪",
@@ -33,76 +125,100 @@ page = st.sidebar.selectbox("Choose a page", ["View Restaurants", "Database Stat
 if page == "View Restaurants":
     st.header("Restaurant Database")
     
-    # Get restaurants data
+    # Column filters, applied by MongoDB rather than to a downloaded list
+    filter_cols = st.columns(5)
+    city = filter_cols[0].text_input("City")
+    state = filter_cols[1].text_input("State")
+    created_by = filter_cols[2].text_input("Created by")
+    name_prefix = filter_cols[3].text_input("Name starts with")
+    page_size = filter_cols[4].selectbox("Rows per page", PAGE_SIZES)
+    query = restaurant_filter(city.strip(), state.strip(), created_by.strip(), name_prefix.strip())
+    
     @st.cache_data(ttl=60)  # Cache for 1 minute
-    def get_restaurants():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            restaurants = loop.run_until_complete(
-                db.restaurants.find().to_list(1000)
-            )
-            return restaurants
-        finally:
-            loop.close()
-
-    restaurants = get_restaurants()
+    def count_restaurants(query):
+        # Collection metadata answers the unfiltered count without touching documents
+        if not query:
+            return db.restaurants.estimated_document_count()
+        return db.restaurants.count_documents(query)
+    
+    @st.cache_data(ttl=60)
+    def get_restaurant_page(query, cursor, page_size):
+        # One extra row tells whether there is a next page
+        rows = list(
+            db.restaurants.find(after_cursor(query, cursor), projection=list(TABLE_COLUMNS))
+            .sort([("created_at", -1), ("_id", -1)])
+            .limit(page_size + 1)
+        )
+        next_cursor = None
+        if len(rows) > page_size:
+            rows = rows[:page_size]
+            next_cursor = (rows[-1].get("created_at"), rows[-1]["_id"])
+        return rows, next_cursor
+    
+    @st.cache_data(ttl=60)
+    def get_restaurant(doc_id):
+        return db.restaurants.find_one({"_id": doc_id})
+    
+    cursors = page_cursors("restaurants", (tuple(sorted(query.items(), key=str)), page_size))
+    restaurants, next_cursor = get_restaurant_page(query, cursors[-1], page_size)
     
-    st.metric("Total Restaurants", len(restaurants))
+    st.metric("Total Restaurants", count_restaurants(query))
     
     if restaurants:
-        # Create a DataFrame for better display
-        df_data = []
-        for restaurant in restaurants:
-            df_data.append({
-                "Name": restaurant.get("restaurant_name", ""),
-                "City": restaurant.get("city", ""),
-                "State": restaurant.get("state", ""), 
-                "Zipcode": restaurant.get("zipcode", ""),
-                "Phone": restaurant.get("primary_phone", ""),
-                "Website": restaurant.get("website_url", ""),
-                "GM": restaurant.get("gm_name", ""),
-                "Key": restaurant.get("restaurant_key", ""),
-                "Created": restaurant.get("created_at", "")
-            })
-        
-        df = pd.DataFrame(df_data)
+        # Only the current page is rendered, whatever the size of the collection
+        df = pd.DataFrame(
+            [{title: restaurant.get(field, "") for field, title in TABLE_COLUMNS.items()} for restaurant in restaurants]
+        )
         st.dataframe(df, use_container_width=True)
+        pager("restaurants", cursors, next_cursor)
         
-        # Detailed view
+        # Detailed view, fetched only for the selected restaurant
         st.subheader("Detailed Restaurant Information")
+        labels = {
+            restaurant["_id"]: f"📍 {restaurant.get('restaurant_name', 'Unknown')} - {restaurant.get('city', '')}, {restaurant.get('state', '')}"
+            for restaurant in restaurants
+        }
+        selected = st.selectbox("Restaurant", list(labels), index=None, format_func=labels.get,
+                                placeholder="Choose a restaurant on this page")
+        restaurant = get_restaurant(selected) if selected is not None else None
         
-        for i, restaurant in enumerate(restaurants):
-            with st.expander(f"📍 {restaurant.get('restaurant_name', 'Unknown')} - {restaurant.get('city', '')}, {restaurant.get('state', '')}"):
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write("**Basic Information:**")
-                    st.write(f"🏪 **Name:** {restaurant.get('restaurant_name', 'N/A')}")
-                    st.write(f"📍 **Address:** {restaurant.get('street_address', 'N/A')}")
-                    st.write(f"🏙️ **City:** {restaurant.get('city', 'N/A')}")
-                    st.write(f"🗺️ **State:** {restaurant.get('state', 'N/A')}")
-                    st.write(f"📮 **Zipcode:** {restaurant.get('zipcode', 'N/A')}")
-                    st.write(f"📞 **Phone:** {restaurant.get('primary_phone', 'N/A')}")
-                    st.write(f"🌐 **Website:** {restaurant.get('website_url', 'N/A')}")
-                
-                with col2:
-                    st.write("**Management & Digital:**")
-                    st.write(f"👨‍💼 **GM:** {restaurant.get('gm_name', 'N/A')}")
-                    st.write(f"📱 **GM Phone:** {restaurant.get('gm_phone', 'N/A')}")
-                    st.write(f"📞 **Secondary:** {restaurant.get('secondary_phone', 'N/A')}")
-                    st.write(f"🚚 **DoorDash:** {restaurant.get('doordash_url', 'N/A')}")
-                    st.write(f"🚗 **Uber Eats:** {restaurant.get('uber_eats_url', 'N/A')}")
-                    st.write(f"🛵 **Grubhub:** {restaurant.get('grubhub_url', 'N/A')}")
-                
-                if restaurant.get('notes'):
-                    st.write("**Notes:**")
-                    st.write(restaurant.get('notes'))
-                
-                st.write("**Technical:**")
-                st.code(f"Restaurant Key: {restaurant.get('restaurant_key', 'N/A')}")
-                st.write(f"**Created:** {restaurant.get('created_at', 'N/A')}")
-                st.write(f"**Database ID:** {restaurant.get('_id', 'N/A')}")
+        if restaurant:
+            col1, col2 = st.columns(2)
+            
+            with col1:
+                st.write("**Basic Information:**")
+                st.write(f"🏪 **Name:** {restaurant.get('restaurant_name', 'N/A')}")
+                st.write(f"📍 **Address:** {restaurant.get('street_address', 'N/A')}")
+                st.write(f"🏙️ **City:** {restaurant.get('city', 'N/A')}")
+                st.write(f"🗺️ **State:** {restaurant.get('state', 'N/A')}")
+                st.write(f"📮 **Zipcode:** {restaurant.get('zipcode', 'N/A')}")
+                st.write(f"📞 **Phone:** {restaurant.get('primary_phone', 'N/A')}")
+                st.write(f"🌐 **Website:** {restaurant.get('website_url', 'N/A')}")
+            
+            with col2:
+                st.write("**Management & Digital:**")
+                st.write(f"👨‍💼 **GM:** {restaurant.get('gm_name', 'N/A')}")
+                st.write(f"📱 **GM Phone:** {restaurant.get('gm_phone', 'N/A')}")
+                st.write(f"📞 **Secondary:** {restaurant.get('secondary_phone', 'N/A')}")
+                st.write(f"🚚 **DoorDash:** {restaurant.get('doordash_url', 'N/A')}")
+                st.write(f"🚗 **Uber Eats:** {restaurant.get('uber_eats_url', 'N/A')}")
+                st.write(f"🛵 **Grubhub:** {restaurant.get('grubhub_url', 'N/A')}")
+            
+            if restaurant.get('notes'):
+                st.write("**Notes:**")
+                st.write(restaurant.get('notes'))
+            
+            st.write("**Technical:**")
+            st.code(f"Restaurant Key: {restaurant.get('restaurant_key', 'N/A')}")
+            st.write(f"**Created:** {restaurant.get('created_at', 'N/A')}")
+            st.write(f"**Database ID:** {restaurant.get('_id', 'N/A')}")
+        elif selected is not None:
+            st.warning("That restaurant no longer exists.")
+    elif len(cursors) > 1:
+        st.info("No more restaurants.")
+        pager("restaurants", cursors, None)
+    elif query:
+        st.info("No restaurants match these filters.")
     else:
         st.info("No restaurants found in the database.")
         st.write("Add some restaurants using the mobile app to see them here!")
@@ -112,85 +228,113 @@ elif page == "Database Stats":
     
     @st.cache_data(ttl=60)
     def get_stats():
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            # Get collection stats
-            restaurants = loop.run_until_complete(
-                db.restaurants.find().to_list(1000)
-            )
-            
-            # Get all collection names
-            collections = loop.run_until_complete(
-                db.list_collection_names()
-            )
-            
-            return restaurants, collections
-        finally:
-            loop.close()
+        # Exact total; counted on the server, no documents are transferred
+        total = db.restaurants.count_documents({})
+        
+        # One row per city
+        city_counts = list(db.restaurants.aggregate(CITY_COUNTS_PIPELINE))
+        
+        # Get all collection names, sized from collection metadata
+        collection_sizes = {
+            name: db[name].estimated_document_count()
+            for name in db.list_collection_names()
+        }
+        
+        return total, city_counts, collection_sizes
 
-    restaurants, collections = get_stats()
+    total, city_counts, collection_sizes = get_stats()
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("Total Restaurants", len(restaurants))
+        st.metric("Total Restaurants", total)
     
     with col2:
-        st.metric("Total Collections", len(collections))
+        st.metric("Total Collections", len(collection_sizes))
     
     with col3:
-        cities = set([r.get('city', 'Unknown') for r in restaurants])
-        st.metric("Cities Covered", len(cities))
+        st.metric("Cities Covered", len(city_counts))
     
     # Collection overview
     st.subheader("Database Collections")
-    for collection in collections:
-        st.write(f"📄 {collection}")
+    for collection, size in collection_sizes.items():
+        st.write(f"📄 {collection} (~{size} documents)")
     
     # Restaurant distribution by city
-    if restaurants:
+    if city_counts:
         st.subheader("Restaurants by City")
-        city_counts = {}
-        for restaurant in restaurants:
-            city = restaurant.get('city', 'Unknown')
-            city_counts[city] = city_counts.get(city, 0) + 1
-        
-        city_df = pd.DataFrame(list(city_counts.items()), columns=['City', 'Count'])
+        city_df = pd.DataFrame(
+            [(row["_id"], row["count"]) for row in city_counts],
+            columns=['City', 'Count'],
+        )
         st.bar_chart(city_df.set_index('City'))
+    
+    # Further breakdowns, grouped from the columnar snapshot instead of the collection
+    snapshot_frame = get_snapshot().load() if SNAPSHOT_PATH else None
+    if snapshot_frame is not None:
+        analytics = frame_analytics(snapshot_frame)
+        st.subheader("Analytics Snapshot")
+        st.caption(f"{analytics['total_count']} restaurants as of {get_snapshot().age() / 60:.0f} minutes ago; "
+                   f"{analytics['with_coordinates']} with coordinates")
+        
+        col1, col2 = st.columns(2)
+        with col1:
+            st.write("**Restaurants by State**")
+            st.bar_chart(pd.Series(analytics["state_counts"], name="Count"))
+        with col2:
+            st.write("**Restaurants by Creator**")
+            st.bar_chart(pd.Series(analytics["created_by_counts"], name="Count"))
+        
+        if analytics["created_per_month"]:
+            st.write("**Restaurants Created per Month**")
+            st.line_chart(pd.Series(analytics["created_per_month"], name="Count"))
 
 elif page == "Raw Data":
     st.header("Raw Database Documents")
     
     collection = st.selectbox("Select Collection", ["restaurants", "status_checks", "user_profiles"])
+    page_size = st.selectbox("Documents per page", PAGE_SIZES)
     
     @st.cache_data(ttl=60)
-    def get_raw_data(collection_name):
-        loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(loop)
-        try:
-            data = loop.run_until_complete(
-                db[collection_name].find().to_list(1000)
-            )
-            return data
-        finally:
-            loop.close()
+    def get_raw_page(collection_name, after_id, page_size):
+        # _id range pages straight off the primary key index
+        query = {} if after_id is None else {"_id": {"$gt": after_id}}
+        docs = list(db[collection_name].find(query).sort("_id", 1).limit(page_size + 1))
+        next_cursor = docs[page_size - 1]["_id"] if len(docs) > page_size else None
+        return docs[:page_size], next_cursor
+    
+    @st.cache_data(ttl=60)
+    def count_raw(collection_name):
+        return db[collection_name].estimated_document_count()
 
     try:
-        raw_data = get_raw_data(collection)
+        cursors = page_cursors("raw", (collection, page_size))
+        raw_data, next_cursor = get_raw_page(collection, cursors[-1], page_size)
         
-        st.metric(f"Documents in {collection}", len(raw_data))
+        st.metric(f"Documents in {collection}", count_raw(collection))
         
         if raw_data:
-            for i, doc in enumerate(raw_data):
-                with st.expander(f"Document {i+1}: {doc.get('_id', 'Unknown ID')}"):
-                    st.json(doc, expanded=False)
+            # One row per document of this page; nested values shown as text
+            st.dataframe(
+                pd.DataFrame([{key: str(value) for key, value in doc.items()} for doc in raw_data]),
+                use_container_width=True,
+            )
+            pager("raw", cursors, next_cursor)
+            
+            documents = {str(doc["_id"]): doc for doc in raw_data}
+            selected = st.selectbox("Document", list(documents), index=None, placeholder="Choose a document on this page")
+            if selected is not None:
+                st.json(json.loads(json.dumps(documents[selected], default=str)), expanded=True)
+        elif len(cursors) > 1:
+            st.info("No more documents.")
+            pager("raw", cursors, None)
         else:
             st.info(f"No documents found in {collection} collection.")
             
     except Exception as e:
         st.error(f"Error accessing collection {collection}: {str(e)}")
 
+
 # Footer
 st.sidebar.markdown("---")
 st.sidebar.info("🏪 Restaurant Database Admin\nBuilt with Streamlit & MongoDB")
\ No newline at end of file
@@ -0,0 +1,453 @@
+"""
+MongoDB restaurant store on Motor.
+
+Documents use the restaurant_key as _id, so key lookups are _id point reads
+and uniqueness is enforced by the primary key index. Lists use the same
+(sort field, id) cursor tokens as the Firestore store. The count, the stats
+breakdowns and a collection version are kept in counters/{collection}, which
+every write $incs, so admin stats are one point read. On a replica set or
+sharded cluster the document writes and the $inc commit in one transaction.
+A standalone server has no transactions, so a crash between the two leaves
+the counters off until reconcile_stats() recounts them with one aggregation;
+run `manage.py reconcile-stats` on a schedule there. ensure_indexes() creates
+the indexes that the sorted lists, search and nearby queries rely on.
+Document operations are recorded against the current request (see metrics.py);
+aggregations count every document they scan as read.
+
+Writes stamp changed_at and deletes leave a tombstone in {collection}_tombstones
+for the changes feed. The stamps come from the writing process's clock, so with
+several writers a change can land behind a token already handed out if their
+clocks are skewed by more than the time between writes. Batch deletes can
+first copy the documents to {collection}_archive.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING, ReplaceOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+from metrics import record
+from scan import iter_pages
+from store import (
+    INTERNAL_FIELDS,
+    SORT_FIELDS,
+    STATS_FIELDS,
+    TOMBSTONE_RETENTION_DAYS,
+    ChangeTokenExpired,
+    DuplicateRestaurantKey,
+    InvalidPageToken,
+    decode_change_token,
+    decode_page_token,
+    encode_change_token,
+    encode_page_token,
+    project,
+    with_derived_fields,
+)
+
+DUPLICATE_KEY_ERROR = 11000
+
+COUNTERS_COLLECTION = "counters"
+
+
+def encode_bucket(bucket):
+    """Stats bucket as a field name; a '.' would split the $inc path and a '$' reads as an operator"""
+    return bucket.replace('%', '%25').replace('.', '%2E').replace('$', '%24')
+
+
+def decode_bucket(name):
+    return name.replace('%24', '$').replace('%2E', '.').replace('%25', '%')
+
+
+def stats_increments(documents, amount):
+    """$inc adding ``amount`` per document to the count and breakdown buckets, and bumping the version"""
+    increments = {'count': amount * len(documents), 'version': 1}
+    for field, stats_map in STATS_FIELDS.items():
+        for data in documents:
+            path = f"{stats_map}.{encode_bucket(str(data.get(field) or 'Unknown'))}"
+            increments[path] = increments.get(path, 0) + amount
+    return {"$inc": increments}
+
+
+def index_specs(collection="restaurants"):
+    """(collection name, keys, options) of every index the store and the Streamlit admin query through"""
+    tombstones = f"{collection}_tombstones"
+    specs = [(collection, [(field, ASCENDING), ("_id", ASCENDING)], {}) for field in SORT_FIELDS]
+    specs.append((collection, "restaurant_key", {}))
+    # Filtered, newest-first pages of the Streamlit admin browser (mongo_admin.py)
+    for field in ("city", "state", "created_by"):
+        specs.append((collection, [(field, ASCENDING), ("created_at", DESCENDING), ("_id", DESCENDING)], {}))
+    specs.append((collection, "search_tokens", {}))
+    specs.append((collection, "geohash", {"sparse": True}))
+    specs.append((collection, [("changed_at", ASCENDING), ("_id", ASCENDING)], {}))
+    specs.append((tombstones, [("deleted_at", ASCENDING), ("_id", ASCENDING)], {}))
+    # Tombstones past the retention are removed by the server
+    specs.append((tombstones, "expire_at", {"expireAfterSeconds": 0}))
+    return specs
+
+
+def ensure_indexes_sync(database, collection="restaurants"):
+    """MongoRestaurantStore.ensure_indexes() for a synchronous pymongo database"""
+    for name, keys, options in index_specs(collection):
+        database[name].create_index(keys, **options)
+
+
+def document_to_dict(document):
+    """Convert a MongoDB document to a response dict"""
+    data = dict(document)
+    for field in INTERNAL_FIELDS:
+        data.pop(field, None)
+    data['id'] = str(data.pop('_id'))
+    return data
+
+
+class MongoRestaurantStore:
+    """Restaurant reads and writes against MongoDB through Motor"""
+
+    def __init__(self, database, collection="restaurants", tombstone_retention_days=TOMBSTONE_RETENTION_DAYS):
+        self.database = database
+        self.collection = database[collection]
+        self.tombstones = database[f"{collection}_tombstones"]
+        self.archive = database[f"{collection}_archive"]
+        self.counters = database[COUNTERS_COLLECTION]
+        self.tombstone_retention = timedelta(days=tombstone_retention_days)
+        self._transactions = None  # whether the deployment supports them, learned on first write
+
+    async def _supports_transactions(self):
+        if self._transactions is None:
+            hello = await self.database.command("hello")
+            self._transactions = "setName" in hello or hello.get("msg") == "isdbgrid"
+        return self._transactions
+
+    async def _in_transaction(self, write):
+        """Await ``write(session)`` in a transaction, or with no session on a standalone server"""
+        if not await self._supports_transactions():
+            return await write(None)
+        async with await self.database.client.start_session() as session:
+            # Retried whole on transient errors, so ``write`` must not keep state between attempts
+            return await session.with_transaction(write)
+
+    async def _count_writes(self, documents, amount, session=None):
+        if not documents:
+            return
+        update = stats_increments(documents, amount)
+        # Counters created here only hold this write's share; the first stats() read recounts them
+        update["$setOnInsert"] = {"partial": True}
+        await self.counters.update_one({"_id": self.collection.name}, update, upsert=True, session=session)
+        record("write")
+
+    @staticmethod
+    def _stored(data):
+        return dict(with_derived_fields(data), _id=data['restaurant_key'], changed_at=datetime.now(timezone.utc))
+
+    async def ensure_indexes(self):
+        for name, keys, options in index_specs(self.collection.name):
+            await self.database[name].create_index(keys, **options)
+
+    async def ping(self):
+        await self.database.command("ping")
+
+    async def add(self, data, idempotency_key=None):
+        document = self._stored(data)
+        if idempotency_key:
+            document['idempotency_key'] = idempotency_key
+
+        async def write(session):
+            await self.collection.insert_one(document, session=session)
+            await self._count_writes([data], 1, session)
+
+        try:
+            await self._in_transaction(write)
+        except DuplicateKeyError:
+            if idempotency_key:
+                existing = await self.collection.find_one(
+                    {"_id": data['restaurant_key'], "idempotency_key": idempotency_key},
+                    projection={"_id": 1},
+                )
+                record("read")
+                if existing is not None:
+                    return data['restaurant_key']
+            raise DuplicateRestaurantKey(f"Restaurant key '{data['restaurant_key']}' already exists")
+        record("write")
+        return data['restaurant_key']
+
+    async def bulk_add(self, documents):
+        results = {}
+
+        async def write(session):
+            results.clear()
+            if session is not None:
+                # A duplicate key error aborts a transaction, so existing keys are skipped up front
+                keys = [data['restaurant_key'] for data in documents]
+                existing = await self.collection.find({"_id": {"$in": keys}}, {"_id": 1}, session=session).to_list(None)
+                record("read", len(keys))
+                results.update({document['_id']: "duplicate" for document in existing})
+            to_create = [data for data in documents if data['restaurant_key'] not in results]
+            results.update({data['restaurant_key']: "created" for data in to_create})
+            if to_create:
+                try:
+                    # Unordered, so one duplicate does not stop the rest of the chunk
+                    await self.collection.insert_many(
+                        [self._stored(data) for data in to_create],
+                        ordered=False,
+                        session=session,
+                    )
+                except BulkWriteError as e:
+                    if session is not None:
+                        # The transaction is aborted; with_transaction retries it if the error is transient
+                        raise
+                    for error in e.details.get('writeErrors', []):
+                        if error.get('code') != DUPLICATE_KEY_ERROR:
+                            raise
+                        results[to_create[error['index']]['restaurant_key']] = "duplicate"
+            await self._count_writes([data for data in to_create if results[data['restaurant_key']] == "created"], 1,
+                                     session)
+
+        await self._in_transaction(write)
+        record("write", sum(status == "created" for status in results.values()))
+        return results
+
+    async def list_page(self, sort_by="created_at", order="desc", limit=50, page_token=None, fields=None):
+        if sort_by not in SORT_FIELDS:
+            sort_by = None
+        direction = ASCENDING if order == "asc" else DESCENDING
+        beyond = "$gt" if order == "asc" else "$lt"
+
+        # Like Firestore, documents without the ordered field are left out
+        query = {sort_by: {"$exists": True}} if sort_by else {}
+        if page_token:
+            values = decode_page_token(page_token, sort_by, order)
+            after_id = {"_id": {beyond: values['__name__']}}
+            if sort_by:
+                query = {"$and": [query, {"$or": [
+                    {sort_by: {beyond: values[sort_by]}},
+                    {sort_by: values[sort_by], **after_id},
+                ]}]}
+            else:
+                query = after_id
+
+        sort = ([(sort_by, direction)] if sort_by else []) + [("_id", direction)]
+        projection = None
+        if fields is not None:
+            # The sort field is kept for the cursor; naming _id stops an empty projection returning everything
+            projection = {"_id": 1, **{field: 1 for field in [*fields, *([sort_by] if sort_by else [])]}}
+        cursor = self.collection.find(query, projection).sort(sort).limit(limit + 1)
+        documents = await cursor.to_list(limit + 1)
+        record("read", len(documents))
+        restaurants = [document_to_dict(document) for document in documents]
+        next_page_token = None
+        if len(restaurants) > limit:
+            restaurants = restaurants[:limit]
+            next_page_token = encode_page_token(sort_by, order, restaurants[-1])
+        if fields is not None:
+            restaurants = [project(restaurant, fields) for restaurant in restaurants]
+        return restaurants, next_page_token
+
+    async def get_by_key(self, restaurant_key):
+        document = await self.collection.find_one({"_id": restaurant_key})
+        record("read")
+        if document is None:
+            # Documents written before keys became _ids
+            document = await self.collection.find_one({"restaurant_key": restaurant_key})
+            record("read")
+        return document_to_dict(document) if document else None
+
+    async def search(self, tokens, candidate_limit=1000):
+        anchor = max(tokens, key=len)
+        documents = await self.collection.find({"search_tokens": anchor}).limit(candidate_limit + 1).to_list(None)
+        record("read", len(documents))
+        candidates = [document_to_dict(document) for document in documents]
+        return candidates[:candidate_limit], len(candidates) > candidate_limit
+
+    async def geohash_candidates(self, ranges):
+        query = {"$or": [{"geohash": {"$gte": start, "$lte": end}} for start, end in ranges]}
+        candidates = [document_to_dict(document) async for document in self.collection.find(query)]
+        record("read", len(candidates))
+        return candidates
+
+    async def delete(self, restaurant_id):
+        async def write(session):
+            document = await self.collection.find_one_and_delete({"_id": restaurant_id}, session=session)
+            if document is None and ObjectId.is_valid(restaurant_id):
+                # Documents written by the old Motor backend have ObjectId _ids
+                document = await self.collection.find_one_and_delete({"_id": ObjectId(restaurant_id)}, session=session)
+            if document:
+                now = datetime.now(timezone.utc)
+                await self.tombstones.replace_one({"_id": document['_id']}, {
+                    "restaurant_key": document.get('restaurant_key'),
+                    "deleted_at": now,
+                    "expire_at": now + self.tombstone_retention,
+                }, upsert=True, session=session)
+                await self._count_writes([document], -1, session)
+            return document
+
+        document = await self._in_transaction(write)
+        if document:
+            record("delete")
+            record("write")
+        return document_to_dict(document) if document else None
+
+    async def delete_many(self, restaurant_ids, archive=False):
+        restaurant_ids = list(restaurant_ids)
+        # Documents written by the old Motor backend have ObjectId _ids
+        query = {"_id": {"$in": restaurant_ids + [ObjectId(i) for i in restaurant_ids if ObjectId.is_valid(i)]}}
+
+        async def write(session):
+            documents = await self.collection.find(query, session=session).to_list(length=None)
+            if not documents:
+                return []
+            now = datetime.now(timezone.utc)
+            if archive:
+                # Copied before the delete, so an interrupted chunk never loses a document
+                await self.archive.bulk_write(
+                    [ReplaceOne({"_id": document['_id']}, dict(document, archived_at=now), upsert=True)
+                     for document in documents],
+                    ordered=False,
+                    session=session,
+                )
+            await self.collection.delete_many({"_id": {"$in": [document['_id'] for document in documents]}},
+                                              session=session)
+            await self.tombstones.bulk_write([
+                ReplaceOne({"_id": document['_id']}, {
+                    "restaurant_key": document.get('restaurant_key'),
+                    "deleted_at": now,
+                    "expire_at": now + self.tombstone_retention,
+                }, upsert=True)
+                for document in documents
+            ], ordered=False, session=session)
+            await self._count_writes(documents, -1, session)
+            return documents
+
+        documents = await self._in_transaction(write)
+        record("read", len(documents))
+        if documents:
+            if archive:
+                record("write", len(documents))
+            record("delete", len(documents))
+            record("write", len(documents))
+        return [document_to_dict(document) for document in documents]
+
+    async def matching_ids(self, created_by=None, created_from=None, created_before=None):
+        query = {}
+        if created_by is not None:
+            query["created_by"] = created_by
+        created_at = {}
+        if created_from is not None:
+            created_at["$gte"] = created_from
+        if created_before is not None:
+            created_at["$lt"] = created_before
+        if created_at:
+            query["created_at"] = created_at
+        documents = await self.collection.find(query, {"_id": 1}).to_list(length=None)
+        record("read", len(documents))
+        return [str(document['_id']) for document in documents]
+
+    async def scan(self, fields=None, parallelism=None):
+        # _id range pages off the primary key index; one range at a time keeps load on the server predictable
+        async for restaurants in iter_pages(self.list_page, fields=fields):
+            yield restaurants
+
+    async def changes(self, since=None, limit=500):
+        after = None
+        if since:
+            position = decode_change_token(since)
+            try:
+                # A null time is the start of the feed, handed out when it was empty
+                if position['t'] is not None:
+                    after = (datetime.fromisoformat(position['t']), position['id'])
+                    if after[0].tzinfo is None:
+                        raise ValueError(position['t'])
+            except (KeyError, TypeError, ValueError):
+                raise InvalidPageToken("Malformed changes token")
+            if after is not None and after[0] < datetime.now(timezone.utc) - self.tombstone_retention:
+                raise ChangeTokenExpired("Changes token is older than the tombstone retention")
+
+        async def ordered(collection, time_field):
+            if after is not None:
+                # Stored datetimes come back naive (UTC)
+                at = after[0].replace(tzinfo=None)
+                query = {"$or": [{time_field: {"$gt": at}}, {time_field: at, "_id": {"$gt": after[1]}}]}
+            else:
+                query = {time_field: {"$exists": True}}
+            cursor = collection.find(query).sort([(time_field, ASCENDING), ("_id", ASCENDING)]).limit(limit + 1)
+            documents = await cursor.to_list(limit + 1)
+            record("read", len(documents))
+            return documents
+
+        entries = [(document['changed_at'], str(document['_id']), "upsert", document)
+                   for document in await ordered(self.collection, 'changed_at')]
+        if since:
+            # A first sync starts from nothing, so it has no use for tombstones
+            entries += [(document['deleted_at'], str(document['_id']), "delete", document)
+                        for document in await ordered(self.tombstones, 'deleted_at')]
+        entries.sort(key=lambda entry: entry[:2])
+
+        changes = []
+        for _, doc_id, change_type, document in entries[:limit]:
+            if change_type == "upsert":
+                changes.append({"type": "upsert", "id": doc_id, "restaurant": document_to_dict(document)})
+            else:
+                changes.append({"type": "delete", "id": doc_id, "restaurant_key": document.get('restaurant_key')})
+
+        if changes:
+            last_time, last_id = entries[len(changes) - 1][:2]
+            next_token = encode_change_token({'t': last_time.replace(tzinfo=timezone.utc).isoformat(), 'id': last_id})
+        else:
+            next_token = since or encode_change_token({'t': None})
+        return changes, next_token, len(entries) > limit
+
+    async def count(self):
+        return (await self.stats())['count']
+
+    async def stats(self):
+        counters = await self.counters.find_one({"_id": self.collection.name})
+        record("read")
+        if counters is None or counters.get('partial'):
+            # Never recounted, e.g. data written before counters were kept
+            return await self.reconcile_stats()
+        stats = {'count': counters.get('count', 0), 'version': counters.get('version', 0)}
+        for stats_map in STATS_FIELDS.values():
+            # Buckets decremented to zero by deletes are left behind
+            stats[stats_map] = {
+                decode_bucket(name): amount for name, amount in (counters.get(stats_map) or {}).items() if amount > 0
+            }
+        return stats
+
+    async def version(self):
+        counters = await self.counters.find_one({"_id": self.collection.name}, projection={"version": 1})
+        record("read")
+        # Until the counters exist, callers fall back to hashing what they read
+        return counters.get('version', 0) if counters else None
+
+    async def reconcile_stats(self):
+        """Recount everything with one aggregation and store it as the counters"""
+        facets = {
+            stats_map: [{"$group": {"_id": f"${field}", "n": {"$sum": 1}}}]
+            for field, stats_map in STATS_FIELDS.items()
+        }
+        facets['count'] = [{"$count": "n"}]
+        result = (await self.collection.aggregate([{"$facet": facets}]).to_list(1))[0]
+
+        stats = {'count': result['count'][0]['n'] if result['count'] else 0}
+        record("read", stats['count'])
+        for stats_map in STATS_FIELDS.values():
+            # Missing, null and "" all land in "Unknown", like the counters
+            stats[stats_map] = {}
+            for bucket in result[stats_map]:
+                name = str(bucket['_id'] or "Unknown")
+                stats[stats_map][name] = stats[stats_map].get(name, 0) + bucket['n']
+
+        # Carry the version forward (and past the current one); writes that land
+        # between the aggregation and this replace are lost, so run when idle
+        previous = await self.counters.find_one({"_id": self.collection.name}, projection={"version": 1})
+        stats['version'] = (previous or {}).get('version', 0) + 1
+        counters = {'count': stats['count'], 'version': stats['version']}
+        for stats_map in STATS_FIELDS.values():
+            counters[stats_map] = {encode_bucket(name): amount for name, amount in stats[stats_map].items()}
+        await self.counters.replace_one({"_id": self.collection.name}, counters, upsert=True)
+        record("read")
+        record("write")
+        return stats
+
+    def close(self):
+        self.database.client.close()
@@ -0,0 +1,147 @@
+"""
+Live in-memory replica of the restaurants collection.
+
+A Firestore on_snapshot listener streams every change into this process, so
+list, key-lookup, search, nearby and stats reads can be answered without any
+document reads.
+The listener runs on the client's background thread. A monitor thread
+re-subscribes when the stream dies, and the replica reports not ready until
+the new listener has delivered its first full snapshot.
+"""
+
+import logging
+import threading
+import time
+
+from memory_store import RestaurantIndex
+
+logger = logging.getLogger(__name__)
+
+
+class RestaurantReplica:
+    """Restaurants collection mirrored in memory by a snapshot listener"""
+
+    def __init__(self, collection, check_interval=5.0):
+        self._collection = collection
+        self.check_interval = check_interval
+        self._index = RestaurantIndex()
+        self._lock = self._index.lock
+        self._watch = None
+        self._needs_reset = True
+        self._stopped = threading.Event()
+        self._monitor = None
+        self._ready = False
+        self.resyncs = 0
+        self.last_error = None
+        self.last_snapshot_at = None
+
+    @property
+    def ready(self):
+        """Whether reads can be served: synced and the listener is still alive"""
+        watch = self._watch
+        return self._ready and watch is not None and watch.is_active
+
+    # Lifecycle
+
+    def start(self):
+        self._stopped.clear()
+        self._subscribe()
+        self._monitor = threading.Thread(target=self._monitor_loop, name="replica-monitor", daemon=True)
+        self._monitor.start()
+
+    def stop(self):
+        self._stopped.set()
+        with self._lock:
+            self._ready = False
+            if self._watch is not None:
+                self._watch.unsubscribe()
+                self._watch = None
+
+    def resync(self, reason=None):
+        """Drop the current listener and rebuild from a fresh one"""
+        logger.warning(f"Resyncing restaurant replica: {reason or 'requested'}")
+        with self._lock:
+            self._ready = False
+            self.resyncs += 1
+            self.last_error = reason
+            if self._watch is not None:
+                try:
+                    self._watch.unsubscribe()
+                except Exception as e:
+                    logger.error(f"Error closing replica listener: {str(e)}")
+                self._watch = None
+        self._subscribe()
+
+    def _subscribe(self):
+        with self._lock:
+            self._needs_reset = True
+        try:
+            watch = self._collection.on_snapshot(self._on_snapshot)
+        except Exception as e:
+            self.last_error = str(e)
+            logger.error(f"Error starting replica listener: {str(e)}")
+            return
+        with self._lock:
+            self._watch = watch
+
+    def _monitor_loop(self):
+        while not self._stopped.wait(self.check_interval):
+            watch = self._watch
+            if watch is None or not watch.is_active:
+                self.resync("listener stopped")
+
+    # Change feed
+
+    def _on_snapshot(self, docs, changes, read_time):
+        try:
+            with self._lock:
+                if self._needs_reset:
+                    # First snapshot of a (re)subscription is the full collection
+                    self._index.clear()
+                    for doc in docs:
+                        self._index.upsert(doc.id, doc.to_dict())
+                    self._needs_reset = False
+                else:
+                    for change in changes:
+                        if change.type.name == "REMOVED":
+                            self._index.remove(change.document.id)
+                        else:
+                            self._index.upsert(change.document.id, change.document.to_dict())
+                self._ready = True
+                self.last_snapshot_at = time.time()
+        except Exception as e:
+            # A replica that missed a change is wrong until rebuilt
+            logger.error(f"Error applying replica snapshot: {str(e)}")
+            self._ready = False
+            self.last_error = str(e)
+            self._needs_reset = True
+
+    # Reads (same shapes as FirestoreRestaurantStore)
+
+    def list_page(self, sort_by="created_at", order="desc", limit=50, page_token=None, fields=None):
+        return self._index.list_page(sort_by, order, limit, page_token, fields)
+
+    def get_by_key(self, restaurant_key):
+        return self._index.get_by_key(restaurant_key)
+
+    def search(self, tokens):
+        return self._index.search(tokens)
+
+    def geohash_candidates(self, ranges):
+        return self._index.geohash_candidates(ranges)
+
+    def stats(self):
+        return self._index.stats()
+
+    @property
+    def version(self):
+        return self._index.version
+
+    def status(self):
+        return {
+            "ready": self.ready,
+            "documents": len(self._index),
+            "resyncs": self.resyncs,
+            "last_error": self.last_error,
+            "last_snapshot_at": self.last_snapshot_at,
+        }
@@ -0,0 +1,26 @@
+"""
+JSON responses rendered with orjson.
+
+A route that returns a FastJSONResponse skips FastAPI's jsonable_encoder walk
+over the body as well as the stdlib encoder, which is where most of the time
+goes for list pages of hundreds of restaurants.
+"""
+
+import datetime
+
+import orjson
+from starlette.responses import JSONResponse
+
+
+def _default(value):
+    # Firestore timestamps are datetime subclasses, which orjson only serializes natively as exact types
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    return str(value)
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse rendered by orjson; unknown types fall back to str"""
+
+    def render(self, content):
+        return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,76 @@
+"""
+Full-collection scans split into shards.
+
+A store divides the collection into document-ID ranges and hands
+ordered_streams() one page stream per range. At most ``parallelism`` ranges
+are read at once, and their pages are yielded in range order, so the output is
+in document-ID order just like a single sequential stream. A range that gets
+ahead of the consumer stops after ``buffered_pages`` pages until the consumer
+reaches it, so memory is bounded by the page size times ``parallelism`` rather
+than by the collection or the range size.
+"""
+
+import asyncio
+from collections import deque
+
+# Shards per worker; more, smaller shards even out skewed ranges
+SHARDS_PER_WORKER = 4
+
+# Documents per page read from one range
+SCAN_PAGE_SIZE = 500
+
+_END = object()
+
+
+def _start(stream, buffered_pages):
+    queue = asyncio.Queue(maxsize=max(1, buffered_pages))
+
+    async def produce():
+        try:
+            async for page in stream():
+                await queue.put(page)
+        except Exception as error:
+            # Raised in the consumer when it reaches this range
+            await queue.put(error)
+            return
+        await queue.put(_END)
+
+    return queue, asyncio.ensure_future(produce())
+
+
+async def ordered_streams(streams, parallelism, buffered_pages=1):
+    """Yield the pages of ``streams`` (async iterator functions) in order, reading at most ``parallelism`` at once"""
+    streams = iter(streams)
+    window = deque()
+    try:
+        for stream in streams:
+            window.append(_start(stream, buffered_pages))
+            if len(window) >= max(1, parallelism):
+                break
+        while window:
+            queue, _ = window[0]
+            page = await queue.get()
+            if page is _END:
+                window.popleft()
+                next_stream = next(streams, None)
+                if next_stream is not None:
+                    window.append(_start(next_stream, buffered_pages))
+                continue
+            if isinstance(page, Exception):
+                raise page
+            yield page
+    finally:
+        # A consumer that stops early (e.g. a dropped export download) cancels the ranges still being read
+        for _, task in window:
+            task.cancel()
+
+
+async def iter_pages(list_page, page_size=SCAN_PAGE_SIZE, fields=None):
+    """Yield lists of restaurants in document-ID order by following ``list_page`` cursors"""
+    page_token = None
+    while True:
+        restaurants, page_token = await list_page(None, "asc", page_size, page_token, fields)
+        if restaurants:
+            yield restaurants
+        if not page_token:
+            return
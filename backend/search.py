@@ -0,0 +1,93 @@
+"""
+Search tokens and ranking for restaurant search.
+
+Every restaurant gets a ``search_tokens`` array at write time: its name and city
+words plus their prefixes, and its zipcode and phone digits plus their
+prefixes. A query matches a restaurant when every query token is among its
+tokens, so "pizz aus" finds "Pizza Palace, Austin" from a single
+array-contains lookup on one token, with the rest checked in memory.
+"""
+
+import re
+
+MIN_PREFIX = 2
+MIN_DIGITS_PREFIX = 3
+MAX_QUERY_TOKENS = 8
+
+_WORD = re.compile(r"[a-z0-9]+")
+_DIGITS = re.compile(r"\d")
+
+
+def normalize(text):
+    """Lowercased alphanumeric words of ``text``"""
+    return _WORD.findall((text or "").lower())
+
+
+def digits(text):
+    return "".join(_DIGITS.findall(text or ""))
+
+
+def _prefixes(word, minimum):
+    return {word[:size] for size in range(minimum, len(word) + 1)} if len(word) >= minimum else set()
+
+
+def document_tokens(data):
+    """Sorted search tokens for a restaurant document"""
+    tokens = set()
+    for field in ("restaurant_name", "city"):
+        for word in normalize(data.get(field)):
+            tokens |= _prefixes(word, MIN_PREFIX)
+    tokens |= _prefixes(digits(data.get("zipcode")), MIN_DIGITS_PREFIX)
+    phone = digits(data.get("primary_phone"))
+    tokens |= _prefixes(phone, MIN_DIGITS_PREFIX)
+    # Local number and last four digits, for searches without the area code
+    for suffix in (phone[-7:], phone[-4:]):
+        if len(suffix) >= MIN_DIGITS_PREFIX:
+            tokens.add(suffix)
+    return sorted(tokens)
+
+
+def query_tokens(q):
+    """Tokens a query must match; a phone-number-like query becomes one digit token"""
+    if re.fullmatch(r"[\d\s()+.-]+", q or "") and len(digits(q)) >= MIN_DIGITS_PREFIX:
+        return [digits(q)]
+    words = [word for word in normalize(q) if len(word) >= MIN_PREFIX]
+    return list(dict.fromkeys(words))[:MAX_QUERY_TOKENS]
+
+
+def matches(data, tokens):
+    document = set(document_tokens(data))
+    return all(token in document for token in tokens)
+
+
+def score(data, tokens):
+    """Relevance of a matching restaurant; name hits outrank city and number hits"""
+    name_words = normalize(data.get("restaurant_name"))
+    city_words = normalize(data.get("city"))
+    total = 0.0
+    for token in tokens:
+        if token in name_words:
+            total += 3.0
+        elif any(word.startswith(token) for word in name_words):
+            total += 2.0
+        elif token in city_words:
+            total += 1.5
+        elif any(word.startswith(token) for word in city_words):
+            total += 1.0
+        else:
+            total += 0.5
+    # Prefer whole-name matches, then shorter names
+    if " ".join(tokens) == " ".join(name_words):
+        total += 2.0
+    return total - len(name_words) * 0.01
+
+
+def rank(restaurants, tokens):
+    """Restaurants matching ``tokens``, best first, each with its ``score``"""
+    ranked = []
+    for restaurant in restaurants:
+        if matches(restaurant, tokens):
+            ranked.append(dict(restaurant, score=round(score(restaurant, tokens), 2)))
+    ranked.sort(key=lambda restaurant: (-restaurant["score"], restaurant.get("restaurant_name") or "", restaurant["id"]))
+    return ranked
+
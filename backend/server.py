@@ -1,14 +1,43 @@
-from fastapi import FastAPI, APIRouter, HTTPException, status
+from fastapi import FastAPI, APIRouter, Header, HTTPException, Query, Request, Response, status
 from starlette.middleware.cors import CORSMiddleware
+from starlette.responses import PlainTextResponse, StreamingResponse
 from dotenv import load_dotenv
 from pathlib import Path
-from pydantic import BaseModel, Field
+from contextlib import asynccontextmanager
+from pydantic import BaseModel, Field, ValidationError, field_validator, model_validator
 from typing import List, Optional
+import asyncio
+import codecs
+import csv
+import hashlib
+import json
 import os
 import logging
-from datetime import datetime
-import firebase_admin
-from firebase_admin import credentials, firestore
+from datetime import datetime, timezone
+from cache import TTLCache
+from export import EXPORT_FORMATS, export_stream
+from memory_store import MemoryRestaurantStore
+from geo import query_ranges, within_radius
+from idempotency import Coalescer, IdempotencyKeyReused, fingerprint
+from jobs import JobRegistry
+from metrics import PROMETHEUS_CONTENT_TYPE, Metrics, MetricsMiddleware
+from replica import RestaurantReplica
+from scan import iter_pages
+from responses import FastJSONResponse
+from search import query_tokens, rank
+from store import (
+    BULK_CHUNK_SIZE,
+    DELETE_CHUNK_SIZE,
+    RESTAURANT_FIELDS,
+    TOMBSTONE_RETENTION_DAYS,
+    ChangeTokenExpired,
+    DuplicateRestaurantKey,
+    InvalidPageToken,
+    LazyRestaurantStore,
+    decode_offset_token,
+    encode_offset_token,
+    is_valid_document_id,
+)
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent
@@ -29,16 +58,131 @@ firebase_service_account = {
     "universe_domain": "googleapis.com"
 }
 
-# Initialize Firebase Admin
-if not firebase_admin._apps:
-    cred = credentials.Certificate(firebase_service_account)
-    firebase_admin.initialize_app(cred)
+# Debug mode adds X-Document-Reads/Writes/Deletes headers to every response. It deliberately
+# leaves FastAPI's own debug mode off, which would put tracebacks in 500 responses.
+DEBUG = os.environ.get('DEBUG', 'false').lower() == 'true'
+
+# Storage engine: firestore (default), mongo, or memory (process-local, for load tests and benchmarks)
+RESTAURANT_STORE = os.environ.get('RESTAURANT_STORE', 'firestore').lower()
+if RESTAURANT_STORE not in ("firestore", "mongo", "memory"):
+    raise RuntimeError(f"Unknown RESTAURANT_STORE '{RESTAURANT_STORE}' (expected firestore, mongo or memory)")
+FIRESTORE_MAX_CONCURRENCY = int(os.environ.get('FIRESTORE_MAX_CONCURRENCY', '16'))
+# Document-ID ranges a full-collection scan (export, stats reconcile) reads at once
+FIRESTORE_SCAN_PARALLELISM = int(os.environ.get('FIRESTORE_SCAN_PARALLELISM', '8'))
+RESTAURANT_COUNTER_SHARDS = int(os.environ.get('RESTAURANT_COUNTER_SHARDS', '10'))
+# Delete tombstones are kept this long; clients that last synced earlier must reload
+RESTAURANT_TOMBSTONE_RETENTION_DAYS = float(
+    os.environ.get('RESTAURANT_TOMBSTONE_RETENTION_DAYS', str(TOMBSTONE_RETENTION_DAYS))
+)
+
+def create_store():
+    """Build the configured storage engine; database client libraries are only imported here"""
+    if RESTAURANT_STORE == "firestore":
+        import firebase_admin
+        from firebase_admin import credentials, firestore
+        from firestore_store import FirestoreRestaurantStore
+        
+        # Initialize Firebase Admin
+        if not firebase_admin._apps:
+            cred = credentials.Certificate(firebase_service_account)
+            firebase_admin.initialize_app(cred)
+        
+        # All Firestore access goes through the store so blocking calls run off the event loop
+        return FirestoreRestaurantStore(
+            firestore.client(),
+            max_concurrency=FIRESTORE_MAX_CONCURRENCY,
+            counter_shards=RESTAURANT_COUNTER_SHARDS,
+            tombstone_retention_days=RESTAURANT_TOMBSTONE_RETENTION_DAYS,
+            scan_parallelism=FIRESTORE_SCAN_PARALLELISM,
+        )
+    if RESTAURANT_STORE == "mongo":
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from mongo_store import MongoRestaurantStore
+        return MongoRestaurantStore(
+            AsyncIOMotorClient(os.environ['MONGO_URL'])[os.environ['DB_NAME']],
+            tombstone_retention_days=RESTAURANT_TOMBSTONE_RETENTION_DAYS,
+        )
+    return MemoryRestaurantStore()
+
+# Built on first use, or by the warm-up task started after the app is up, to keep cold starts short
+store = LazyRestaurantStore(create_store)
+
+# Optional read-through cache for list pages and key lookups, invalidated on writes
+RESTAURANT_CACHE_ENABLED = os.environ.get('RESTAURANT_CACHE_ENABLED', 'false').lower() == 'true'
+restaurant_cache = TTLCache(
+    max_entries=int(os.environ.get('RESTAURANT_CACHE_MAX_ENTRIES', '1000')),
+    max_bytes=int(os.environ.get('RESTAURANT_CACHE_MAX_BYTES', str(16 * 1024 * 1024))),
+    ttl_seconds=float(os.environ.get('RESTAURANT_CACHE_TTL_SECONDS', '30')),
+) if RESTAURANT_CACHE_ENABLED else None
+
+# The list route checks the collection version on every request, and on Firestore that costs a
+# read per counter shard, so without the read cache it is still kept this long per worker.
+# Another worker's write can take this long to change the list ETags.
+RESTAURANT_VERSION_TTL_SECONDS = float(os.environ.get('RESTAURANT_VERSION_TTL_SECONDS', '2'))
+version_cache = TTLCache(max_entries=1, ttl_seconds=RESTAURANT_VERSION_TTL_SECONDS)
 
-# Initialize Firestore client
-db = firestore.client()
+# Opt-in live replica of the restaurants collection fed by a Firestore snapshot listener;
+# created by the warm-up task once the Firestore client exists
+RESTAURANT_REPLICA_ENABLED = os.environ.get('RESTAURANT_REPLICA_ENABLED', 'false').lower() == 'true'
+RESTAURANT_REPLICA_CHECK_SECONDS = float(os.environ.get('RESTAURANT_REPLICA_CHECK_SECONDS', '5'))
+restaurant_replica = None
+
+def replica_ready() -> bool:
+    return restaurant_replica is not None and restaurant_replica.ready
+
+# Opt-in Parquet analytics snapshot (see snapshot.py) behind /admin/analytics. Those breakdowns
+# may lag writes by up to the maximum age; an older snapshot is still served while a background
+# refresh applies the new changes. Admin stats keep coming from the store's stats shards.
+RESTAURANT_SNAPSHOT_PATH = os.environ.get('RESTAURANT_SNAPSHOT_PATH', '')
+RESTAURANT_SNAPSHOT_MAX_AGE_SECONDS = float(os.environ.get('RESTAURANT_SNAPSHOT_MAX_AGE_SECONDS', '300'))
+restaurant_snapshot = None
+
+def get_snapshot():
+    """The analytics snapshot, or None when disabled; pandas is only imported once one is used"""
+    global restaurant_snapshot
+    if restaurant_snapshot is None and RESTAURANT_SNAPSHOT_PATH:
+        from snapshot import RestaurantSnapshot
+        restaurant_snapshot = RestaurantSnapshot(RESTAURANT_SNAPSHOT_PATH)
+    return restaurant_snapshot
+
+# Hard cap on list page size; requests without a limit get a page of this size
+MAX_PAGE_SIZE = int(os.environ.get('RESTAURANTS_MAX_PAGE_SIZE', '500'))
+
+# Documents fetched per cursor page while streaming an export from the replica
+EXPORT_PAGE_SIZE = int(os.environ.get('RESTAURANTS_EXPORT_PAGE_SIZE', '500'))
+
+# Most documents one search query will read and rank when not served by the replica
+SEARCH_CANDIDATE_LIMIT = int(os.environ.get('RESTAURANTS_SEARCH_CANDIDATE_LIMIT', '1000'))
+SEARCH_MAX_PAGE_SIZE = 100
+
+# Most changes returned by one /restaurants/changes call
+CHANGES_MAX_PAGE_SIZE = 1000
+
+# Creates repeating an in-flight or recent one share its result instead of writing again
+create_coalescer = Coalescer(
+    window_seconds=float(os.environ.get('RESTAURANT_IDEMPOTENCY_WINDOW_SECONDS', '300')),
+)
+
+# Most IDs one delete-batch request may list; bigger deletes go by filter
+DELETE_BATCH_MAX_IDS = int(os.environ.get('RESTAURANTS_DELETE_BATCH_MAX_IDS', '10000'))
+
+# Background admin jobs (batch deletes), polled at /api/admin/jobs/{job_id}
+admin_jobs = JobRegistry(max_jobs=int(os.environ.get('ADMIN_JOBS_MAX', '100')))
+
+# Largest radius /restaurants/nearby accepts; bigger circles read more geohash cells
+NEARBY_MAX_RADIUS_KM = float(os.environ.get('RESTAURANTS_NEARBY_MAX_RADIUS_KM', '50'))
+
+@asynccontextmanager
+async def lifespan(app):
+    await start_store()
+    yield
+    await shutdown_store()
 
 # Create the main app
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+
+# Per-route latency and store operation counts, served at /api/metrics
+metrics = Metrics()
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -68,6 +212,76 @@ class RestaurantCreate(BaseModel):
     restaurantKey: str
     createdAt: str
     updatedAt: str
+    latitude: Optional[float] = Field(None, ge=-90, le=90)
+    longitude: Optional[float] = Field(None, ge=-180, le=180)
+
+    @field_validator('restaurantKey')
+    @classmethod
+    def restaurant_key_is_document_id(cls, value):
+        # The key doubles as the Firestore document ID
+        if not is_valid_document_id(value):
+            raise ValueError("restaurantKey must be a valid Firestore document ID (no '/', not '.', '..' or '__*__')")
+        return value
+
+    @field_validator('latitude', 'longitude', mode='before')
+    @classmethod
+    def blank_coordinate_is_none(cls, value):
+        # Bulk CSV uploads send empty cells as ""
+        return None if isinstance(value, str) and not value.strip() else value
+
+    @model_validator(mode='after')
+    def coordinates_come_in_pairs(self):
+        if (self.latitude is None) != (self.longitude is None):
+            raise ValueError("latitude and longitude must be provided together")
+        return self
+
+class DeleteBatchFilter(BaseModel):
+    created_by: Optional[str] = None
+    # ISO 8601, from inclusive and before exclusive
+    created_from: Optional[str] = None
+    created_before: Optional[str] = None
+
+    @field_validator('created_from', 'created_before')
+    @classmethod
+    def as_stored_timestamp(cls, value):
+        # created_at is stored as the client's toISOString() and compared as a string,
+        # so bounds are rewritten in that exact form (UTC, milliseconds, "Z")
+        if value is None:
+            return None
+        try:
+            moment = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            raise ValueError("must be an ISO 8601 timestamp")
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        return moment.astimezone(timezone.utc).isoformat(timespec='milliseconds').replace('+00:00', 'Z')
+
+    @model_validator(mode='after')
+    def has_a_criterion(self):
+        # An empty filter would match, and delete, every restaurant
+        if self.created_by is None and self.created_from is None and self.created_before is None:
+            raise ValueError("filter needs created_by, created_from or created_before")
+        return self
+
+class DeleteBatchRequest(BaseModel):
+    ids: Optional[List[str]] = Field(None, min_length=1, max_length=DELETE_BATCH_MAX_IDS)
+    filter: Optional[DeleteBatchFilter] = None
+    archive: bool = False
+
+    @field_validator('ids')
+    @classmethod
+    def ids_are_document_ids(cls, value):
+        if value is not None:
+            invalid = [restaurant_id for restaurant_id in value if not is_valid_document_id(restaurant_id)]
+            if invalid:
+                raise ValueError(f"invalid restaurant IDs: {invalid[:10]}")
+        return value
+
+    @model_validator(mode='after')
+    def ids_or_filter(self):
+        if (self.ids is None) == (self.filter is None):
+            raise ValueError("provide either ids or filter")
+        return self
 
 class Restaurant(BaseModel):
     id: Optional[str] = None
@@ -90,6 +304,241 @@ class Restaurant(BaseModel):
     created_at: str
     updated_at: str
     created_by: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+
+def restaurant_to_document(restaurant_data: RestaurantCreate) -> dict:
+    """Map the camelCase API model to the snake_case Firestore document"""
+    return {
+        "restaurant_name": restaurant_data.restaurantName,
+        "street_address": restaurant_data.streetAddress,
+        "city": restaurant_data.city,
+        "state": restaurant_data.state,
+        "zipcode": restaurant_data.zipcode,
+        "primary_phone": restaurant_data.primaryPhone,
+        "website_url": restaurant_data.websiteUrl,
+        "menu_url": restaurant_data.menuUrl,
+        "menu_comments": restaurant_data.menuComments,
+        "gm_name": restaurant_data.gmName,
+        "gm_phone": restaurant_data.gmPhone,
+        "secondary_phone": restaurant_data.secondaryPhone,
+        "third_phone": restaurant_data.thirdPhone,
+        "doordash_url": restaurant_data.doordashUrl,
+        "uber_eats_url": restaurant_data.uberEatsUrl,
+        "grubhub_url": restaurant_data.grubhubUrl,
+        "notes": restaurant_data.notes,
+        "restaurant_key": restaurant_data.restaurantKey,
+        "created_at": restaurant_data.createdAt,
+        "updated_at": restaurant_data.updatedAt,
+        "created_by": CURRENT_USER,  # Track user who created the entry
+        "latitude": restaurant_data.latitude,
+        "longitude": restaurant_data.longitude,
+    }
+
+def parse_fields(fields: Optional[str]):
+    """Projection from a comma-separated fields parameter, or None for every field"""
+    if fields is None:
+        return None
+    requested = {name.strip() for name in fields.split(",") if name.strip()} - {"id"}
+    unknown = requested - set(RESTAURANT_FIELDS)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+    return tuple(sorted(requested))
+
+async def read_list_page(sort_by, order, page_size, page_token, fields=None):
+    """One list page from the replica, the cache or Firestore, in that order"""
+    if replica_ready():
+        return restaurant_replica.list_page(sort_by, order, page_size, page_token, fields)
+    if restaurant_cache is None:
+        return await store.list_page(sort_by, order, page_size, page_token, fields)
+    cache_key = ("list", sort_by, order, page_size, page_token, fields)
+    page = restaurant_cache.get(cache_key)
+    if page is None:
+        generation = restaurant_cache.generation
+        page = await store.list_page(sort_by, order, page_size, page_token, fields)
+        restaurant_cache.set(cache_key, page, generation=generation)
+    return page
+
+async def read_restaurant_by_key(restaurant_key):
+    """Key lookup from the replica, the cache or Firestore (misses are not cached)"""
+    if replica_ready():
+        return restaurant_replica.get_by_key(restaurant_key)
+    if restaurant_cache is None:
+        return await store.get_by_key(restaurant_key)
+    cache_key = ("key", restaurant_key)
+    restaurant = restaurant_cache.get(cache_key)
+    if restaurant is None:
+        generation = restaurant_cache.generation
+        restaurant = await store.get_by_key(restaurant_key)
+        if restaurant is not None:
+            restaurant_cache.set(cache_key, restaurant, generation=generation)
+    return restaurant
+
+async def read_search(tokens):
+    """Ranked search results for ``tokens`` and whether the candidate set was capped"""
+    if replica_ready():
+        return rank(restaurant_replica.search(tokens), tokens), False
+    cache_key = ("search", tuple(tokens))
+    if restaurant_cache is not None:
+        result = restaurant_cache.get(cache_key)
+        if result is not None:
+            return result
+        generation = restaurant_cache.generation
+    candidates, truncated = await store.search(tokens, SEARCH_CANDIDATE_LIMIT)
+    result = (rank(candidates, tokens), truncated)
+    if restaurant_cache is not None:
+        restaurant_cache.set(cache_key, result, generation=generation)
+    return result
+
+async def read_geohash_candidates(ranges):
+    """Restaurants in the given geohash ranges, from the replica or Firestore"""
+    if replica_ready():
+        return restaurant_replica.geohash_candidates(ranges)
+    return await store.geohash_candidates(ranges)
+
+snapshot_refresh_task = None
+
+async def refresh_snapshot():
+    try:
+        summary = await restaurant_snapshot.refresh(store, max_age=RESTAURANT_SNAPSHOT_MAX_AGE_SECONDS)
+        logger.info(f"Analytics snapshot refreshed: {summary}")
+    except Exception as e:
+        logger.error(f"Error refreshing analytics snapshot: {str(e)}")
+
+def start_snapshot_refresh():
+    """Refresh the analytics snapshot in the background unless a refresh is already running"""
+    global snapshot_refresh_task
+    if snapshot_refresh_task is None or snapshot_refresh_task.done():
+        snapshot_refresh_task = asyncio.create_task(refresh_snapshot())
+
+async def read_snapshot_frame():
+    """The analytics snapshot DataFrame; one past the maximum age is served while it refreshes in the background"""
+    snapshot = get_snapshot()
+    frame = await asyncio.to_thread(snapshot.load)
+    if frame is None:
+        # Nothing to serve until the first build finishes
+        await snapshot.refresh(store)
+        return snapshot.frame
+    if (snapshot.age() or 0) >= RESTAURANT_SNAPSHOT_MAX_AGE_SECONDS:
+        start_snapshot_refresh()
+    return frame
+
+async def read_stats():
+    """Restaurant count and breakdowns from the replica or the stats shards"""
+    if replica_ready():
+        return restaurant_replica.stats()
+    return await store.stats()
+
+async def read_collection_version():
+    """Collection version from the replica, the cache or the store; None if the store keeps none"""
+    if replica_ready():
+        return restaurant_replica.version
+    cache = restaurant_cache if restaurant_cache is not None else version_cache
+    cache_key = ("version", None)
+    version = cache.get(cache_key)
+    if version is None:
+        generation = cache.generation
+        version = await store.version()
+        if version is not None:
+            cache.set(cache_key, version, generation=generation)
+    return version
+
+def invalidate_restaurant_cache(restaurant_keys=()):
+    """Drop every cached list page, search and version plus the lookups for ``restaurant_keys``"""
+    version_cache.clear()
+    if restaurant_cache is None:
+        return
+    restaurant_keys = set(restaurant_keys)
+    restaurant_cache.invalidate(lambda key: key[0] in ("list", "search", "version") or key[1] in restaurant_keys)
+
+def make_etag(*parts):
+    """Strong ETag over the JSON encoding of ``parts``"""
+    encoded = json.dumps(parts, sort_keys=True, separators=(',', ':'), default=str)
+    return f'"{hashlib.sha1(encoded.encode()).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match already names ``etag``"""
+    header = request.headers.get('if-none-match')
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so a W/ prefix does not matter
+    return any(tag.strip().removeprefix("W/") == etag for tag in header.split(","))
+
+def etag_headers(etag: str) -> dict:
+    # no-cache: clients may keep the body but must revalidate before reusing it
+    return {"ETag": etag, "Cache-Control": "no-cache"}
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=etag_headers(etag))
+
+def json_response(body, etag: Optional[str] = None) -> FastJSONResponse:
+    """Render ``body`` with orjson, skipping FastAPI's jsonable_encoder pass"""
+    return FastJSONResponse(body, headers=etag_headers(etag) if etag else None)
+
+async def iter_body_lines(request: Request):
+    """Yield decoded lines from the request body as it streams in"""
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    buffer = ""
+    async for chunk in request.stream():
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            yield line.rstrip('\r')
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip('\r')
+
+async def iter_bulk_rows(request: Request):
+    """Yield raw rows (dicts, or an Exception for unparseable rows) from a bulk upload"""
+    content_type = request.headers.get('content-type', '').split(';')[0].strip().lower()
+    
+    if content_type in ('application/x-ndjson', 'application/ndjson', 'application/jsonl'):
+        async for line in iter_body_lines(request):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError as e:
+                yield ValueError(f"Invalid JSON: {e}")
+    
+    elif content_type == 'text/csv':
+        header = None
+        record = ""
+        async for line in iter_body_lines(request):
+            # Quoted fields may span lines; a record ends once its quotes balance
+            record = f"{record}\n{line}" if record else line
+            if record.count('"') % 2:
+                continue
+            if not record.strip():
+                record = ""
+                continue
+            values = next(csv.reader([record]))
+            record = ""
+            if header is None:
+                header = [name.strip() for name in values]
+                continue
+            # Empty CSV cells mean "not provided" for the optional fields
+            yield {name: value for name, value in zip(header, values) if value != ""}
+        if record:
+            yield ValueError("Unterminated quoted field at end of CSV")
+    
+    elif content_type in ('application/json', ''):
+        try:
+            rows = json.loads(await request.body())
+        except json.JSONDecodeError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid JSON body: {e}")
+        if not isinstance(rows, list):
+            raise HTTPException(status_code=400, detail="JSON body must be an array of restaurants")
+        for row in rows:
+            yield row
+    
+    else:
+        raise HTTPException(
+            status_code=415,
+            detail="Content-Type must be application/json, application/x-ndjson or text/csv"
+        )
 
 # Routes
 @api_router.get("/")
@@ -100,14 +549,17 @@ async def root():
 async def health_check():
     """Health check endpoint"""
     try:
-        # Try to access Firestore to verify connection
-        test_doc = db.collection('health_check').document('test').get()
-        return {
+        # Try to access the database to verify connection
+        await store.ping()
+        health = {
             "status": "healthy",
-            "database": "firestore",
+            "database": RESTAURANT_STORE,
             "user": CURRENT_USER,
             "timestamp": datetime.utcnow().isoformat()
         }
+        if restaurant_replica is not None:
+            health["replica"] = {"enabled": True, **restaurant_replica.status()}
+        return health
     except Exception as e:
         return {
             "status": "unhealthy",
@@ -115,39 +567,40 @@ async def health_check():
             "timestamp": datetime.utcnow().isoformat()
         }
 
+@api_router.get("/metrics")
+async def get_metrics():
+    """Request latency and store operation metrics in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type=PROMETHEUS_CONTENT_TYPE)
+
 # Restaurant Routes
 @api_router.post("/restaurants")
-async def create_restaurant(restaurant_data: RestaurantCreate):
-    """Create a new restaurant entry"""
+async def create_restaurant(
+    restaurant_data: RestaurantCreate,
+    idempotency_key: Optional[str] = Header(None, min_length=1, max_length=255),
+):
+    """Create a new restaurant entry; retries with the same Idempotency-Key get the original result"""
+    # Prepare restaurant data for Firestore storage
+    restaurant_dict = restaurant_to_document(restaurant_data)
+    request_fingerprint = fingerprint(restaurant_dict)
+    
+    # Without a key, only identical submissions racing each other are merged
+    coalesce_key = ("key", idempotency_key) if idempotency_key else ("body", request_fingerprint)
+    try:
+        return await create_coalescer.run(
+            coalesce_key,
+            request_fingerprint,
+            lambda: save_restaurant(restaurant_data, restaurant_dict, idempotency_key),
+            remember=idempotency_key is not None,
+        )
+    except IdempotencyKeyReused as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+async def save_restaurant(restaurant_data: RestaurantCreate, restaurant_dict: dict, idempotency_key: Optional[str]):
+    """Write one new restaurant, shared by every coalesced create request"""
     try:
-        # Prepare restaurant data for Firestore storage
-        restaurant_dict = {
-            "restaurant_name": restaurant_data.restaurantName,
-            "street_address": restaurant_data.streetAddress,
-            "city": restaurant_data.city,
-            "state": restaurant_data.state,
-            "zipcode": restaurant_data.zipcode,
-            "primary_phone": restaurant_data.primaryPhone,
-            "website_url": restaurant_data.websiteUrl,
-            "menu_url": restaurant_data.menuUrl,
-            "menu_comments": restaurant_data.menuComments,
-            "gm_name": restaurant_data.gmName,
-            "gm_phone": restaurant_data.gmPhone,
-            "secondary_phone": restaurant_data.secondaryPhone,
-            "third_phone": restaurant_data.thirdPhone,
-            "doordash_url": restaurant_data.doordashUrl,
-            "uber_eats_url": restaurant_data.uberEatsUrl,
-            "grubhub_url": restaurant_data.grubhubUrl,
-            "notes": restaurant_data.notes,
-            "restaurant_key": restaurant_data.restaurantKey,
-            "created_at": restaurant_data.createdAt,
-            "updated_at": restaurant_data.updatedAt,
-            "created_by": CURRENT_USER,  # Track user who created the entry
-        }
-        
         # Save to Firestore
-        doc_ref = db.collection('restaurants').add(restaurant_dict)
-        document_id = doc_ref[1].id
+        document_id = await store.add(restaurant_dict, idempotency_key=idempotency_key)
+        invalidate_restaurant_cache([restaurant_data.restaurantKey])
         
         logger.info(f"Restaurant saved to Firestore with ID: {document_id}")
         
@@ -159,63 +612,242 @@ async def create_restaurant(restaurant_data: RestaurantCreate):
             "created_by": CURRENT_USER
         }
         
+    except DuplicateRestaurantKey as e:
+        raise HTTPException(status_code=409, detail=str(e))
     except Exception as e:
         logger.error(f"Error saving restaurant: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to save restaurant: {str(e)}")
 
+@api_router.post("/restaurants/bulk")
+async def bulk_create_restaurants(request: Request):
+    """Create many restaurants from a JSON array, NDJSON or CSV upload"""
+    results = []
+    seen_keys = set()
+    chunk = []  # (result, document) pairs waiting to be written
+    
+    async def flush():
+        documents = [document for _, document in chunk]
+        try:
+            statuses = await store.bulk_add(documents)
+            invalidate_restaurant_cache([document["restaurant_key"] for document in documents])
+            for result, document in chunk:
+                result["status"] = statuses[document["restaurant_key"]]
+                if result["status"] == "created":
+                    result["id"] = document["restaurant_key"]
+                else:
+                    result["errors"] = ["restaurantKey already exists"]
+        except Exception as e:
+            logger.error(f"Error writing bulk chunk of {len(chunk)} restaurants: {str(e)}")
+            for result, _ in chunk:
+                result.update({"status": "failed", "errors": [str(e)]})
+        chunk.clear()
+    
+    async for row in iter_bulk_rows(request):
+        result = {"row": len(results) + 1}
+        results.append(result)
+        try:
+            if isinstance(row, Exception):
+                raise row
+            restaurant_data = RestaurantCreate.model_validate(row)
+        except ValidationError as e:
+            errors = [f"{'.'.join(str(part) for part in err['loc'])}: {err['msg']}" for err in e.errors()]
+            result.update({"status": "invalid", "errors": errors})
+            continue
+        except ValueError as e:
+            result.update({"status": "invalid", "errors": [str(e)]})
+            continue
+        
+        result["restaurant_key"] = restaurant_data.restaurantKey
+        if restaurant_data.restaurantKey in seen_keys:
+            result.update({"status": "duplicate", "errors": ["restaurantKey repeated earlier in this upload"]})
+            continue
+        seen_keys.add(restaurant_data.restaurantKey)
+        
+        chunk.append((result, restaurant_to_document(restaurant_data)))
+        if len(chunk) >= BULK_CHUNK_SIZE:
+            await flush()
+    
+    if chunk:
+        await flush()
+    
+    summary = {status_name: 0 for status_name in ("created", "duplicate", "invalid", "failed")}
+    for result in results:
+        summary[result["status"]] += 1
+    
+    logger.info(f"Bulk import processed {len(results)} rows: {summary}")
+    
+    return {
+        "success": summary["failed"] == 0 and summary["invalid"] == 0,
+        "total_rows": len(results),
+        "created": summary["created"],
+        "duplicates": summary["duplicate"],
+        "invalid": summary["invalid"],
+        "failed": summary["failed"],
+        "created_by": CURRENT_USER,
+        "results": results
+    }
+
 @api_router.get("/restaurants")
-async def get_restaurants(sort_by: str = "created_at", order: str = "desc"):
-    """Get all restaurants with optional sorting"""
+async def get_restaurants(
+    request: Request,
+    sort_by: str = "created_at",
+    order: str = "desc",
+    limit: Optional[int] = Query(None, ge=1),
+    page_token: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+):
+    """Get restaurants with optional sorting, one cursor page at a time"""
+    projection = parse_fields(fields)
     try:
-        # Query Firestore
-        restaurants_ref = db.collection('restaurants')
-        
-        # Apply sorting
-        if sort_by in ["created_at", "updated_at", "restaurant_name"]:
-            if order == "asc":
-                restaurants_ref = restaurants_ref.order_by(sort_by)
-            else:
-                restaurants_ref = restaurants_ref.order_by(sort_by, direction=firestore.Query.DESCENDING)
+        # Unpaginated callers still get at most MAX_PAGE_SIZE documents
+        page_size = min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
         
-        restaurants = []
-        docs = restaurants_ref.stream()
+        # Version before page: a write in between changes the next ETag instead of hiding behind this one
+        version = await read_collection_version()
+        etag = None
+        if version is not None:
+            etag = make_etag("list", version, sort_by, order, page_size, page_token, projection)
+            if etag_matches(request, etag):
+                return not_modified(etag)
         
-        for doc in docs:
-            restaurant_data = doc.to_dict()
-            restaurant_data['id'] = doc.id
-            restaurants.append(restaurant_data)
+        # Query Firestore with sorting and the projection applied, starting after the cursor
+        restaurants, next_page_token = await read_list_page(sort_by, order, page_size, page_token, projection)
         
         logger.info(f"Retrieved {len(restaurants)} restaurants from Firestore")
         
-        return {
+        body = {
             "restaurants": restaurants,
             "count": len(restaurants),
             "sorted_by": sort_by,
-            "order": order
+            "order": order,
+            "limit": page_size,
+            "next_page_token": next_page_token
         }
         
+        if etag is None:
+            # Stores without a version are hashed by content; that saves bandwidth but not reads
+            etag = make_etag("list", body)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+        return json_response(body, etag)
+        
+    except InvalidPageToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching restaurants: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch restaurants: {str(e)}")
 
+@api_router.get("/restaurants/search")
+async def search_restaurants(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=SEARCH_MAX_PAGE_SIZE),
+    page_token: Optional[str] = None,
+):
+    """Search restaurants by name, city, zipcode or phone, best matches first"""
+    try:
+        tokens = query_tokens(q)
+        if not tokens:
+            raise HTTPException(status_code=400, detail="Search query needs at least two letters or three digits")
+        
+        offset = decode_offset_token(page_token, tokens) if page_token else 0
+        ranked, truncated = await read_search(tokens)
+        results = ranked[offset:offset + limit]
+        
+        next_page_token = None
+        if offset + limit < len(ranked):
+            next_page_token = encode_offset_token(tokens, offset + limit)
+        
+        logger.info(f"Search {tokens} matched {len(ranked)} restaurants")
+        
+        return json_response({
+            "query": q,
+            "results": results,
+            "count": len(results),
+            "total_matches": len(ranked),
+            # True when only the first SEARCH_CANDIDATE_LIMIT candidates were ranked
+            "truncated": truncated,
+            "next_page_token": next_page_token
+        })
+        
+    except HTTPException:
+        raise
+    except InvalidPageToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error searching restaurants: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to search restaurants: {str(e)}")
+
+@api_router.get("/restaurants/nearby")
+async def nearby_restaurants(
+    lat: float = Query(..., ge=-90, le=90),
+    lng: float = Query(..., ge=-180, le=180),
+    radius_km: float = Query(5.0, gt=0, le=NEARBY_MAX_RADIUS_KM),
+    limit: int = Query(50, ge=1, le=MAX_PAGE_SIZE),
+):
+    """Restaurants within radius_km of a point, nearest first"""
+    try:
+        # Geohash range queries narrow the candidates; exact distance decides
+        ranges = query_ranges(lat, lng, radius_km)
+        candidates = await read_geohash_candidates(ranges)
+        restaurants = within_radius(candidates, lat, lng, radius_km)
+        
+        logger.info(f"Nearby search read {len(candidates)} candidates from {len(ranges)} geohash cells")
+        
+        return json_response({
+            "restaurants": restaurants[:limit],
+            "count": min(len(restaurants), limit),
+            "total_within_radius": len(restaurants),
+            "center": {"lat": lat, "lng": lng},
+            "radius_km": radius_km
+        })
+        
+    except Exception as e:
+        logger.error(f"Error fetching nearby restaurants: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch nearby restaurants: {str(e)}")
+
+@api_router.get("/restaurants/changes")
+async def restaurant_changes(
+    since: Optional[str] = None,
+    limit: int = Query(500, ge=1, le=CHANGES_MAX_PAGE_SIZE),
+):
+    """Restaurants created, updated or deleted after the since token, oldest change first"""
+    try:
+        # Always from the store: the replica and the cache keep no tombstones
+        changes, next_token, has_more = await store.changes(since, limit)
+        
+        logger.info(f"Changes feed returned {len(changes)} changes")
+        
+        return json_response({
+            "changes": changes,
+            "count": len(changes),
+            # Pass back as since; keep calling while has_more
+            "next_token": next_token,
+            "has_more": has_more
+        })
+        
+    except InvalidPageToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except ChangeTokenExpired as e:
+        raise HTTPException(status_code=410, detail=f"{e}; reload the collection and sync from a new token")
+    except Exception as e:
+        logger.error(f"Error fetching restaurant changes: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to fetch restaurant changes: {str(e)}")
+
 @api_router.get("/restaurants/{restaurant_key}")
-async def get_restaurant_by_key(restaurant_key: str):
+async def get_restaurant_by_key(restaurant_key: str, request: Request):
     """Get restaurant by unique key"""
     try:
-        # Query Firestore by restaurant_key
-        restaurants_ref = db.collection('restaurants')
-        query = restaurants_ref.where('restaurant_key', '==', restaurant_key)
-        docs = list(query.stream())
+        # Point read: restaurant_key is the document ID
+        restaurant_data = await read_restaurant_by_key(restaurant_key)
         
-        if not docs:
+        if restaurant_data is None:
             raise HTTPException(status_code=404, detail="Restaurant not found")
         
-        # Return the first match (should be unique)
-        doc = docs[0]
-        restaurant_data = doc.to_dict()
-        restaurant_data['id'] = doc.id
-        
-        return restaurant_data
+        # The document itself is cheaper to hash than a collection version is to read
+        etag = make_etag("restaurant", restaurant_data)
+        if etag_matches(request, etag):
+            return not_modified(etag)
+        return json_response(restaurant_data, etag)
         
     except HTTPException:
         raise
@@ -225,45 +857,98 @@ async def get_restaurant_by_key(restaurant_key: str):
 
 # Admin Routes
 @api_router.get("/admin/restaurants")
-async def admin_get_restaurants():
-    """Admin endpoint to get all restaurants with statistics"""
+async def admin_get_restaurants(
+    request: Request,
+    include_restaurants: bool = True,
+    sort_by: str = "created_at",
+    order: str = "desc",
+    limit: Optional[int] = Query(None, ge=1),
+    page_token: Optional[str] = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return (id is always included)"),
+):
+    """Admin endpoint to get statistics and, optionally, one page of restaurants"""
+    projection = parse_fields(fields)
     try:
-        restaurants = []
-        docs = db.collection('restaurants').stream()
-        
-        for doc in docs:
-            restaurant_data = doc.to_dict()
-            restaurant_data['id'] = doc.id
-            restaurants.append(restaurant_data)
+        # Statistics come from the materialized stats shards, not a collection scan
+        stats = await read_stats()
         
-        # Generate statistics
-        cities = set([r.get("city", "Unknown") for r in restaurants])
-        states = set([r.get("state", "Unknown") for r in restaurants])
-        created_by_users = set([r.get("created_by", "Unknown") for r in restaurants])
+        # The stats carry the collection version, so the ETag costs no extra reads
+        page_size = min(limit or MAX_PAGE_SIZE, MAX_PAGE_SIZE)
+        etag = None
+        if stats.get("version") is not None:
+            etag = make_etag("admin", stats["version"], include_restaurants, sort_by, order, page_size, page_token,
+                             projection)
+            if etag_matches(request, etag):
+                return not_modified(etag)
         
-        return {
-            "restaurants": restaurants,
+        body = {
             "stats": {
-                "total_count": len(restaurants),
-                "cities_covered": len(cities),
-                "states_covered": len(states),
-                "cities": list(cities),
-                "states": list(states),
-                "created_by_users": list(created_by_users),
+                "total_count": stats["count"],
+                "cities_covered": len(stats["cities"]),
+                "states_covered": len(stats["states"]),
+                "cities": list(stats["cities"]),
+                "states": list(stats["states"]),
+                "created_by_users": list(stats["created_by"]),
+                "city_counts": stats["cities"],
+                "state_counts": stats["states"],
+                "created_by_counts": stats["created_by"],
                 "current_user": CURRENT_USER
             }
         }
         
+        if include_restaurants:
+            restaurants, next_page_token = await read_list_page(sort_by, order, page_size, page_token, projection)
+            body["restaurants"] = restaurants
+            body["next_page_token"] = next_page_token
+        
+        if etag is None:
+            etag = make_etag("admin", body)
+            if etag_matches(request, etag):
+                return not_modified(etag)
+        return json_response(body, etag)
+        
+    except InvalidPageToken as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching admin restaurants: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch restaurants: {str(e)}")
 
+@api_router.get("/admin/restaurants/export")
+async def admin_export_restaurants(
+    format: str = Query("ndjson", pattern="^(ndjson|csv)$"),
+    gzip: bool = False,
+):
+    """Stream every restaurant as NDJSON or CSV without buffering the collection"""
+    # Export reads bypass the cache so they don't evict hot entries
+    if replica_ready():
+        async def replica_page(sort_by, order, page_size, page_token, fields):
+            return restaurant_replica.list_page(sort_by, order, page_size, page_token, fields)
+        
+        batches = iter_pages(replica_page, EXPORT_PAGE_SIZE)
+    else:
+        # The store splits the scan into ranges read in parallel
+        batches = store.scan()
+    
+    filename = f"restaurants.{format}"
+    headers = {"Content-Disposition": f'attachment; filename="{filename}"'}
+    if gzip:
+        # Compressed on the wire only; clients decode it back to NDJSON or CSV
+        headers["Content-Encoding"] = "gzip"
+    
+    logger.info(f"Starting restaurant export: {filename}" + (" (gzip)" if gzip else ""))
+    
+    return StreamingResponse(
+        export_stream(batches, format=format, gzip=gzip),
+        media_type=EXPORT_FORMATS[format],
+        headers=headers
+    )
+
 @api_router.get("/admin/database-stats")
 async def admin_database_stats():
     """Get Firestore database statistics"""
     try:
-        # Count documents in restaurants collection
-        restaurants_count = len(list(db.collection('restaurants').stream()))
+        # Count documents from the live replica or the sharded counter
+        restaurants_count = (await read_stats())["count"]
         
         return {
             "collections": ["restaurants"],
@@ -271,7 +956,7 @@ async def admin_database_stats():
                 "restaurants": restaurants_count
             },
             "total_collections": 1,
-            "database_type": "firestore",
+            "database_type": RESTAURANT_STORE,
             "current_user": CURRENT_USER
         }
         
@@ -279,12 +964,73 @@ async def admin_database_stats():
         logger.error(f"Error fetching database stats: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch database stats: {str(e)}")
 
+@api_router.post("/admin/database-stats/reconcile")
+async def admin_reconcile_database_stats():
+    """Recompute the restaurant count and breakdowns from scratch"""
+    try:
+        stats = await store.reconcile_stats()
+        restaurants_count = stats["count"]
+        logger.info(f"Reconciled restaurant stats: {restaurants_count} restaurants")
+        
+        return {
+            "success": True,
+            "collection_stats": {
+                "restaurants": restaurants_count
+            }
+        }
+        
+    except Exception as e:
+        logger.error(f"Error reconciling database stats: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to reconcile database stats: {str(e)}")
+
+@api_router.get("/admin/cache-stats")
+async def admin_cache_stats():
+    """Hit/miss counters and memory usage of the restaurant read cache"""
+    if restaurant_cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **restaurant_cache.stats()}
+
+@api_router.get("/admin/analytics")
+async def admin_analytics():
+    """Restaurant breakdowns from the Parquet analytics snapshot"""
+    if get_snapshot() is None:
+        raise HTTPException(status_code=404, detail="Analytics snapshot is disabled; set RESTAURANT_SNAPSHOT_PATH")
+    try:
+        from snapshot import frame_analytics
+        frame = await read_snapshot_frame()
+        
+        return json_response({
+            **frame_analytics(frame),
+            "snapshot_age_seconds": round(restaurant_snapshot.age(), 1),
+            "current_user": CURRENT_USER
+        })
+        
+    except Exception as e:
+        logger.error(f"Error reading analytics snapshot: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to read analytics snapshot: {str(e)}")
+
+@api_router.post("/admin/analytics/refresh")
+async def admin_refresh_analytics():
+    """Apply every change since the last refresh to the analytics snapshot now"""
+    if get_snapshot() is None:
+        raise HTTPException(status_code=404, detail="Analytics snapshot is disabled; set RESTAURANT_SNAPSHOT_PATH")
+    try:
+        summary = await restaurant_snapshot.refresh(store)
+        logger.info(f"Analytics snapshot refreshed: {summary}")
+        return {"success": True, **summary}
+        
+    except Exception as e:
+        logger.error(f"Error refreshing analytics snapshot: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Failed to refresh analytics snapshot: {str(e)}")
+
 @api_router.delete("/admin/restaurants/{restaurant_id}")
 async def admin_delete_restaurant(restaurant_id: str):
     """Delete a restaurant (admin only)"""
     try:
         # Delete from Firestore
-        db.collection('restaurants').document(restaurant_id).delete()
+        deleted = await store.delete(restaurant_id)
+        if deleted is not None:
+            invalidate_restaurant_cache([deleted["restaurant_key"]] if deleted.get("restaurant_key") else [])
         
         return {"success": True, "message": f"Restaurant {restaurant_id} deleted successfully"}
         
@@ -292,9 +1038,85 @@ async def admin_delete_restaurant(restaurant_id: str):
         logger.error(f"Error deleting restaurant: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Failed to delete restaurant: {str(e)}")
 
+async def run_delete_batch(job: dict, request: DeleteBatchRequest):
+    """Delete the requested restaurants a chunk at a time, keeping ``job`` up to date"""
+    if request.ids is not None:
+        restaurant_ids = list(dict.fromkeys(request.ids))
+    else:
+        restaurant_ids = await store.matching_ids(**request.filter.model_dump())
+    job["matched"] = len(restaurant_ids)
+    
+    for start in range(0, len(restaurant_ids), DELETE_CHUNK_SIZE):
+        chunk = restaurant_ids[start:start + DELETE_CHUNK_SIZE]
+        deleted = await store.delete_many(chunk, archive=request.archive)
+        # Per chunk, so reads stop returning deleted restaurants while the job is still running
+        invalidate_restaurant_cache([restaurant["restaurant_key"] for restaurant in deleted if restaurant.get("restaurant_key")])
+        job["processed"] += len(chunk)
+        job["deleted"] += len(deleted)
+        if request.archive:
+            job["archived"] += len(deleted)
+    
+    logger.info(f"Batch delete {job['id']}: deleted {job['deleted']} of {job['matched']} matched restaurants")
+
+@api_router.post("/admin/restaurants/delete-batch", status_code=202)
+async def admin_delete_restaurants_batch(request: DeleteBatchRequest):
+    """Start deleting restaurants by ID list or filter (admin only); poll the returned job for progress"""
+    job = admin_jobs.start(
+        "delete-batch",
+        lambda job: run_delete_batch(job, request),
+        archive=request.archive,
+        matched=None,
+        processed=0,
+        deleted=0,
+        archived=0,
+    )
+    return {"success": True, "job": job, "status_url": f"/api/admin/jobs/{job['id']}"}
+
+@api_router.get("/admin/jobs/{job_id}")
+async def admin_get_job(job_id: str):
+    """Status and progress of a background admin job"""
+    job = admin_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+async def warm_up_store():
+    """Build the store, its indexes and the replica without holding up startup"""
+    global restaurant_replica
+    try:
+        await store.ensure_indexes()
+        if restaurant_replica is None and RESTAURANT_REPLICA_ENABLED and RESTAURANT_STORE == "firestore":
+            firestore_store = await store.resolve() if isinstance(store, LazyRestaurantStore) else store
+            restaurant_replica = RestaurantReplica(firestore_store.collection, check_interval=RESTAURANT_REPLICA_CHECK_SECONDS)
+        if restaurant_replica is not None:
+            restaurant_replica.start()
+        if get_snapshot() is not None:
+            start_snapshot_refresh()
+    except Exception as e:
+        # Requests still build the store on first use and report their own errors
+        logger.error(f"Error warming up the store: {str(e)}")
+
+warm_up_task = None
+
+async def start_store():
+    global warm_up_task
+    warm_up_task = asyncio.create_task(warm_up_store())
+
+async def shutdown_store():
+    if warm_up_task is not None and not warm_up_task.done():
+        warm_up_task.cancel()
+    if snapshot_refresh_task is not None and not snapshot_refresh_task.done():
+        snapshot_refresh_task.cancel()
+    admin_jobs.cancel_all()
+    if restaurant_replica is not None:
+        restaurant_replica.stop()
+    store.close()
+
 # Include the router in the main app
 app.include_router(api_router)
 
+app.add_middleware(MetricsMiddleware, metrics=metrics, debug_headers=DEBUG)
+
 # Configure CORS
 app.add_middleware(
     CORSMiddleware,
@@ -302,6 +1124,7 @@ app.add_middleware(
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["ETag", "X-Document-Reads", "X-Document-Writes", "X-Document-Deletes"],
 )
 
 # Configure logging
@@ -0,0 +1,202 @@
+"""
+Columnar Parquet snapshot of the restaurants collection for analytics.
+
+The snapshot is one Parquet file with typed columns: timestamps, floats, and
+city, state, created_by and geocode_source dictionary-encoded, so a group-by
+is a count over small integer codes. Admin stats and analytics read it as a
+pandas DataFrame and aggregate with vectorized value_counts() instead of
+looping over documents.
+
+Refreshes are incremental. The file's metadata holds the changes-feed token
+(see the changes() store method) it is current up to, and a refresh applies
+only the upserts and deletes since then. The feed's server-stamped
+changed_at is a more reliable watermark than the client-supplied updated_at,
+and unlike a watermark query it also reports deletes. A token the store no
+longer honours (ChangeTokenExpired) falls back to a full rebuild. The file
+is replaced atomically, so readers never see a partial snapshot.
+"""
+
+import asyncio
+import os
+import tempfile
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from store import RESTAURANT_FIELDS, STATS_FIELDS, ChangeTokenExpired
+
+# Low-cardinality columns stored as dictionaries
+CATEGORY_COLUMNS = ("city", "state", "created_by", "geocode_source")
+TIMESTAMP_COLUMNS = ("created_at", "updated_at")
+FLOAT_COLUMNS = ("latitude", "longitude")
+SNAPSHOT_COLUMNS = ("id",) + RESTAURANT_FIELDS
+
+# Changes fetched per changes() call while refreshing
+REFRESH_PAGE_SIZE = 1000
+
+TOKEN_METADATA_KEY = b"restaurants.changes_token"
+REFRESHED_AT_METADATA_KEY = b"restaurants.refreshed_at"
+
+
+def to_frame(restaurants):
+    """Typed DataFrame of restaurant dicts, one row each, in SNAPSHOT_COLUMNS order"""
+    frame = pd.DataFrame.from_records(list(restaurants), columns=list(SNAPSHOT_COLUMNS))
+    return normalize(frame)
+
+
+def normalize(frame):
+    """Apply the snapshot column types"""
+    frame = frame.reset_index(drop=True)
+    for column in SNAPSHOT_COLUMNS:
+        if column in CATEGORY_COLUMNS:
+            frame[column] = frame[column].astype("string").astype("category")
+        elif column in TIMESTAMP_COLUMNS:
+            # Client-supplied ISO strings; anything unparseable becomes NaT rather than failing the snapshot
+            frame[column] = pd.to_datetime(frame[column], errors="coerce", utc=True, format="ISO8601")
+        elif column in FLOAT_COLUMNS:
+            frame[column] = pd.to_numeric(frame[column], errors="coerce").astype("float64")
+        else:
+            frame[column] = frame[column].astype("string")
+    return frame
+
+
+def bucket_counts(column):
+    """{value: count} of a column, blanks and missing values counted as "Unknown" like the stats shards"""
+    counts = {}
+    # One entry per distinct value, not per row
+    for value, count in column.value_counts(dropna=False).items():
+        if not count:
+            continue
+        bucket = "Unknown" if pd.isna(value) or value == "" else str(value)
+        counts[bucket] = counts.get(bucket, 0) + int(count)
+    return counts
+
+
+def frame_stats(frame):
+    """The store stats() shape (count plus city, state and created_by buckets) computed from a snapshot"""
+    stats = {"count": int(len(frame))}
+    for field, stats_map in STATS_FIELDS.items():
+        stats[stats_map] = bucket_counts(frame[field])
+    return stats
+
+
+def frame_analytics(frame, top=10):
+    """Breakdowns for the admin analytics view"""
+    created = frame["created_at"].dropna()
+    per_month = created.dt.tz_convert(None).dt.to_period("M").value_counts().sort_index()
+    located = frame["latitude"].notna() & frame["longitude"].notna()
+    stats = frame_stats(frame)
+    return {
+        "total_count": stats["count"],
+        "city_counts": stats["cities"],
+        "state_counts": stats["states"],
+        "created_by_counts": stats["created_by"],
+        "top_cities": dict(sorted(stats["cities"].items(), key=lambda item: (-item[1], item[0]))[:top]),
+        "created_per_month": {str(month): int(count) for month, count in per_month.items()},
+        "with_coordinates": int(located.sum()),
+        "geocode_sources": bucket_counts(frame.loc[located, "geocode_source"]),
+    }
+
+
+class RestaurantSnapshot:
+    """A Parquet snapshot file and its last loaded DataFrame"""
+
+    def __init__(self, path):
+        self.path = path
+        self.frame = None
+        self.token = None
+        self.refreshed_at = None  # time.time() of the refresh that wrote the loaded file
+        self._loaded_mtime = None
+        self._lock = asyncio.Lock()
+
+    def load(self):
+        """The snapshot DataFrame, re-read only when the file changed; None if there is no snapshot yet"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            return None
+        if mtime != self._loaded_mtime:
+            table = pq.read_table(self.path)
+            metadata = table.schema.metadata or {}
+            token = metadata.get(TOKEN_METADATA_KEY)
+            refreshed_at = metadata.get(REFRESHED_AT_METADATA_KEY)
+            self.frame = table.to_pandas()
+            self.token = token.decode() if token else None
+            self.refreshed_at = float(refreshed_at) if refreshed_at else None
+            self._loaded_mtime = mtime
+        return self.frame
+
+    def age(self):
+        """Seconds since the loaded snapshot was refreshed; None before the first one"""
+        return None if self.refreshed_at is None else time.time() - self.refreshed_at
+
+    def _write(self, frame, token):
+        refreshed_at = time.time()
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        metadata[TOKEN_METADATA_KEY] = token.encode()
+        metadata[REFRESHED_AT_METADATA_KEY] = str(refreshed_at).encode()
+        table = table.replace_schema_metadata(metadata)
+
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        # A temp file of its own, so another worker's refresh can never rename a half-written file into place
+        descriptor, temporary = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.path)}.", suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as sink:
+                pq.write_table(table, sink, compression="zstd")
+            # mkstemp files are private to the owner; the snapshot is read by the admin app too
+            os.chmod(temporary, 0o644)
+            os.replace(temporary, self.path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+
+        self.frame, self.token, self.refreshed_at = frame, token, refreshed_at
+        self._loaded_mtime = os.stat(self.path).st_mtime_ns
+
+    async def refresh(self, store, max_age=None):
+        """Bring the snapshot up to date with ``store``, unless it is younger than ``max_age`` seconds.
+
+        Returns a summary: whether it was a full rebuild, the changes applied
+        and the rows in the snapshot.
+        """
+        async with self._lock:
+            await asyncio.to_thread(self.load)
+            if max_age is not None and self.frame is not None and (self.age() or 0) < max_age:
+                return {"full": False, "changes": 0, "rows": len(self.frame), "skipped": True}
+
+            full = self.frame is None or self.token is None
+            try:
+                latest, token = await self._read_changes(store, None if full else self.token)
+            except ChangeTokenExpired:
+                full = True
+                latest, token = await self._read_changes(store, None)
+
+            frame = await asyncio.to_thread(self._apply, None if full else self.frame, latest)
+            await asyncio.to_thread(self._write, frame, token)
+            return {"full": full, "changes": len(latest), "rows": len(frame), "skipped": False}
+
+    async def _read_changes(self, store, since):
+        # Last change per document wins; None marks a delete
+        latest = {}
+        while True:
+            changes, since, has_more = await store.changes(since=since, limit=REFRESH_PAGE_SIZE)
+            for change in changes:
+                latest[change["id"]] = change.get("restaurant") if change["type"] == "upsert" else None
+            if not has_more:
+                return latest, since
+
+    @staticmethod
+    def _apply(frame, latest):
+        upserts = to_frame(dict(restaurant, id=doc_id) for doc_id, restaurant in latest.items() if restaurant)
+        if frame is None:
+            return upserts
+        kept = frame[~frame["id"].isin(list(latest))]
+        combined = pd.concat([kept, upserts], ignore_index=True)
+        # Both sides are already typed; only categoricals with different categories need merging
+        for column in CATEGORY_COLUMNS:
+            combined[column] = combined[column].astype("string").astype("category")
+        return combined
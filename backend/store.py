@@ -0,0 +1,258 @@
+"""
+Storage-engine-neutral pieces of the restaurant data-access layer.
+
+The RestaurantStore protocol is the async API the routes use. It is
+implemented by firestore_store, mongo_store and memory_store. This module
+also holds what the engines share: cursor page and change tokens, the derived
+fields written with every restaurant, and the store errors. It imports no database
+client, so choosing an engine decides which client libraries get loaded.
+"""
+
+import asyncio
+import base64
+import json
+import threading
+from typing import Protocol
+
+from geo import encode_geohash
+from search import document_tokens
+
+SORT_FIELDS = ["created_at", "updated_at", "restaurant_name"]
+
+# Firestore caps a WriteBatch at 500 writes; one is reserved for the stats shard
+BULK_CHUNK_SIZE = 499
+
+# Restaurants per delete_many() call; each takes up to three writes (delete, tombstone, archive copy)
+# inside one Firestore transaction, plus one for the stats shard
+DELETE_CHUNK_SIZE = 150
+
+# Restaurant field -> stats map it is counted in
+STATS_FIELDS = {"city": "cities", "state": "states", "created_by": "created_by"}
+
+# Fields a restaurant document may have, i.e. what a projection can ask for
+RESTAURANT_FIELDS = (
+    "restaurant_name", "street_address", "city", "state", "zipcode", "primary_phone",
+    "website_url", "menu_url", "menu_comments", "gm_name", "gm_phone", "secondary_phone",
+    "third_phone", "doordash_url", "uber_eats_url", "grubhub_url", "notes", "restaurant_key",
+    "created_at", "updated_at", "created_by", "latitude", "longitude", "geohash", "geocode_source",
+)
+
+# Stored for querying only, never returned by the API
+INTERNAL_FIELDS = ("search_tokens", "changed_at", "idempotency_key")
+
+# Days a delete tombstone is kept; older change tokens need a full reload
+TOMBSTONE_RETENTION_DAYS = 30
+
+
+class InvalidPageToken(ValueError):
+    """Raised when a page_token is malformed or was issued for a different sort"""
+
+
+class DuplicateRestaurantKey(ValueError):
+    """Raised when a restaurant with the same restaurant_key already exists"""
+
+
+class ChangeTokenExpired(ValueError):
+    """Raised when a changes token is too old for the store to know every delete since"""
+
+
+def created_in_range(restaurant, created_from=None, created_before=None):
+    """Whether a restaurant's created_at is in [created_from, created_before), compared as ISO strings"""
+    created_at = restaurant.get('created_at')
+    if created_from is None and created_before is None:
+        return True
+    if not isinstance(created_at, str):
+        return False
+    return (created_from is None or created_at >= created_from) and (created_before is None or created_at < created_before)
+
+
+def is_valid_document_id(value):
+    """Whether ``value`` can be used as a Firestore document ID"""
+    return (
+        bool(value)
+        and "/" not in value
+        and value not in (".", "..")
+        and not (value.startswith("__") and value.endswith("__"))
+        and len(value.encode("utf-8")) <= 1500
+    )
+
+
+def encode_page_token(sort_by, order, last):
+    """Opaque cursor pointing just past ``last`` for the given sort"""
+    cursor = {"s": sort_by, "o": order, "v": last.get(sort_by) if sort_by else None, "id": last['id']}
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode().rstrip("=")
+
+
+def decode_page_token(token, sort_by, order):
+    """Inverse of encode_page_token; returns the Firestore start_after values"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if cursor["s"] != sort_by or cursor["o"] != order:
+            raise InvalidPageToken("page_token was issued for a different sort_by/order")
+        values = {"__name__": cursor["id"]}
+        if sort_by:
+            values[sort_by] = cursor["v"]
+        return values
+    except InvalidPageToken:
+        raise
+    except Exception:
+        raise InvalidPageToken("Malformed page_token")
+
+
+def encode_change_token(position):
+    """Opaque cursor for the changes feed; ``position`` is engine-specific and JSON-encodable"""
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode().rstrip("=")
+
+
+def decode_change_token(token):
+    """Inverse of encode_change_token"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        position = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if not isinstance(position, dict):
+            raise ValueError(position)
+        return position
+    except Exception:
+        raise InvalidPageToken("Malformed changes token")
+
+
+def encode_offset_token(query, offset):
+    """Opaque cursor for result lists that are ranked in memory, e.g. search"""
+    cursor = {"q": query, "offset": offset}
+    return base64.urlsafe_b64encode(json.dumps(cursor).encode()).decode().rstrip("=")
+
+
+def decode_offset_token(token, query):
+    """Inverse of encode_offset_token; returns the offset"""
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        cursor = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        if cursor["q"] != query:
+            raise InvalidPageToken("page_token was issued for a different query")
+        offset = int(cursor["offset"])
+        if offset < 0:
+            raise ValueError(offset)
+        return offset
+    except InvalidPageToken:
+        raise
+    except Exception:
+        raise InvalidPageToken("Malformed page_token")
+
+
+def project(restaurant, fields):
+    """``restaurant`` cut down to its id and ``fields``"""
+    projected = {field: restaurant[field] for field in fields if field in restaurant}
+    projected['id'] = restaurant['id']
+    return projected
+
+
+def with_derived_fields(data):
+    """Document as stored: ``data`` plus its search tokens and, if located, its geohash"""
+    derived = dict(data, search_tokens=document_tokens(data))
+    if data.get('latitude') is not None and data.get('longitude') is not None:
+        derived['geohash'] = encode_geohash(data['latitude'], data['longitude'])
+    return derived
+
+
+class RestaurantStore(Protocol):
+    """Async restaurant storage API the routes depend on"""
+
+    async def ensure_indexes(self): ...
+
+    async def ping(self): ...
+
+    # A create that hits an existing key succeeds with its ID when the existing
+    # document was created with the same ``idempotency_key``, i.e. it is a retry
+    async def add(self, data, idempotency_key=None): ...
+
+    async def bulk_add(self, documents): ...
+
+    # ``fields`` limits each restaurant to those fields plus its id; None returns every field
+    async def list_page(self, sort_by="created_at", order="desc", limit=50, page_token=None, fields=None): ...
+
+    # Async iterator over lists of restaurants covering the collection in document-ID order;
+    # ``parallelism`` is how many ranges an engine that splits the scan may read at once
+    def scan(self, fields=None, parallelism=None): ...
+
+    async def get_by_key(self, restaurant_key): ...
+
+    async def search(self, tokens, candidate_limit=1000): ...
+
+    async def geohash_candidates(self, ranges): ...
+
+    async def delete(self, restaurant_id): ...
+
+    # Deletes up to DELETE_CHUNK_SIZE restaurants at once, leaving tombstones and, with ``archive``,
+    # a copy in the {collection}_archive collection; returns the ones that existed
+    async def delete_many(self, restaurant_ids, archive=False): ...
+
+    # IDs of the restaurants matching every criterion given (see created_in_range())
+    async def matching_ids(self, created_by=None, created_from=None, created_before=None): ...
+
+    # Upserts and delete tombstones after the ``since`` token, oldest first: (changes, next token, has more)
+    async def changes(self, since=None, limit=500): ...
+
+    async def count(self): ...
+
+    async def stats(self): ...
+
+    # Opaque value that changes whenever the collection does, or None if the engine cannot tell cheaply
+    async def version(self): ...
+
+    async def reconcile_stats(self): ...
+
+    def close(self): ...
+
+
+class LazyRestaurantStore:
+    """Builds the real store on first use, so importing the app stays cheap.
+
+    ``factory`` runs once on a worker thread, because client libraries such
+    as firebase_admin spend most of their start-up time importing and
+    reading credentials. Attribute access is forwarded to the built store.
+    Its async methods become coroutines that build the store first if
+    needed.
+    """
+
+    def __init__(self, factory):
+        self._factory = factory
+        self._store = None
+        self._lock = threading.Lock()
+
+    @property
+    def built(self):
+        return self._store is not None
+
+    def get(self):
+        """The built store, building it on this thread if needed"""
+        if self._store is None:
+            with self._lock:
+                if self._store is None:
+                    self._store = self._factory()
+        return self._store
+
+    async def resolve(self):
+        if self._store is None:
+            await asyncio.get_running_loop().run_in_executor(None, self.get)
+        return self._store
+
+    def close(self):
+        if self._store is not None:
+            self._store.close()
+
+    async def scan(self, *args, **kwargs):
+        # An async generator cannot be forwarded as a coroutine like the other methods
+        store = await self.resolve()
+        async for restaurants in store.scan(*args, **kwargs):
+            yield restaurants
+
+    def __getattr__(self, name):
+        if self._store is not None:
+            return getattr(self._store, name)
+
+        async def call_when_built(*args, **kwargs):
+            store = await self.resolve()
+            return await getattr(store, name)(*args, **kwargs)
+
+        return call_when_built
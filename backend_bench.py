@@ -0,0 +1,628 @@
+#!/usr/bin/env python3
+"""
+Backend Performance Benchmarks for Firestore Restaurant Data Entry System
+Runs the backend data-access layer against the in-process fake Firestore client,
+so no network access or service-account credentials are needed.
+
+Usage: python backend_bench.py [benchmark_name ...]
+"""
+
+import asyncio
+import itertools
+import json
+import os
+import random
+import resource
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from datetime import datetime, timedelta
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent / 'backend'
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fake_firestore import FakeFirestore  # noqa: E402
+from firestore_store import FirestoreRestaurantStore  # noqa: E402
+from export import export_stream  # noqa: E402
+from geo import query_ranges, within_radius  # noqa: E402
+from memory_store import MemoryRestaurantStore  # noqa: E402
+from replica import RestaurantReplica  # noqa: E402
+from responses import FastJSONResponse  # noqa: E402
+from store import BULK_CHUNK_SIZE, project, with_derived_fields  # noqa: E402
+
+CITIES = [("Austin", "TX"), ("Dallas", "TX"), ("Denver", "CO"), ("Portland", "OR"), ("Boston", "MA")]
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def make_restaurant(i):
+    """Build a stored (snake_case) restaurant document"""
+    city, state = CITIES[i % len(CITIES)]
+    created = (datetime(2025, 1, 1) + timedelta(minutes=i)).isoformat()
+    return {
+        "restaurant_name": f"Bench Restaurant {i}",
+        "street_address": f"{i} Main Street",
+        "city": city,
+        "state": state,
+        "zipcode": f"{10000 + i % 90000}",
+        "primary_phone": f"555-{i % 1000:03d}-{i % 10000:04d}",
+        "website_url": f"https://bench{i}.example.com",
+        "notes": "Benchmark restaurant",
+        "restaurant_key": f"bench-restaurant-{i}",
+        "created_at": created,
+        "updated_at": created,
+        "created_by": "data-entry1",
+    }
+
+
+def seed(client, count, collection="restaurants"):
+    """Write ``count`` synthetic restaurants straight into the fake store"""
+    latency, client.latency = client.latency, 0.0
+    for i in range(count):
+        data = make_restaurant(i)
+        client.collection(collection).document(data['restaurant_key']).set(data)
+    client.latency = latency
+
+
+def peak_rss_mb():
+    """This process's peak RSS in MB"""
+    # ru_maxrss survives exec on Linux, so a child spawned by a bigger process reports the
+    # parent's peak; VmHWM belongs to the new address space
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024.0
+    except OSError:
+        pass
+    # ru_maxrss is in kilobytes on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024.0
+
+
+def export_rss_child(mode, rows):
+    """Runs in a subprocess: peak RSS growth (MB) of one export over a seeded fake store"""
+    client = FakeFirestore()
+    seed(client, rows)
+    store = FirestoreRestaurantStore(client)
+    baseline = peak_rss_mb()
+
+    async def streaming():
+        async for _ in export_stream(store.scan(), format="ndjson"):
+            pass
+
+    async def buffered():
+        # The pre-export way to get everything out: one list, one JSON body
+        restaurants, _ = await store.list_page(None, "asc", rows + 1)
+        json.dumps({"restaurants": restaurants, "count": len(restaurants)})
+
+    asyncio.run(streaming() if mode == "streaming" else buffered())
+    peak = peak_rss_mb()
+    store.close()
+    print(json.dumps({"rss_growth_mb": round(peak - baseline, 1)}))
+
+
+def timed(fn):
+    """Seconds one call of ``fn`` takes"""
+    started = time.perf_counter()
+    fn()
+    return time.perf_counter() - started
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def import_time_ms(module):
+    """Cumulative import time of ``module`` in a fresh interpreter, from -X importtime"""
+    stderr = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, check=True, capture_output=True, text=True,
+    ).stderr
+    imported = {}
+    for line in stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if cumulative.strip().isdigit():
+                imported[name.strip()] = int(cumulative) / 1000.0
+    return imported[module], imported
+
+
+def first_response_ms(path="/api/", timeout=30.0):
+    """Milliseconds from spawning uvicorn until ``path`` first answers 200"""
+    port = free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(f"http://127.0.0.1:{port}{path}", timeout=1) as response:
+                    if response.status == 200:
+                        return (time.perf_counter() - started) * 1000
+            except OSError:
+                time.sleep(0.005)
+        raise TimeoutError(f"No response from {path} within {timeout}s")
+    finally:
+        server.terminate()
+        server.wait()
+
+
+class BackendBenchmark:
+    def __init__(self):
+        self.results = {}
+        self.failures = []
+
+    def log_result(self, name, metrics):
+        """Record and print one benchmark result"""
+        self.results[name] = metrics
+        summary = ", ".join(f"{key}={value}" for key, value in metrics.items())
+        print(f"📊 {name}: {summary}")
+
+    def check_budget(self, name, value, budget):
+        """Fail the run when a measured value exceeds its budget"""
+        if value > budget:
+            self.failures.append(name)
+            print(f"❌ BUDGET EXCEEDED: {name} = {value} (budget {budget})")
+        else:
+            print(f"✅ Within budget: {name} = {value} (budget {budget})")
+
+    def bench_event_loop_blocking(self, requests_total=300, rate_per_sec=500, latency=0.005):
+        """Mixed read/write latency with blocking calls on the loop vs. the executor-backed store"""
+        print("\n=== Event Loop Blocking: mixed reads and writes ===")
+        print(f"   {requests_total} requests at {rate_per_sec} req/s, {latency * 1000:.0f}ms per Firestore call")
+
+        async def run_workload(blocking):
+            client = FakeFirestore(latency=latency)
+            seed(client, 200)
+            store = FirestoreRestaurantStore(client, max_concurrency=16)
+            rng = random.Random(42)
+            new_ids = itertools.count(1000)
+            latencies = []
+
+            async def one_request(arrival):
+                await asyncio.sleep(max(0.0, arrival - (time.perf_counter() - started)))
+                roll = rng.random()
+                if roll < 0.2:
+                    data = make_restaurant(next(new_ids))
+                    if blocking:
+                        store._add_sync(data)
+                    else:
+                        await store.add(data)
+                elif roll < 0.4:
+                    if blocking:
+                        store._list_page_sync("created_at", "desc", 50, None)
+                    else:
+                        await store.list_page("created_at", "desc", 50)
+                else:
+                    key = f"bench-restaurant-{rng.randint(0, 199)}"
+                    if blocking:
+                        store._get_by_key_sync(key)
+                    else:
+                        await store.get_by_key(key)
+                # Latency is measured from the request's scheduled arrival time
+                latencies.append(time.perf_counter() - started - arrival)
+
+            started = time.perf_counter()
+            interval = 1.0 / rate_per_sec
+            await asyncio.gather(*(one_request(i * interval) for i in range(requests_total)))
+            store.close()
+            return latencies
+
+        for label, blocking in (("before (blocking on loop)", True), ("after (thread pool store)", False)):
+            latencies = asyncio.run(run_workload(blocking))
+            self.log_result(f"event_loop_blocking {label}", {
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+                "requests": len(latencies),
+            })
+
+    def bench_bulk_import(self, rows_total=5000, latency=0.005):
+        """Rows/sec for one create per row vs. chunked WriteBatch bulk import"""
+        print("\n=== Bulk Import: per-row creates vs. batched writes ===")
+        print(f"   {rows_total} rows, {latency * 1000:.0f}ms per Firestore call")
+
+        async def per_row(store, documents):
+            # What a client looping over POST /api/restaurants costs the backend
+            for data in documents:
+                await store.add(data)
+
+        async def bulk(store, documents):
+            for start in range(0, len(documents), BULK_CHUNK_SIZE):
+                await store.bulk_add(documents[start:start + BULK_CHUNK_SIZE])
+
+        for label, workload, rows in (("per-row creates", per_row, rows_total // 10), ("bulk batches", bulk, rows_total)):
+            client = FakeFirestore(latency=latency)
+            store = FirestoreRestaurantStore(client, max_concurrency=16)
+            documents = [make_restaurant(i) for i in range(rows)]
+            started = time.perf_counter()
+            asyncio.run(workload(store, documents))
+            elapsed = time.perf_counter() - started
+            store.close()
+            self.log_result(f"bulk_import {label}", {
+                "rows": rows,
+                "seconds": round(elapsed, 3),
+                "rows_per_sec": round(rows / elapsed, 1),
+            })
+
+    def bench_export_memory(self, rows=(50000, 200000), budget_extra_mb=4.0):
+        """Peak RSS growth of the streaming export at two collection sizes, and of buffering the smaller one"""
+        print("\n=== Export Memory: streaming NDJSON vs. buffered JSON ===")
+        print(f"   {' and '.join(map(str, rows))} synthetic restaurants, each export measured in a fresh process")
+
+        def rss_growth(mode, count):
+            output = subprocess.run(
+                [sys.executable, __file__, "_export_rss", mode, str(count)],
+                check=True, capture_output=True, text=True,
+            ).stdout
+            growth = json.loads(output.strip().splitlines()[-1])["rss_growth_mb"]
+            self.log_result(f"export_memory {mode}", {"rows": count, "peak_rss_growth_mb": growth})
+            return growth
+
+        rss_growth("buffered", rows[0])
+        small, large = (rss_growth("streaming", count) for count in rows)
+
+        # Flat memory: the larger export may use only a few MB more, where a buffered one grows with the rows
+        self.check_budget(f"export_memory streaming extra_mb {rows[0]}->{rows[1]} rows",
+                          round(large - small, 1), budget_extra_mb)
+
+    def bench_scan_sharding(self, rows=5000, read_latency=0.0002, shard_workers=(1, 2, 4, 8, 16),
+                            budget_ratio=0.3):
+        """Wall time of a full-collection scan vs. how many document-ID ranges are read at once"""
+        print("\n=== Scan Sharding: full-collection scan vs. parallel ranges ===")
+        print(f"   {rows} restaurants, {read_latency * 1000:.1f}ms per document read, "
+              f"{read_latency * rows:.1f}s of reads for one sequential stream")
+
+        client = FakeFirestore(read_latency=read_latency)
+        seed(client, rows)
+        store = FirestoreRestaurantStore(client, max_concurrency=max(shard_workers))
+
+        async def scan(parallelism):
+            return sum([len(restaurants) async for restaurants in store.scan(parallelism=parallelism)])
+
+        wall = {}
+        for workers in shard_workers:
+            started = time.perf_counter()
+            scanned = asyncio.run(scan(workers))
+            wall[workers] = time.perf_counter() - started
+            if scanned != rows:
+                self.failures.append(f"scan_sharding parallelism={workers} scanned {scanned} of {rows}")
+            self.log_result(f"scan_sharding parallelism={workers}", {
+                "wall_ms": round(wall[workers] * 1000, 1),
+                "speedup": round(wall[shard_workers[0]] / wall[workers], 2),
+            })
+        store.close()
+
+        # The default FIRESTORE_SCAN_PARALLELISM should take well under a third of the sequential time
+        self.check_budget("scan_sharding parallelism=8 wall_vs_sequential",
+                          round(wall[8] / wall[shard_workers[0]], 3), budget_ratio)
+
+    def bench_nearby(self, rows=20000, queries=50, radius_km=5.0):
+        """Geohash range queries vs. a brute-force scan for restaurants within a radius"""
+        print("\n=== Nearby: geohash ranges vs. full scan ===")
+        print(f"   {rows} restaurants spread over ~200km x 200km, {queries} queries of {radius_km}km")
+        print("   The fake filters every query linearly; docs_read is what Firestore bills and indexes")
+
+        client = FakeFirestore()
+        rng = random.Random(7)
+        for i in range(rows):
+            data = make_restaurant(i)
+            data["latitude"] = 30.27 + rng.uniform(-0.9, 0.9)
+            data["longitude"] = -97.74 + rng.uniform(-1.0, 1.0)
+            client.collection("restaurants").document(data['restaurant_key']).set(with_derived_fields(data))
+        store = FirestoreRestaurantStore(client)
+        centers = [(30.27 + rng.uniform(-0.8, 0.8), -97.74 + rng.uniform(-0.9, 0.9)) for _ in range(queries)]
+
+        async def brute_force(lat, lng):
+            restaurants, _ = await store.list_page(None, "asc", rows + 1)
+            return within_radius(restaurants, lat, lng, radius_km), len(restaurants)
+
+        async def geohash(lat, lng):
+            candidates = await store.geohash_candidates(query_ranges(lat, lng, radius_km))
+            return within_radius(candidates, lat, lng, radius_km), len(candidates)
+
+        replica = RestaurantReplica(client.collection("restaurants"))
+        replica.start()
+
+        async def replica_scan(lat, lng):
+            restaurants, _ = replica.list_page(None, "asc", rows + 1)
+            return within_radius(restaurants, lat, lng, radius_km), len(restaurants)
+
+        async def replica_geohash(lat, lng):
+            candidates = replica.geohash_candidates(query_ranges(lat, lng, radius_km))
+            return within_radius(candidates, lat, lng, radius_km), len(candidates)
+
+        answers = {}
+        strategies = (
+            ("brute force scan", brute_force),
+            ("geohash ranges", geohash),
+            ("brute force scan (replica)", replica_scan),
+            ("geohash ranges (replica)", replica_geohash),
+        )
+        for label, strategy in strategies:
+            timings, reads, answers[label] = [], [], []
+            for lat, lng in centers:
+                started = time.perf_counter()
+                restaurants, read = asyncio.run(strategy(lat, lng))
+                timings.append(time.perf_counter() - started)
+                reads.append(read)
+                answers[label].append([restaurant['id'] for restaurant in restaurants])
+            self.log_result(f"nearby {label}", {
+                "p50_ms": round(percentile(timings, 50) * 1000, 2),
+                "p99_ms": round(percentile(timings, 99) * 1000, 2),
+                "docs_read_per_query": round(sum(reads) / len(reads), 1),
+                "avg_matches": round(sum(len(ids) for ids in answers[label]) / queries, 1),
+            })
+        replica.stop()
+        store.close()
+
+        if any(ids != answers["brute force scan"] for ids in answers.values()):
+            self.failures.append("nearby results differ from brute force")
+            print("❌ Geohash results differ from the brute-force scan")
+        else:
+            print("✅ Geohash results match the brute-force scan")
+
+    def bench_admin_loader(self, rows=1000, misses=20):
+        """Cache-miss latency of a Streamlit admin loader: event loop per call vs. a pooled sync client"""
+        print("\n=== Admin Loader: Streamlit cache-miss latency (needs MongoDB) ===")
+        mongo_url = os.environ.get('MONGO_URL')
+        if not mongo_url:
+            print("   Skipped: set MONGO_URL to a MongoDB server to run this benchmark")
+            return
+        from motor.motor_asyncio import AsyncIOMotorClient
+        from pymongo import MongoClient
+
+        print(f"   {rows} restaurants, {misses} cache misses of the View Restaurants loader")
+        database_name = "restaurant_admin_bench"
+        pooled = MongoClient(mongo_url, maxPoolSize=10, minPoolSize=1)
+        collection = pooled[database_name].restaurants
+        collection.drop()
+        collection.insert_many([dict(make_restaurant(i), _id=f"bench-restaurant-{i}") for i in range(rows)])
+
+        def per_call_loop():
+            # The old loader: a new event loop (and so new connections) on every miss
+            loop = asyncio.new_event_loop()
+            client = AsyncIOMotorClient(mongo_url)
+            try:
+                return loop.run_until_complete(client[database_name].restaurants.find().to_list(1000))
+            finally:
+                client.close()
+                loop.close()
+
+        def pooled_client():
+            return list(collection.find().limit(1000))
+
+        p50_ms = {}
+        try:
+            for label, load in (("event loop per call", per_call_loop), ("pooled sync client", pooled_client)):
+                load()
+                timings = [timed(load) for _ in range(misses)]
+                p50_ms[label] = round(percentile(timings, 50) * 1000, 2)
+                self.log_result(f"admin_loader {label}", {
+                    "p50_ms": p50_ms[label],
+                    "p99_ms": round(percentile(timings, 99) * 1000, 2),
+                })
+        finally:
+            pooled.drop_database(database_name)
+            pooled.close()
+
+        if p50_ms["pooled sync client"] > p50_ms["event loop per call"]:
+            self.failures.append("admin_loader pooled client slower than per-call loops")
+            print("❌ The pooled client was slower than opening a loop per call")
+
+    def bench_snapshot(self, rows=50000, changes=500, budget_refresh_ratio=0.35):
+        """Parquet analytics snapshot: vectorized vs. per-document stats, incremental vs. full refresh"""
+        import tempfile
+
+        from snapshot import RestaurantSnapshot, frame_stats
+        from store import STATS_FIELDS
+
+        print("\n=== Analytics Snapshot: vectorized stats and incremental refresh ===")
+        print(f"   {rows} restaurants, {changes} changed between refreshes")
+
+        async def run(path):
+            store = MemoryRestaurantStore()
+            for start in range(0, rows, BULK_CHUNK_SIZE):
+                await store.bulk_add([make_restaurant(i) for i in range(start, min(rows, start + BULK_CHUNK_SIZE))])
+            snapshot = RestaurantSnapshot(path)
+            started = time.perf_counter()
+            await snapshot.refresh(store)
+            full = time.perf_counter() - started
+
+            for i in range(changes):
+                if i % 2:
+                    await store.delete(f"bench-restaurant-{i}")
+                else:
+                    await store.add(make_restaurant(rows + i))
+            started = time.perf_counter()
+            summary = await snapshot.refresh(store)
+            incremental = time.perf_counter() - started
+            return snapshot, full, incremental, summary
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "restaurants.parquet")
+            snapshot, full, incremental, summary = asyncio.run(run(path))
+            size_kb = os.path.getsize(path) / 1024
+
+        documents = [make_restaurant(i) for i in range(rows)]
+
+        def per_document_stats():
+            stats = {"count": 0, **{stats_map: {} for stats_map in STATS_FIELDS.values()}}
+            for data in documents:
+                stats["count"] += 1
+                for field, stats_map in STATS_FIELDS.items():
+                    bucket = data.get(field) or "Unknown"
+                    stats[stats_map][bucket] = stats[stats_map].get(bucket, 0) + 1
+            return stats
+
+        loop_ms = min(timed(per_document_stats) for _ in range(3)) * 1000
+        vectorized_ms = min(timed(lambda: frame_stats(snapshot.frame)) for _ in range(3)) * 1000
+        self.log_result("snapshot refresh", {
+            "full_ms": round(full * 1000, 1),
+            "incremental_ms": round(incremental * 1000, 1),
+            "changes_applied": summary["changes"],
+            "file_kb": round(size_kb, 1),
+        })
+        self.log_result("snapshot stats", {
+            "per_document_loop_ms": round(loop_ms, 2),
+            "vectorized_ms": round(vectorized_ms, 2),
+        })
+        if summary["full"] or len(snapshot.frame) != rows:
+            self.failures.append("snapshot incremental refresh")
+            print(f"❌ Incremental refresh rebuilt the snapshot or lost rows: {summary}")
+        self.check_budget("snapshot incremental_vs_full_refresh", round(incremental / full, 3), budget_refresh_ratio)
+
+    def bench_store_engines(self, rows=5000, operations=3000, budget_p99_ms=1.0):
+        """Per-operation latency of the in-memory engine (the offline baseline) vs. the Firestore store"""
+        print("\n=== Store Engines: in-memory baseline vs. Firestore store (zero-latency fake) ===")
+        print(f"   {rows} restaurants, {operations} mixed operations (10% adds, 30% list pages, 60% key reads)")
+
+        async def workload(store):
+            for start in range(0, rows, BULK_CHUNK_SIZE):
+                await store.bulk_add([make_restaurant(i) for i in range(start, min(rows, start + BULK_CHUNK_SIZE))])
+            rng = random.Random(11)
+            new_ids = itertools.count(rows)
+            timings = []
+            for _ in range(operations):
+                roll = rng.random()
+                started = time.perf_counter()
+                if roll < 0.1:
+                    await store.add(make_restaurant(next(new_ids)))
+                elif roll < 0.4:
+                    await store.list_page(rng.choice(["created_at", "restaurant_name"]), "desc", 50)
+                else:
+                    await store.get_by_key(f"bench-restaurant-{rng.randrange(rows)}")
+                timings.append(time.perf_counter() - started)
+            store.close()
+            return timings
+
+        p99_ms = {}
+        for label, store in (("memory", MemoryRestaurantStore()), ("firestore", FirestoreRestaurantStore(FakeFirestore()))):
+            timings = asyncio.run(workload(store))
+            p99_ms[label] = round(percentile(timings, 99) * 1000, 3)
+            self.log_result(f"store_engines {label}", {
+                "p50_ms": round(percentile(timings, 50) * 1000, 3),
+                "p99_ms": p99_ms[label],
+                "ops_per_sec": round(len(timings) / sum(timings), 1),
+            })
+
+        self.check_budget("store_engines memory p99_ms", p99_ms["memory"], budget_p99_ms)
+
+    def bench_serialization(self, docs=1000, repeats=20, budget_ms=10.0):
+        """Time to render a list page: FastAPI's default encoder vs. orjson, with and without a projection"""
+        from fastapi.encoders import jsonable_encoder
+        from starlette.responses import JSONResponse
+
+        print("\n=== Serialization: rendering a list page of fully populated restaurants ===")
+        print(f"   {docs} documents, best of {repeats} renders, reported per 1k documents")
+
+        # The fields the mobile list view asks for (frontend/app/restaurant-list.tsx)
+        list_fields = (
+            "restaurant_name", "street_address", "city", "state", "zipcode", "primary_phone",
+            "website_url", "menu_url", "gm_name", "gm_phone", "notes", "restaurant_key",
+            "created_at", "updated_at", "created_by",
+        )
+        restaurants = []
+        for i in range(docs):
+            data = make_restaurant(i)
+            data.update({
+                "id": data["restaurant_key"],
+                "menu_url": f"https://bench{i}.example.com/menu",
+                "menu_comments": "Seasonal menu, updated monthly",
+                "gm_name": f"Manager {i}",
+                "gm_phone": f"555-{i % 1000:03d}-0000",
+                "secondary_phone": f"555-{i % 1000:03d}-0001",
+                "third_phone": f"555-{i % 1000:03d}-0002",
+                "doordash_url": f"https://doordash.example.com/store/{i}",
+                "uber_eats_url": f"https://ubereats.example.com/store/{i}",
+                "grubhub_url": f"https://grubhub.example.com/restaurant/{i}",
+                "latitude": 30.0 + i / 10000,
+                "longitude": -97.0 - i / 10000,
+            })
+            restaurants.append(data)
+        projected = [project(restaurant, list_fields) for restaurant in restaurants]
+
+        def page(items):
+            return {"restaurants": items, "count": len(items), "next_page_token": None}
+
+        renders = (
+            ("jsonable_encoder + json", lambda: JSONResponse(jsonable_encoder(page(restaurants))).body),
+            ("orjson", lambda: FastJSONResponse(page(restaurants)).body),
+            ("orjson + fields", lambda: FastJSONResponse(page(projected)).body),
+        )
+        timings = {}
+        for label, render in renders:
+            body = render()
+            best = min(timed(render) for _ in range(repeats))
+            timings[label] = round(best * 1000 * 1000 / docs, 3)
+            self.log_result(f"serialization {label}", {"ms_per_1k_docs": timings[label], "bytes_per_doc": len(body) // docs})
+
+        speedup = timings["jsonable_encoder + json"] / max(timings["orjson + fields"], 1e-9)
+        print(f"   orjson + fields renders {speedup:.1f}x faster than the default encoder")
+        self.check_budget("serialization orjson + fields ms_per_1k_docs", timings["orjson + fields"], budget_ms)
+
+    def bench_cold_start(self, runs=3, import_budget_ms=600.0, first_response_budget_ms=1000.0):
+        """Import time of the app and time until a fresh uvicorn answers /api/"""
+        print("\n=== Cold Start: import time and time to first /api/ response ===")
+        print(f"   Median of {runs} fresh processes with the default (Firestore) store")
+
+        import_times, response_times = [], []
+        for _ in range(runs):
+            server_ms, imported = import_time_ms("server")
+            import_times.append(server_ms)
+            response_times.append(first_response_ms())
+        # Database clients are imported when the store is first built, never by the app import
+        eager = sorted(name for name in imported if name.split(".")[0] in ("firebase_admin", "grpc", "motor"))
+
+        import_ms = round(sorted(import_times)[runs // 2], 1)
+        response_ms = round(sorted(response_times)[runs // 2], 1)
+        self.log_result("cold_start", {
+            "import_server_ms": import_ms,
+            "first_api_response_ms": response_ms,
+            "eager_client_imports": len(eager),
+        })
+        if eager:
+            self.failures.append("cold_start eager client imports")
+            print(f"❌ Database clients imported with the app: {', '.join(eager[:5])}")
+        self.check_budget("cold_start import_server_ms", import_ms, import_budget_ms)
+        self.check_budget("cold_start first_api_response_ms", response_ms, first_response_budget_ms)
+
+    def run(self, names=None):
+        """Run the selected benchmarks (all by default)"""
+        available = [name[len("bench_"):] for name in dir(self) if name.startswith("bench_")]
+        selected = names or available
+        for name in selected:
+            if name not in available:
+                print(f"❌ Unknown benchmark: {name} (available: {', '.join(available)})")
+                return False
+        print("🚀 Starting Backend Benchmarks (in-process fake Firestore)")
+        for name in selected:
+            getattr(self, f"bench_{name}")()
+        return not self.failures
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["_export_rss"]:
+        export_rss_child(sys.argv[2], int(sys.argv[3]))
+        sys.exit(0)
+
+    benchmark = BackendBenchmark()
+    ok = benchmark.run(sys.argv[1:])
+
+    with open('/tmp/backend_bench_results.json', 'w') as f:
+        json.dump(benchmark.results, f, indent=2)
+
+    sys.exit(0 if ok else 1)
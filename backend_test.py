@@ -3,13 +3,25 @@
 Backend API Testing for Firestore Restaurant Data Entry System
 Tests all API endpoints for restaurant CRUD operations, admin functionality, and health checks.
 No authentication required - system migrated from MongoDB to Firestore.
+
+Usage:
+    python backend_test.py                 # functional tests against BACKEND_URL
+    python backend_test.py load --local    # concurrent load test, see `load --help`
 """
 
 import requests
+import argparse
+import asyncio
+import itertools
 import json
+import random
+import socket
+import subprocess
 import sys
 import os
+import time
 from datetime import datetime
+from pathlib import Path
 import uuid
 
 # Get backend URL from frontend environment
@@ -387,7 +399,276 @@ class FirestoreBackendTester:
         print("\n" + "=" * 60)
         return failed_tests == 0
 
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * len(ordered))) - 1))
+    return ordered[index]
+
+# Default request mix for load tests (relative weights)
+DEFAULT_LOAD_MIX = {"create": 10, "list": 30, "get": 45, "stats": 10, "delete": 5}
+
+class LoadTester:
+    """Concurrent load test: a weighted mix of API calls at a target RPS or concurrency"""
+    
+    def __init__(self, base_url, mix=None, rps=None, concurrency=20, duration=30.0, seed_rows=1000,
+                 max_connections=100, timeout=10.0):
+        self.base_url = base_url
+        self.mix = mix or dict(DEFAULT_LOAD_MIX)
+        self.rps = rps
+        self.concurrency = concurrency
+        self.duration = duration
+        self.seed_rows = seed_rows
+        self.max_connections = max_connections
+        self.timeout = timeout
+        # Gets read keys that are never deleted and deletes take from their own pool,
+        # so a get cannot race a delete into a 404
+        self.read_keys = []
+        self.deletable_keys = []
+        self.samples = {operation: [] for operation in self.mix}  # operation -> [(latency_s, ok)]
+        self.skipped = {operation: 0 for operation in self.mix}
+        self.run_id = uuid.uuid4().hex[:8]
+        self.new_keys = itertools.count()
+        self.rng = random.Random(42)
+    
+    def restaurant(self):
+        i = next(self.new_keys)
+        now = datetime.utcnow().isoformat()
+        return {
+            "restaurantName": f"Load Test Restaurant {i}",
+            "streetAddress": f"{i} Load Street",
+            "city": self.rng.choice(["Austin", "Dallas", "Denver", "Portland", "Boston"]),
+            "state": "TX",
+            "zipcode": f"{10000 + i % 90000}",
+            "primaryPhone": f"555-{i % 1000:03d}-{i % 10000:04d}",
+            "restaurantKey": f"load-{self.run_id}-{i}",
+            "createdAt": now,
+            "updatedAt": now
+        }
+    
+    async def seed(self, client):
+        """Bulk-create restaurants so get and delete have keys to work with"""
+        rows = [self.restaurant() for _ in range(self.seed_rows)]
+        body = "\n".join(json.dumps(row) for row in rows)
+        response = await client.post("/restaurants/bulk", content=body,
+                                     headers={"Content-Type": "application/x-ndjson"})
+        response.raise_for_status()
+        keys = [row["restaurantKey"] for row in rows]
+        self.read_keys.extend(keys[::2])
+        self.deletable_keys.extend(keys[1::2])
+    
+    async def call(self, client, operation):
+        """Issue one request; returns whether it succeeded, or None if it could not run"""
+        if operation == "create":
+            data = self.restaurant()
+            response = await client.post("/restaurants", json=data)
+            if response.status_code == 200:
+                self.deletable_keys.append(data["restaurantKey"])
+        elif operation == "list":
+            response = await client.get("/restaurants", params={"limit": 50})
+        elif operation == "get":
+            if not self.read_keys:
+                return None
+            response = await client.get(f"/restaurants/{self.rng.choice(self.read_keys)}")
+        elif operation == "stats":
+            response = await client.get("/admin/restaurants", params={"include_restaurants": "false"})
+        elif operation == "delete":
+            if not self.deletable_keys:
+                return None
+            # Swap-remove so picking a random key stays O(1)
+            keys = self.deletable_keys
+            index = self.rng.randrange(len(keys))
+            keys[index], keys[-1] = keys[-1], keys[index]
+            response = await client.delete(f"/admin/restaurants/{keys.pop()}")
+        else:
+            raise ValueError(f"Unknown operation: {operation}")
+        return response.status_code < 400
+    
+    async def timed_call(self, client, operation, scheduled_at=None):
+        started = scheduled_at if scheduled_at is not None else time.perf_counter()
+        try:
+            ok = await self.call(client, operation)
+        except Exception:
+            ok = False
+        if ok is None:
+            self.skipped[operation] += 1
+            return
+        # In RPS mode latency counts from the scheduled send time, so a backed-up client still shows queueing
+        self.samples[operation].append((time.perf_counter() - started, ok))
+    
+    def pick(self):
+        return self.rng.choices(list(self.mix), weights=list(self.mix.values()))[0]
+    
+    async def run_concurrency(self, client):
+        deadline = time.perf_counter() + self.duration
+        
+        async def worker():
+            while time.perf_counter() < deadline:
+                await self.timed_call(client, self.pick())
+        
+        await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+    
+    async def run_rps(self, client):
+        interval = 1.0 / self.rps
+        started = time.perf_counter()
+        tasks = []
+        for i in range(int(self.duration * self.rps)):
+            scheduled_at = started + i * interval
+            await asyncio.sleep(max(0.0, scheduled_at - time.perf_counter()))
+            tasks.append(asyncio.create_task(self.timed_call(client, self.pick(), scheduled_at)))
+        await asyncio.gather(*tasks)
+    
+    async def run(self):
+        import httpx
+        
+        limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections)
+        async with httpx.AsyncClient(base_url=self.base_url, limits=limits, timeout=self.timeout) as client:
+            if self.seed_rows:
+                await self.seed(client)
+            started = time.perf_counter()
+            if self.rps:
+                await self.run_rps(client)
+            else:
+                await self.run_concurrency(client)
+            elapsed = time.perf_counter() - started
+        return self.report(elapsed)
+    
+    def report(self, elapsed):
+        def summarize(samples):
+            latencies = [latency for latency, _ in samples]
+            errors = sum(1 for _, ok in samples if not ok)
+            return {
+                "requests": len(samples),
+                "errors": errors,
+                "error_rate": round(errors / len(samples), 4) if samples else 0.0,
+                "throughput_rps": round(len(samples) / elapsed, 1),
+                "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+                "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+                "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+            }
+        
+        endpoints = {operation: summarize(samples) for operation, samples in self.samples.items()}
+        for operation, skipped in self.skipped.items():
+            endpoints[operation]["skipped"] = skipped
+        return {
+            "timestamp": datetime.utcnow().isoformat(),
+            "base_url": self.base_url,
+            "config": {
+                "mode": "rps" if self.rps else "concurrency",
+                "rps": self.rps,
+                "concurrency": None if self.rps else self.concurrency,
+                "duration_s": self.duration,
+                "mix": self.mix,
+                "seed_rows": self.seed_rows,
+                "max_connections": self.max_connections,
+            },
+            "elapsed_s": round(elapsed, 2),
+            "overall": summarize([sample for samples in self.samples.values() for sample in samples]),
+            "endpoints": endpoints
+        }
+
+def print_load_report(report, previous=None):
+    """Per-endpoint table, with deltas against a previous run's report if given"""
+    print("\n" + "=" * 60)
+    print(f"📊 LOAD TEST SUMMARY ({report['config']['mode']}, {report['elapsed_s']}s)")
+    print("=" * 60)
+    rows = list(report["endpoints"].items()) + [("overall", report["overall"])]
+    print(f"{'endpoint':<10} {'reqs':>7} {'rps':>8} {'err%':>6} {'p50ms':>8} {'p95ms':>8} {'p99ms':>8}")
+    for name, stats in rows:
+        print(f"{name:<10} {stats['requests']:>7} {stats['throughput_rps']:>8} {stats['error_rate'] * 100:>6.2f} "
+              f"{stats['p50_ms']:>8} {stats['p95_ms']:>8} {stats['p99_ms']:>8}")
+    if previous:
+        print(f"\nChange vs. {previous['timestamp']}:")
+        previous_rows = dict(previous["endpoints"], overall=previous["overall"])
+        for name, stats in rows:
+            before = previous_rows.get(name)
+            if not before or not before["requests"]:
+                continue
+            print(f"  {name:<10} rps {stats['throughput_rps'] - before['throughput_rps']:+.1f}, "
+                  f"p99 {stats['p99_ms'] - before['p99_ms']:+.2f}ms, "
+                  f"errors {(stats['error_rate'] - before['error_rate']) * 100:+.2f}%")
+
+def start_local_server(store="memory"):
+    """Launch uvicorn with the given store on a free port; returns (process, base_url)"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    env = dict(os.environ, RESTAURANT_STORE=store)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=Path(__file__).parent / "backend", env=env,
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    base_url = f"http://127.0.0.1:{port}/api"
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            if requests.get(f"{base_url}/", timeout=1).status_code == 200:
+                return process, base_url
+        except requests.RequestException:
+            time.sleep(0.05)
+    process.terminate()
+    raise RuntimeError("Local server did not start within 30s")
+
+def parse_mix(value):
+    """'create=10,list=30' -> {'create': 10.0, 'list': 30.0}"""
+    mix = {}
+    for part in value.split(","):
+        operation, _, weight = part.partition("=")
+        if operation not in DEFAULT_LOAD_MIX:
+            raise argparse.ArgumentTypeError(f"unknown operation '{operation}' (choose from {', '.join(DEFAULT_LOAD_MIX)})")
+        mix[operation] = float(weight or 1)
+    return mix
+
+def run_load_test(argv):
+    parser = argparse.ArgumentParser(prog="backend_test.py load", description=LoadTester.__doc__)
+    parser.add_argument("--url", default=BACKEND_URL, help="API base URL (default: %(default)s)")
+    parser.add_argument("--local", action="store_true", help="Start a local uvicorn server with the in-memory store")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--rps", type=float, help="Open-loop target requests per second")
+    target.add_argument("--concurrency", type=int, default=20, help="Closed-loop concurrent clients (default: 20)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run (default: 30)")
+    parser.add_argument("--mix", type=parse_mix, default=dict(DEFAULT_LOAD_MIX),
+                        help="Weights, e.g. create=10,list=30,get=45,stats=10,delete=5")
+    parser.add_argument("--seed-rows", type=int, default=1000, help="Restaurants bulk-created before the run")
+    parser.add_argument("--max-connections", type=int, default=100, help="HTTP connection pool size")
+    parser.add_argument("--output", default="/tmp/backend_load_results.json", help="Where to write the JSON report")
+    parser.add_argument("--compare", help="Previous JSON report to compare against")
+    args = parser.parse_args(argv)
+    
+    process = None
+    base_url = args.url
+    if args.local:
+        process, base_url = start_local_server()
+    try:
+        print(f"🚀 Load testing {base_url}")
+        tester = LoadTester(
+            base_url, mix=args.mix, rps=args.rps, concurrency=args.concurrency, duration=args.duration,
+            seed_rows=args.seed_rows, max_connections=args.max_connections,
+        )
+        report = asyncio.run(tester.run())
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    
+    previous = None
+    if args.compare:
+        with open(args.compare) as f:
+            previous = json.load(f)
+    print_load_report(report, previous)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Results saved to {args.output}")
+    return report["overall"]["error_rate"] == 0
+
 if __name__ == "__main__":
+    if sys.argv[1:2] == ["load"]:
+        sys.exit(0 if run_load_test(sys.argv[2:]) else 1)
+    
     tester = FirestoreBackendTester()
     success = tester.run_all_tests()
     
@@ -37,10 +37,16 @@ interface AdminStats {
   current_user: string;
 }
 
+// Restaurants fetched per page; the totals come from the server-computed stats
+const PAGE_SIZE = 50;
+const RESTAURANT_FIELDS = 'restaurant_name,city,state,created_by,restaurant_key,created_at';
+
 export default function AdminScreen() {
   const [restaurants, setRestaurants] = useState<Restaurant[]>([]);
   const [stats, setStats] = useState<AdminStats | null>(null);
   const [loading, setLoading] = useState(true);
+  const [nextPageToken, setNextPageToken] = useState<string | null>(null);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [deleting, setDeleting] = useState<string | null>(null);
 
   useEffect(() => {
@@ -51,33 +57,19 @@ export default function AdminScreen() {
     try {
       setLoading(true);
       
-      // Use the centralized API service for admin data
-      const data = await adminAPI.getStats();
-      
-      // Backend returns array directly, not wrapped in {restaurants: [...]}
-      const restaurantsArray = Array.isArray(data) ? data : (data.restaurants || []);
-      setRestaurants(restaurantsArray);
-      
-      // Generate basic stats from the data
-      const restaurants = restaurantsArray;
-      const cities = [...new Set(restaurants.map(r => r.city))];
-      const states = [...new Set(restaurants.map(r => r.state))]; 
-      const users = [...new Set(restaurants.map(r => r.created_by || 'data-entry1'))];
-      
-      setStats({
-        total_count: restaurants.length,
-        cities_covered: cities.length,
-        states_covered: states.length,
-        cities: cities,
-        states: states,
-        created_by_users: users,
-        current_user: 'data-entry1'
-      });
+      // Stats are counted by the server over the whole collection, not from the page shown here
+      const [statsData, page] = await Promise.all([
+        adminAPI.getStats(),
+        adminAPI.getRestaurants({ limit: PAGE_SIZE, fields: RESTAURANT_FIELDS }),
+      ]);
+      setStats(statsData.stats);
+      setRestaurants(page.restaurants || []);
+      setNextPageToken(page.next_page_token || null);
       
       console.log('📊 Admin data loaded via API service:', {
-        restaurants: restaurants.length,
-        cities: cities.length,
-        states: states.length
+        restaurants: statsData.stats.total_count,
+        cities: statsData.stats.cities_covered,
+        states: statsData.stats.states_covered
       });
     } catch (error) {
       console.error('Error fetching admin data:', error);
@@ -86,6 +78,24 @@ export default function AdminScreen() {
     }
   };
 
+  const loadMoreRestaurants = async () => {
+    if (!nextPageToken || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      const page = await adminAPI.getRestaurants({
+        limit: PAGE_SIZE,
+        fields: RESTAURANT_FIELDS,
+        page_token: nextPageToken,
+      });
+      setRestaurants(current => [...current, ...(page.restaurants || [])]);
+      setNextPageToken(page.next_page_token || null);
+    } catch (error) {
+      console.error('Error loading more restaurants:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const handleDeleteRestaurant = async (restaurantId: string, restaurantName: string) => {
     Alert.alert(
       'Delete Restaurant',
@@ -218,6 +228,22 @@ export default function AdminScreen() {
             </View>
           ))}
 
+          {nextPageToken && (
+            <TouchableOpacity
+              style={styles.loadMoreButton}
+              onPress={loadMoreRestaurants}
+              disabled={loadingMore}
+            >
+              {loadingMore ? (
+                <ActivityIndicator size="small" color="#007AFF" />
+              ) : (
+                <Text style={styles.loadMoreText}>
+                  Load more ({restaurants.length} of {stats ? stats.total_count : '?'})
+                </Text>
+              )}
+            </TouchableOpacity>
+          )}
+
           {restaurants.length === 0 && (
             <View style={styles.emptyState}>
               <Ionicons name="folder-open-outline" size={64} color="#666" />
@@ -415,6 +441,19 @@ const styles = StyleSheet.create({
   deletingButton: {
     opacity: 0.6,
   },
+  loadMoreButton: {
+    alignItems: 'center',
+    paddingVertical: 14,
+    borderRadius: 12,
+    borderColor: '#007AFF',
+    borderWidth: 1,
+    marginBottom: 12,
+  },
+  loadMoreText: {
+    color: '#007AFF',
+    fontSize: 14,
+    fontWeight: '600',
+  },
   emptyState: {
     alignItems: 'center',
     paddingVertical: 60,
@@ -1,10 +1,10 @@
-import React, { useState, useEffect } from 'react';
+import React, { useState, useEffect, useRef } from 'react';
 import {
   View,
   Text,
   StyleSheet,
   SafeAreaView,
-  ScrollView,
+  FlatList,
   ActivityIndicator,
   TouchableOpacity,
   TextInput,
@@ -13,30 +13,106 @@ import { Ionicons } from '@expo/vector-icons';
 import { router } from 'expo-router';
 import { restaurantAPI } from '../services/api';
 
+// Restaurants requested per page; the backend caps this server-side as well
+const PAGE_SIZE = 50;
+
+// Only what the cards below render; delivery URLs, extra phones and coordinates stay on the server
+const LIST_FIELDS = [
+  'restaurant_name', 'street_address', 'city', 'state', 'zipcode', 'primary_phone',
+  'website_url', 'menu_url', 'gm_name', 'gm_phone', 'notes', 'restaurant_key',
+  'created_at', 'updated_at', 'created_by',
+].join(',');
+
+// Wait for typing to pause before asking the backend to search
+const SEARCH_DEBOUNCE_MS = 300;
+const MIN_SEARCH_LENGTH = 2;
+
 export default function RestaurantList() {
   const [restaurants, setRestaurants] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [nextPageToken, setNextPageToken] = useState(null);
   const [sortBy, setSortBy] = useState('created_at');
   const [sortOrder, setSortOrder] = useState('desc');
   const [searchTerm, setSearchTerm] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
+  const [searchPageToken, setSearchPageToken] = useState(null);
+  const [searching, setSearching] = useState(false);
+  const latestSearch = useRef(0);
 
   useEffect(() => {
     fetchRestaurants();
   }, [sortBy, sortOrder]);
 
+  useEffect(() => {
+    const query = searchTerm.trim();
+    if (query.length < MIN_SEARCH_LENGTH) {
+      latestSearch.current += 1;
+      setSearchResults(null);
+      setSearchPageToken(null);
+      setSearching(false);
+      return;
+    }
+    const timer = setTimeout(() => searchRestaurants(query), SEARCH_DEBOUNCE_MS);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
+
+  const searchRestaurants = async (query) => {
+    // Responses can arrive out of order; only the newest search may update the list
+    const searchId = ++latestSearch.current;
+    try {
+      setSearching(true);
+      const data = await restaurantAPI.search({ q: query, limit: PAGE_SIZE });
+      if (searchId !== latestSearch.current) return;
+      setSearchResults(data.results || []);
+      setSearchPageToken(data.next_page_token || null);
+    } catch (error) {
+      console.error('Error searching restaurants:', error);
+      if (searchId === latestSearch.current) {
+        setSearchResults([]);
+        setSearchPageToken(null);
+      }
+    } finally {
+      if (searchId === latestSearch.current) setSearching(false);
+    }
+  };
+
+  const fetchMoreSearchResults = async () => {
+    if (!searchPageToken || loadingMore) return;
+    const searchId = latestSearch.current;
+    try {
+      setLoadingMore(true);
+      const data = await restaurantAPI.search({
+        q: searchTerm.trim(),
+        limit: PAGE_SIZE,
+        page_token: searchPageToken
+      });
+      if (searchId !== latestSearch.current) return;
+      setSearchResults(current => [...(current || []), ...(data.results || [])]);
+      setSearchPageToken(data.next_page_token || null);
+    } catch (error) {
+      console.error('Error fetching more search results:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const fetchRestaurants = async () => {
     try {
       setLoading(true);
       
-      // Use the centralized API service - but backend returns array directly
+      // Use the centralized API service - only the first page is loaded here
       const data = await restaurantAPI.getAll({
         sort_by: sortBy,
-        order: sortOrder
+        order: sortOrder,
+        limit: PAGE_SIZE,
+        fields: LIST_FIELDS
       });
       
       // Backend returns array directly, not wrapped in {restaurants: [...]}
       const restaurantsArray = Array.isArray(data) ? data : (data.restaurants || []);
       setRestaurants(restaurantsArray);
+      setNextPageToken(Array.isArray(data) ? null : (data.next_page_token || null));
       console.log(`📋 Loaded ${restaurantsArray.length} restaurants from API service, sorted by ${sortBy} ${sortOrder}`);
     } catch (error) {
       console.error('Error fetching restaurants:', error);
@@ -47,6 +123,7 @@ export default function RestaurantList() {
         const fallbackData = await fallbackResponse.json();
         const restaurantsArray = Array.isArray(fallbackData) ? fallbackData : [];
         setRestaurants(restaurantsArray);
+        setNextPageToken(null);
         console.log(`📋 Fallback loaded ${restaurantsArray.length} restaurants`);
       } catch (fallbackError) {
         console.error('Fallback also failed:', fallbackError);
@@ -56,6 +133,29 @@ export default function RestaurantList() {
     }
   };
 
+  const fetchMoreRestaurants = async () => {
+    if (!nextPageToken || loadingMore) return;
+    try {
+      setLoadingMore(true);
+      
+      // Continue from the cursor returned with the previous page
+      const data = await restaurantAPI.getAll({
+        sort_by: sortBy,
+        order: sortOrder,
+        limit: PAGE_SIZE,
+        page_token: nextPageToken,
+        fields: LIST_FIELDS
+      });
+      
+      setRestaurants(current => [...current, ...(data.restaurants || [])]);
+      setNextPageToken(data.next_page_token || null);
+    } catch (error) {
+      console.error('Error fetching more restaurants:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const toggleSort = (field) => {
     if (sortBy === field) {
       setSortOrder(sortOrder === 'desc' ? 'asc' : 'desc');
@@ -65,17 +165,9 @@ export default function RestaurantList() {
     }
   };
 
-  const filteredRestaurants = restaurants.filter(restaurant => {
-    if (!searchTerm) return true;
-    
-    const term = searchTerm.toLowerCase();
-    return (
-      restaurant.restaurant_name?.toLowerCase().includes(term) ||
-      restaurant.city?.toLowerCase().includes(term) ||
-      restaurant.state?.toLowerCase().includes(term) ||
-      restaurant.gm_name?.toLowerCase().includes(term)
-    );
-  });
+  // Search results come ranked from the backend; otherwise show the sorted list
+  const isSearching = searchResults !== null;
+  const displayedRestaurants = isSearching ? searchResults : restaurants;
 
   if (loading) {
     return (
@@ -99,7 +191,7 @@ export default function RestaurantList() {
         </TouchableOpacity>
         <View style={styles.headerContent}>
           <Text style={styles.title}>Restaurant Database</Text>
-          <Text style={styles.subtitle}>({filteredRestaurants.length} restaurants)</Text>
+          <Text style={styles.subtitle}>({displayedRestaurants.length} restaurants)</Text>
         </View>
       </View>
 
@@ -108,7 +200,7 @@ export default function RestaurantList() {
         <Ionicons name="search" size={20} color="#666" style={styles.searchIcon} />
         <TextInput
           style={styles.searchInput}
-          placeholder="Search restaurants, cities, or managers..."
+          placeholder="Search name, city, zipcode or phone..."
           placeholderTextColor="#666"
           value={searchTerm}
           onChangeText={setSearchTerm}
@@ -136,9 +228,15 @@ export default function RestaurantList() {
         </TouchableOpacity>
       </View>
 
-      <ScrollView style={styles.scrollView}>
-        {filteredRestaurants.map((restaurant, index) => (
-          <View key={restaurant.id || index} style={styles.restaurantCard}>
+      <FlatList
+        style={styles.scrollView}
+        data={displayedRestaurants}
+        keyExtractor={(restaurant, index) => restaurant.id || String(index)}
+        onEndReached={isSearching ? fetchMoreSearchResults : fetchMoreRestaurants}
+        onEndReachedThreshold={0.5}
+        ListFooterComponent={loadingMore || searching ? <ActivityIndicator style={styles.loadingMore} color="#007AFF" /> : null}
+        renderItem={({ item: restaurant }) => (
+          <View style={styles.restaurantCard}>
             <View style={styles.restaurantHeader}>
               <Ionicons name="restaurant" size={24} color="#007AFF" />
               <View style={styles.restaurantTitleContainer}>
@@ -210,20 +308,19 @@ export default function RestaurantList() {
               </Text>
             </View>
           </View>
-        ))}
-
-        {filteredRestaurants.length === 0 && !loading && (
+        )}
+        ListEmptyComponent={
           <View style={styles.emptyState}>
             <Ionicons name="restaurant-outline" size={64} color="#666" />
             <Text style={styles.emptyText}>
-              {searchTerm ? 'No restaurants found matching your search' : 'No restaurants found'}
+              {isSearching ? 'No restaurants found matching your search' : 'No restaurants found'}
             </Text>
             <Text style={styles.emptySubtext}>
-              {searchTerm ? 'Try a different search term' : 'Add some restaurants to see them here'}
+              {isSearching ? 'Try a different search term' : 'Add some restaurants to see them here'}
             </Text>
           </View>
-        )}
-      </ScrollView>
+        }
+      />
 
       <TouchableOpacity 
         style={styles.addButton}
@@ -327,6 +424,9 @@ const styles = StyleSheet.create({
     flex: 1,
     paddingHorizontal: 20,
   },
+  loadingMore: {
+    paddingVertical: 16,
+  },
   restaurantCard: {
     backgroundColor: '#1C1C1C',
     borderRadius: 12,
@@ -9,30 +9,60 @@ const BASE_URL = 'https://us-central1-mongoose1-app.cloudfunctions.net';
 // API endpoints
 const ENDPOINTS = {
   RESTAURANTS: '/api/restaurants/holding',
+  SEARCH: '/api/restaurants/search',
+  CHANGES: '/api/restaurants/changes',
+  ADMIN_RESTAURANTS: '/api/admin/restaurants',
+  ADMIN_DELETE_BATCH: '/api/admin/restaurants/delete-batch',
+  ADMIN_JOBS: '/api/admin/jobs',
 };
 
+// Last ETag and body per GET URL, so refetching unchanged data costs a bodyless 304
+const etagCache = new Map();
+const ETAG_CACHE_MAX_ENTRIES = 50;
+
+function rememberEtag(url, etag, data) {
+  // Re-inserting keeps the Map in least-recently-stored order
+  etagCache.delete(url);
+  etagCache.set(url, { etag, data });
+  if (etagCache.size > ETAG_CACHE_MAX_ENTRIES) {
+    etagCache.delete(etagCache.keys().next().value);
+  }
+}
+
 /**
  * Generic fetch wrapper with error handling
  */
 async function apiCall(endpoint, options = {}) {
   try {
     const url = `${BASE_URL}${endpoint}`;
-    console.log(`🌐 API Call: ${options.method || 'GET'} ${url}`);
+    const method = options.method || 'GET';
+    console.log(`🌐 API Call: ${method} ${url}`);
     
+    const cached = method === 'GET' ? etagCache.get(url) : undefined;
     const response = await fetch(url, {
+      ...options,
       headers: {
         'Content-Type': 'application/json',
+        ...(cached ? { 'If-None-Match': cached.etag } : {}),
         ...options.headers,
       },
-      ...options,
     });
 
+    if (response.status === 304 && cached) {
+      console.log(`✅ API Not Modified: ${method} ${endpoint}`);
+      return cached.data;
+    }
+
     if (!response.ok) {
       throw new Error(`HTTP ${response.status}: ${response.statusText}`);
     }
 
     const data = await response.json();
-    console.log(`✅ API Success: ${options.method || 'GET'} ${endpoint}`, data);
+    const etag = response.headers.get('ETag');
+    if (method === 'GET' && etag) {
+      rememberEtag(url, etag, data);
+    }
+    console.log(`✅ API Success: ${method} ${endpoint}`, data);
     return data;
   } catch (error) {
     console.error(`❌ API Error: ${options.method || 'GET'} ${endpoint}`, error);
@@ -46,12 +76,15 @@ async function apiCall(endpoint, options = {}) {
 export const restaurantAPI = {
   /**
    * Create a new restaurant
+   * Resending the same restaurantData (same restaurantKey) is safe: the backend
+   * returns the first attempt's result instead of creating a duplicate.
    * @param {Object} restaurantData - Restaurant data to save
    * @returns {Promise<Object>} API response
    */
   async create(restaurantData) {
     return apiCall(ENDPOINTS.RESTAURANTS, {
       method: 'POST',
+      headers: { 'Idempotency-Key': restaurantData.restaurantKey },
       body: JSON.stringify(restaurantData),
     });
   },
@@ -61,7 +94,10 @@ export const restaurantAPI = {
    * @param {Object} params - Query parameters
    * @param {string} params.sort_by - Field to sort by (created_at, restaurant_name)
    * @param {string} params.order - Sort order (asc, desc)
-   * @returns {Promise<Object>} API response with restaurants array
+   * @param {number} params.limit - Page size (capped by the backend)
+   * @param {string} params.page_token - Cursor from a previous response's next_page_token
+   * @param {string} params.fields - Comma-separated fields to return (id is always included)
+   * @returns {Promise<Object>} API response with restaurants array and next_page_token
    */
   async getAll(params = {}) {
     const queryString = new URLSearchParams(params).toString();
@@ -69,6 +105,32 @@ export const restaurantAPI = {
     return apiCall(endpoint);
   },
 
+  /**
+   * Search restaurants by name, city, zipcode or phone, best matches first
+   * @param {Object} params - Query parameters
+   * @param {string} params.q - Search text
+   * @param {number} params.limit - Page size (at most 100)
+   * @param {string} params.page_token - Cursor from a previous response's next_page_token
+   * @returns {Promise<Object>} API response with results array and next_page_token
+   */
+  async search(params) {
+    const queryString = new URLSearchParams(params).toString();
+    return apiCall(`${ENDPOINTS.SEARCH}?${queryString}`);
+  },
+
+  /**
+   * Get restaurants created, updated or deleted since a previous sync, oldest first
+   * @param {Object} params - Query parameters
+   * @param {string} params.since - next_token from the previous call; omit for a first full sync
+   * @param {number} params.limit - Page size (at most 1000)
+   * @returns {Promise<Object>} API response with changes array (type 'upsert' or 'delete'),
+   *   next_token and has_more; HTTP 410 means the token expired and a full reload is needed
+   */
+  async changes(params = {}) {
+    const queryString = new URLSearchParams(params).toString();
+    return apiCall(queryString ? `${ENDPOINTS.CHANGES}?${queryString}` : ENDPOINTS.CHANGES);
+  },
+
   /**
    * Get restaurant by ID (for future use)
    * @param {string} id - Restaurant ID
@@ -108,13 +170,49 @@ export const restaurantAPI = {
  */
 export const adminAPI = {
   /**
-   * Get admin stats and restaurant data
-   * @returns {Promise<Object>} Admin data with stats
+   * Get the server-computed restaurant statistics, without any restaurants
+   * @returns {Promise<Object>} API response with stats (total_count, cities, states, created_by_users
+   *   and their *_counts)
    */
   async getStats() {
-    // For now, just use the same endpoint
-    // You can add admin-specific endpoints to your backend later
-    return restaurantAPI.getAll();
+    return apiCall(`${ENDPOINTS.ADMIN_RESTAURANTS}?include_restaurants=false`);
+  },
+
+  /**
+   * Get one page of restaurants for the admin dashboard
+   * @param {Object} params - Query parameters
+   * @param {number} params.limit - Page size (capped by the backend)
+   * @param {string} params.page_token - Cursor from a previous response's next_page_token
+   * @returns {Promise<Object>} API response with restaurants array and next_page_token
+   */
+  async getRestaurants(params = {}) {
+    const queryString = new URLSearchParams(params).toString();
+    return apiCall(queryString ? `${ENDPOINTS.ADMIN_RESTAURANTS}?${queryString}` : ENDPOINTS.ADMIN_RESTAURANTS);
+  },
+
+  /**
+   * Start deleting many restaurants in the background
+   * @param {Object} request - Either ids or filter
+   * @param {string[]} request.ids - Restaurant IDs
+   * @param {Object} request.filter - created_by, created_from and/or created_before (ISO timestamps)
+   * @param {boolean} request.archive - Copy each restaurant to restaurants_archive before deleting it
+   * @returns {Promise<Object>} API response with the job and its status_url
+   */
+  async deleteBatch(request) {
+    return apiCall(ENDPOINTS.ADMIN_DELETE_BATCH, {
+      method: 'POST',
+      body: JSON.stringify(request),
+    });
+  },
+
+  /**
+   * Get the status and progress of a background admin job
+   * @param {string} jobId - Job ID from deleteBatch()
+   * @returns {Promise<Object>} Job with status (running, succeeded, failed or cancelled),
+   *   matched, processed, deleted and archived counts
+   */
+  async getJob(jobId) {
+    return apiCall(`${ENDPOINTS.ADMIN_JOBS}/${jobId}`);
   },
 };
 
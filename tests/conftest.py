@@ -0,0 +1,15 @@
+"""
+Shared pytest setup.
+
+The backend modules import each other as top-level modules (server.py is run
+from backend/), so that directory goes on sys.path. server.py reads its
+configuration when imported; the tests use the process-local memory store.
+"""
+
+import os
+import sys
+
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "backend")
+sys.path.insert(0, BACKEND_DIR)
+
+os.environ.setdefault("RESTAURANT_STORE", "memory")
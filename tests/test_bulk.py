@@ -0,0 +1,222 @@
+"""POST /api/restaurants/bulk and the Firestore store's chunked bulk_add, on the in-process fake"""
+
+import asyncio
+import csv
+import io
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+from google.api_core import exceptions as google_exceptions
+
+import firestore_store
+import server
+from fake_firestore import MAX_BATCH_WRITES, FakeFirestore, FakeWriteBatch
+from firestore_store import FirestoreRestaurantStore
+from store import BULK_CHUNK_SIZE
+
+BULK_URL = "/api/restaurants/bulk"
+
+
+@pytest.fixture
+def store():
+    store = FirestoreRestaurantStore(FakeFirestore())
+    yield store
+    store.close()
+
+
+@pytest.fixture
+def client(store, monkeypatch):
+    monkeypatch.setattr(server, "store", store)
+    with TestClient(server.app) as client:
+        yield client
+
+
+@pytest.fixture
+def commits(monkeypatch):
+    """Number of writes in each batch commit, and a list of errors the next commits raise"""
+    sizes, failures = [], []
+    commit = FakeWriteBatch.commit
+
+    def recording_commit(batch):
+        if failures:
+            raise failures.pop(0)
+        sizes.append(len(batch._writes))
+        return commit(batch)
+
+    monkeypatch.setattr(FakeWriteBatch, "commit", recording_commit)
+    return sizes, failures
+
+
+@pytest.fixture
+def delays(monkeypatch):
+    """Backoff sleeps taken between bulk commit attempts"""
+    delays = []
+    monkeypatch.setattr(firestore_store.time, "sleep", delays.append)
+    return delays
+
+
+def row(key, **overrides):
+    return {
+        "restaurantName": f"Restaurant {key}",
+        "streetAddress": "1 Main St",
+        "city": "Austin",
+        "state": "TX",
+        "zipcode": "78701",
+        "primaryPhone": "5125550100",
+        "restaurantKey": key,
+        "createdAt": "2024-01-05T12:00:00.000Z",
+        "updatedAt": "2024-01-05T12:00:00.000Z",
+        **overrides,
+    }
+
+
+def document(key):
+    return server.restaurant_to_document(server.RestaurantCreate.model_validate(row(key)))
+
+
+def as_csv(rows):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=sorted({name for row in rows for name in row}))
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def upload(client, rows, content_type):
+    if content_type == "application/json":
+        body = json.dumps(rows)
+    elif content_type == "application/x-ndjson":
+        body = "".join(json.dumps(row) + "\n" for row in rows)
+    else:
+        body = as_csv(rows)
+    response = client.post(BULK_URL, content=body.encode(), headers={"Content-Type": content_type})
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+@pytest.mark.parametrize("content_type", ["application/json", "application/x-ndjson", "text/csv"])
+def test_each_content_type_creates_and_reports_every_row(client, store, content_type):
+    asyncio.run(store.add(document("k-existing")))
+    rows = [
+        row("k1", notes="multi-line,\n\"quoted\" note"),
+        row("k2"),
+        {key: value for key, value in row("k-no-name").items() if key != "restaurantName"},
+        row("k1"),
+        row("k-existing"),
+        row("bad/key"),
+        row("k3", latitude="30.27"),
+    ]
+
+    body = upload(client, rows, content_type)
+
+    assert [result["status"] for result in body["results"]] == [
+        "created", "created", "invalid", "duplicate", "duplicate", "invalid", "invalid",
+    ]
+    assert [result["row"] for result in body["results"]] == list(range(1, 8))
+    assert (body["total_rows"], body["created"], body["duplicates"], body["invalid"], body["failed"]) == (7, 2, 2, 3, 0)
+    assert body["success"] is False
+    results = body["results"]
+    assert results[0]["id"] == "k1"
+    assert results[2]["errors"] == ["restaurantName: Field required"]
+    assert results[3]["errors"] == ["restaurantKey repeated earlier in this upload"]
+    assert results[4]["errors"] == ["restaurantKey already exists"]
+    assert "restaurantKey" in results[5]["errors"][0]
+    assert "latitude and longitude" in results[6]["errors"][0]
+
+    stored = asyncio.run(store.get_by_key("k1"))
+    assert stored["notes"] == "multi-line,\n\"quoted\" note"
+    assert asyncio.run(store.stats())["count"] == 3
+
+
+def test_ndjson_reports_unparseable_lines_and_skips_blank_ones(client):
+    body = "\n".join([json.dumps(row("k1")), "", "{not json", json.dumps(row("k2"))]).encode()
+
+    results = client.post(BULK_URL, content=body, headers={"Content-Type": "application/x-ndjson"}).json()["results"]
+
+    assert [result["status"] for result in results] == ["created", "invalid", "created"]
+    assert results[1]["errors"][0].startswith("Invalid JSON")
+
+
+def test_csv_reports_an_unterminated_quote(client):
+    body = as_csv([row("k1")]) + 'Open "quote,1 Main St\n'
+
+    results = client.post(BULK_URL, content=body.encode(), headers={"Content-Type": "text/csv"}).json()["results"]
+
+    assert [result["status"] for result in results] == ["created", "invalid"]
+    assert results[1]["errors"] == ["Unterminated quoted field at end of CSV"]
+
+
+@pytest.mark.parametrize("body, content_type, status_code", [
+    (b"{not json", "application/json", 400),
+    (b'{"restaurantKey": "k1"}', "application/json", 400),
+    (b"<restaurants/>", "application/xml", 415),
+])
+def test_unreadable_uploads_are_rejected(client, body, content_type, status_code):
+    assert client.post(BULK_URL, content=body, headers={"Content-Type": content_type}).status_code == status_code
+
+
+def test_upload_is_written_in_chunks_that_fit_one_batch(client, store, commits):
+    sizes, _ = commits
+    count = 2 * BULK_CHUNK_SIZE + 1
+
+    body = upload(client, [row(f"k{i:04d}") for i in range(count)], "application/x-ndjson")
+
+    assert body["created"] == count
+    # Each chunk is its documents plus one stats shard update, never over the batch limit
+    assert sizes == [BULK_CHUNK_SIZE + 1, BULK_CHUNK_SIZE + 1, 2]
+    assert BULK_CHUNK_SIZE + 1 == MAX_BATCH_WRITES
+    assert asyncio.run(store.stats())["count"] == count
+
+
+def test_transient_commit_failure_is_retried_with_backoff(store, commits, delays):
+    sizes, failures = commits
+    failures.extend([google_exceptions.ServiceUnavailable("unavailable"), google_exceptions.Aborted("contention")])
+
+    results = asyncio.run(store.bulk_add([document("k1"), document("k2")]))
+
+    assert results == {"k1": "created", "k2": "created"}
+    assert sizes == [3]
+    assert len(delays) == 2
+    assert 0.1 <= delays[0] <= 0.3 and 0.2 <= delays[1] <= 0.6
+    assert asyncio.run(store.stats())["count"] == 2
+
+
+def test_persistent_commit_failure_is_raised_after_the_last_attempt(store, commits, delays):
+    _, failures = commits
+    failures.extend(google_exceptions.DeadlineExceeded("slow") for _ in range(5))
+
+    with pytest.raises(google_exceptions.DeadlineExceeded):
+        asyncio.run(store.bulk_add([document("k1")]))
+
+    assert len(delays) == 4
+    assert asyncio.run(store.get_by_key("k1")) is None
+
+
+def test_failed_chunk_is_reported_per_row(client, commits, delays):
+    _, failures = commits
+    failures.extend(google_exceptions.ServiceUnavailable("down") for _ in range(5))
+
+    body = upload(client, [row("k1"), row("k2")], "application/json")
+
+    assert (body["success"], body["failed"], body["created"]) == (False, 2, 0)
+    assert all(result["status"] == "failed" and "down" in result["errors"][0] for result in body["results"])
+
+
+def test_key_taken_between_check_and_commit_becomes_a_duplicate(store, monkeypatch, delays):
+    commit = FakeWriteBatch.commit
+    raced = []
+
+    def racing_commit(batch):
+        if not raced:
+            # Another writer creates k2 after the existence check, so this create() conflicts
+            raced.append(True)
+            store.client.collection(store.collection_name).document("k2").set(document("k2"))
+        return commit(batch)
+
+    monkeypatch.setattr(FakeWriteBatch, "commit", racing_commit)
+
+    results = asyncio.run(store.bulk_add([document("k1"), document("k2")]))
+
+    assert results == {"k1": "created", "k2": "duplicate"}
+    assert delays == []
@@ -0,0 +1,212 @@
+"""TTLCache bounds, expiry and generation guard, and the server's cached read paths"""
+
+import asyncio
+
+import pytest
+
+import cache
+import server
+from cache import TTLCache, estimate_size
+from memory_store import MemoryRestaurantStore
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(cache.time, "monotonic", clock)
+    return clock
+
+
+def value(size):
+    """A cached value whose estimated size is exactly ``size`` bytes"""
+    text = "x" * (size - 2)
+    assert estimate_size(text) == size
+    return text
+
+
+def test_least_recently_used_entry_is_evicted_under_the_byte_bound(clock):
+    entries = TTLCache(max_entries=100, max_bytes=300)
+    for key in "abc":
+        entries.set(key, value(100))
+    # Reading "a" makes "b" the least recently used
+    assert entries.get("a") is not None
+
+    entries.set("d", value(100))
+
+    assert entries.get("b") is None
+    assert all(entries.get(key) is not None for key in "acd")
+    assert entries.stats()["bytes"] == 300
+    assert entries.evictions == 1
+
+
+def test_one_large_entry_evicts_as_many_as_needed(clock):
+    entries = TTLCache(max_entries=100, max_bytes=300)
+    for key in "abc":
+        entries.set(key, value(100))
+
+    entries.set("big", value(250))
+
+    assert [key for key in "abc" if entries.get(key) is not None] == []
+    assert entries.stats()["bytes"] == 250
+    assert entries.evictions == 3
+
+
+def test_entry_larger_than_the_bound_is_not_cached(clock):
+    entries = TTLCache(max_bytes=300)
+    entries.set("a", value(100))
+
+    entries.set("huge", value(301))
+
+    assert entries.get("huge") is None
+    assert entries.get("a") is not None
+    assert entries.evictions == 0
+
+
+def test_replacing_an_entry_counts_its_bytes_once(clock):
+    entries = TTLCache(max_bytes=300)
+    entries.set("a", value(200))
+
+    entries.set("a", value(150))
+
+    assert entries.stats()["bytes"] == 150
+    assert entries.stats()["entries"] == 1
+
+
+def test_entry_count_bound(clock):
+    entries = TTLCache(max_entries=2)
+    for key in "abc":
+        entries.set(key, key)
+
+    assert entries.get("a") is None
+    assert entries.stats()["entries"] == 2
+
+
+def test_entries_expire_after_the_ttl(clock):
+    entries = TTLCache(ttl_seconds=30)
+    entries.set("a", value(100))
+
+    clock.now += 30
+    assert entries.get("a") is not None
+    clock.now += 0.001
+    assert entries.get("a") is None
+
+    assert entries.stats()["bytes"] == 0
+    assert (entries.hits, entries.misses) == (1, 1)
+
+
+def test_reading_does_not_extend_the_ttl(clock):
+    entries = TTLCache(ttl_seconds=30)
+    entries.set("a", "a")
+    clock.now += 20
+    entries.get("a")
+
+    clock.now += 20
+
+    assert entries.get("a") is None
+
+
+def test_value_loaded_before_an_invalidation_is_not_cached(clock):
+    entries = TTLCache()
+    generation = entries.generation
+
+    entries.invalidate(lambda key: True)
+    entries.set("a", "stale", generation=generation)
+
+    assert entries.get("a") is None
+    entries.set("a", "fresh", generation=entries.generation)
+    assert entries.get("a") == "fresh"
+
+
+def test_invalidate_drops_matching_entries_only(clock):
+    entries = TTLCache()
+    for key in [("list", 1), ("list", 2), ("key", "k1"), ("key", "k2")]:
+        entries.set(key, key[1])
+
+    entries.invalidate(lambda key: key[0] == "list" or key[1] == "k1")
+
+    assert entries.get(("key", "k2")) == "k2"
+    assert entries.stats()["entries"] == 1
+
+
+class GatedStore(MemoryRestaurantStore):
+    """Memory store whose list_page() waits for ``release`` after reading, like a slow backend"""
+
+    def __init__(self):
+        super().__init__()
+        self.reads = 0
+        self.read_done = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def list_page(self, *args, **kwargs):
+        page = await super().list_page(*args, **kwargs)
+        self.reads += 1
+        self.read_done.set()
+        await self.release.wait()
+        return page
+
+
+def restaurant(key):
+    return {"restaurant_key": key, "restaurant_name": key, "created_at": f"2024-01-01T00:00:0{key[-1]}.000Z"}
+
+
+def test_read_started_before_a_write_does_not_repopulate_the_cache(monkeypatch):
+    store = GatedStore()
+    monkeypatch.setattr(server, "store", store)
+    monkeypatch.setattr(server, "restaurant_cache", TTLCache())
+
+    async def run():
+        await store.add(restaurant("k1"))
+        stale_read = asyncio.create_task(server.read_list_page("created_at", "desc", 10, None))
+        await store.read_done.wait()
+        # A write lands after the read but before it is cached
+        await store.add(restaurant("k2"))
+        server.invalidate_restaurant_cache(["k2"])
+        store.release.set()
+        stale, _ = await stale_read
+
+        fresh, _ = await server.read_list_page("created_at", "desc", 10, None)
+        cached, _ = await server.read_list_page("created_at", "desc", 10, None)
+        return stale, fresh, cached
+
+    stale, fresh, cached = asyncio.run(run())
+
+    assert [hit["id"] for hit in stale] == ["k1"]
+    assert [hit["id"] for hit in fresh] == [hit["id"] for hit in cached] == ["k2", "k1"]
+    # The stale page was never cached, the fresh one was
+    assert store.reads == 2
+
+
+def test_key_lookups_are_cached_until_their_key_is_invalidated(monkeypatch):
+    store = MemoryRestaurantStore()
+    monkeypatch.setattr(server, "store", store)
+    monkeypatch.setattr(server, "restaurant_cache", TTLCache())
+    reads = []
+    get_by_key = store.get_by_key
+
+    async def counting_get_by_key(restaurant_key):
+        reads.append(restaurant_key)
+        return await get_by_key(restaurant_key)
+
+    monkeypatch.setattr(store, "get_by_key", counting_get_by_key)
+
+    async def run():
+        await store.add(restaurant("k1"))
+        await store.add(restaurant("k2"))
+        for key in ["k1", "k1", "k2", "missing", "missing"]:
+            await server.read_restaurant_by_key(key)
+        server.invalidate_restaurant_cache(["k2"])
+        for key in ["k1", "k2"]:
+            await server.read_restaurant_by_key(key)
+
+    asyncio.run(run())
+
+    # Misses are not cached; invalidating k2 also drops nothing for k1
+    assert reads == ["k1", "k2", "missing", "missing", "k2"]
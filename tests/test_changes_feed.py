@@ -0,0 +1,128 @@
+"""Changes feed of the memory and Firestore stores (the latter on the in-process fake)"""
+
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import firestore_store
+from fake_firestore import FakeFirestore
+from firestore_store import FirestoreRestaurantStore
+from memory_store import MemoryRestaurantStore
+from store import TOMBSTONE_RETENTION_DAYS, ChangeTokenExpired
+
+STORES = {
+    "memory": MemoryRestaurantStore,
+    "firestore": lambda: FirestoreRestaurantStore(FakeFirestore()),
+}
+
+
+@pytest.fixture(params=sorted(STORES))
+def store(request):
+    store = STORES[request.param]()
+    yield store
+    store.close()
+
+
+def restaurant(key, city="Austin"):
+    return {
+        "restaurant_name": f"Restaurant {key}",
+        "street_address": "1 Main St",
+        "city": city,
+        "state": "TX",
+        "zipcode": "78701",
+        "primary_phone": "5125550100",
+        "restaurant_key": key,
+        "created_at": "2024-01-01T00:00:00.000Z",
+        "updated_at": "2024-01-01T00:00:00.000Z",
+        "created_by": "data-entry1",
+    }
+
+
+def add_all(store, keys):
+    async def add():
+        for key in keys:
+            await store.add(restaurant(key))
+
+    asyncio.run(add())
+
+
+def read_pages(store, since=None, limit=2):
+    """Every page from ``since`` on: [(changes, has_more)] and the final token"""
+    pages = []
+    while True:
+        changes, since, has_more = asyncio.run(store.changes(since=since, limit=limit))
+        pages.append((changes, has_more))
+        if not has_more:
+            return pages, since
+
+
+def test_pages_follow_write_order(store):
+    keys = [f"k{i}" for i in range(5)]
+    add_all(store, keys)
+
+    pages, token = read_pages(store, limit=2)
+
+    assert [len(changes) for changes, _ in pages] == [2, 2, 1]
+    assert [has_more for _, has_more in pages] == [True, True, False]
+    changes = [change for page, _ in pages for change in page]
+    assert [change["id"] for change in changes] == keys
+    assert all(change["type"] == "upsert" for change in changes)
+    assert changes[0]["restaurant"]["restaurant_name"] == "Restaurant k0"
+
+    # Caught up: nothing new, and later writes continue from the token
+    assert asyncio.run(store.changes(since=token, limit=2))[0] == []
+    add_all(store, ["k5"])
+    changes, _, has_more = asyncio.run(store.changes(since=token, limit=2))
+    assert [change["id"] for change in changes] == ["k5"] and not has_more
+
+
+def test_delete_leaves_tombstone(store):
+    add_all(store, ["k0", "k1"])
+    _, token = read_pages(store, limit=10)
+
+    asyncio.run(store.delete("k0"))
+    add_all(store, ["k2"])
+
+    changes, _, has_more = asyncio.run(store.changes(since=token, limit=10))
+    assert [(change["type"], change["id"]) for change in changes] == [("delete", "k0"), ("upsert", "k2")]
+    assert changes[0]["restaurant_key"] == "k0"
+    assert not has_more
+
+    # A first sync starts from nothing, so it gets no tombstones
+    changes, _, _ = asyncio.run(store.changes(limit=10))
+    assert [(change["type"], change["id"]) for change in changes] == [("upsert", "k1"), ("upsert", "k2")]
+
+
+def test_firestore_token_expires_after_tombstone_retention(monkeypatch):
+    store = FirestoreRestaurantStore(FakeFirestore())
+    add_all(store, ["k0"])
+    _, token = read_pages(store, limit=10)
+
+    def days_later(days):
+        class Later(datetime):
+            @classmethod
+            def now(cls, tz=None):
+                return datetime.now(tz) + timedelta(days=days)
+
+        monkeypatch.setattr(firestore_store, "datetime", Later)
+
+    # Still within the retention: tombstones since the token are all kept
+    days_later(TOMBSTONE_RETENTION_DAYS - 1)
+    assert asyncio.run(store.changes(since=token))[0] == []
+
+    days_later(TOMBSTONE_RETENTION_DAYS + 1)
+    with pytest.raises(ChangeTokenExpired):
+        asyncio.run(store.changes(since=token))
+    store.close()
+
+
+def test_memory_token_expires_with_the_store():
+    # The memory store keeps every tombstone while it lives, so its tokens only expire with it
+    store = MemoryRestaurantStore()
+    add_all(store, ["k0"])
+    _, token = read_pages(store, limit=10)
+    assert asyncio.run(store.changes(since=token))[0] == []
+
+    with pytest.raises(ChangeTokenExpired):
+        asyncio.run(MemoryRestaurantStore().changes(since=token))
@@ -0,0 +1,18 @@
+"""Cold-start budget: app import time and time until a fresh uvicorn answers /api/"""
+
+from backend_bench import first_response_ms, import_time_ms
+
+IMPORT_BUDGET_MS = 600.0
+FIRST_RESPONSE_BUDGET_MS = 1000.0
+
+
+def test_app_import_stays_within_budget_and_skips_database_clients():
+    import_ms, imported = min((import_time_ms("server") for _ in range(3)), key=lambda result: result[0])
+    eager = sorted(name for name in imported if name.split(".")[0] in ("firebase_admin", "grpc", "motor"))
+    assert not eager, f"database clients imported with the app: {eager[:5]}"
+    assert import_ms <= IMPORT_BUDGET_MS, f"import server took {import_ms:.0f}ms"
+
+
+def test_first_api_response_within_budget():
+    response_ms = min(first_response_ms() for _ in range(3))
+    assert response_ms <= FIRST_RESPONSE_BUDGET_MS, f"first /api/ response after {response_ms:.0f}ms"
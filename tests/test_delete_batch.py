@@ -0,0 +1,104 @@
+"""POST /api/admin/restaurants/delete-batch and its job status"""
+
+import time
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from fake_firestore import FakeFirestore
+from firestore_store import FirestoreRestaurantStore
+from jobs import JobRegistry
+
+
+@pytest.fixture
+def client(monkeypatch):
+    store = FirestoreRestaurantStore(FakeFirestore())
+    monkeypatch.setattr(server, "store", store)
+    monkeypatch.setattr(server, "admin_jobs", JobRegistry())
+    # Small chunks, so one job runs several delete_many() transactions
+    monkeypatch.setattr(server, "DELETE_CHUNK_SIZE", 3)
+    with TestClient(server.app) as client:
+        client.store = store
+        yield client
+
+
+def add_restaurants(client, keys, created_at="2024-01-05T12:00:00.000Z"):
+    rows = [{
+        "restaurantName": f"Restaurant {key}",
+        "streetAddress": "1 Main St",
+        "city": "Austin",
+        "state": "TX",
+        "zipcode": "78701",
+        "primaryPhone": "5125550100",
+        "restaurantKey": key,
+        "createdAt": created_at,
+        "updatedAt": created_at,
+    } for key in keys]
+    assert client.post("/api/restaurants/bulk", json=rows).json()["created"] == len(keys)
+
+
+def finished_job(client, started):
+    assert started.status_code == 202, started.text
+    status_url = started.json()["status_url"]
+    for _ in range(500):
+        job = client.get(status_url).json()
+        if job["finished_at"] is not None:
+            return job
+        time.sleep(0.01)
+    raise AssertionError(f"job never finished: {job}")
+
+
+def test_delete_by_ids_with_archive(client):
+    keys = [f"k{i}" for i in range(8)]
+    add_restaurants(client, keys)
+    since = client.get("/api/restaurants/changes").json()["next_token"]
+
+    started = client.post("/api/admin/restaurants/delete-batch",
+                          json={"ids": keys[:7] + ["k0", "missing"], "archive": True})
+    assert started.json()["job"]["status"] == "running"
+    job = finished_job(client, started)
+
+    assert job["status"] == "succeeded", job
+    assert (job["matched"], job["processed"], job["deleted"], job["archived"]) == (8, 8, 7, 7)
+
+    archived = {doc.id: doc.to_dict() for doc in client.store.archive_collection.stream()}
+    assert client.store.archive_collection.id == "restaurants_archive"
+    assert sorted(archived) == keys[:7]
+    assert archived["k0"]["restaurant_name"] == "Restaurant k0" and archived["k0"]["archived_at"]
+
+    changes = client.get("/api/restaurants/changes", params={"since": since, "limit": 100}).json()["changes"]
+    assert sorted(change["id"] for change in changes if change["type"] == "delete") == keys[:7]
+
+    remaining = client.get("/api/admin/restaurants").json()
+    assert [restaurant["id"] for restaurant in remaining["restaurants"]] == ["k7"]
+    assert remaining["stats"]["total_count"] == 1
+
+
+def test_delete_by_filter(client):
+    add_restaurants(client, ["old1", "old2"], created_at="2024-01-05T12:00:00.000Z")
+    add_restaurants(client, ["new1"], created_at="2024-02-05T12:00:00.000Z")
+
+    job = finished_job(client, client.post("/api/admin/restaurants/delete-batch", json={
+        "filter": {"created_by": server.CURRENT_USER, "created_before": "2024-02-01"},
+    }))
+
+    assert job["status"] == "succeeded", job
+    assert (job["matched"], job["deleted"], job["archived"]) == (2, 2, 0)
+    assert list(client.store.archive_collection.stream()) == []
+    assert [r["id"] for r in client.get("/api/admin/restaurants").json()["restaurants"]] == ["new1"]
+
+
+@pytest.mark.parametrize("body", [
+    {},
+    {"ids": ["k1"], "filter": {"created_by": "someone"}},
+    {"filter": {}},
+    {"ids": ["not/an/id"]},
+    {"filter": {"created_from": "last tuesday"}},
+])
+def test_rejects_bad_requests(client, body):
+    assert client.post("/api/admin/restaurants/delete-batch", json=body).status_code == 422
+
+
+def test_unknown_job(client):
+    assert client.get("/api/admin/jobs/unknown").status_code == 404
@@ -0,0 +1,116 @@
+"""ETag and If-None-Match revalidation of the restaurant list and admin endpoints"""
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from cache import TTLCache
+from fake_firestore import FakeFirestore
+from firestore_store import FirestoreRestaurantStore
+from memory_store import MemoryRestaurantStore
+
+STORES = {
+    "memory": MemoryRestaurantStore,
+    "firestore": lambda: FirestoreRestaurantStore(FakeFirestore()),
+}
+
+ENDPOINTS = ["/api/restaurants", "/api/admin/restaurants"]
+
+
+@pytest.fixture(params=sorted(STORES))
+def client(request, monkeypatch):
+    monkeypatch.setattr(server, "store", STORES[request.param]())
+    monkeypatch.setattr(server, "version_cache", TTLCache(max_entries=1, ttl_seconds=60))
+    with TestClient(server.app) as client:
+        for i in range(5):
+            create(client, f"k{i}")
+        yield client
+
+
+def create(client, key):
+    response = client.post("/api/restaurants", json={
+        "restaurantName": f"Restaurant {key}",
+        "streetAddress": "1 Main St",
+        "city": "Austin",
+        "state": "TX",
+        "zipcode": "78701",
+        "primaryPhone": "5125550100",
+        "restaurantKey": key,
+        "createdAt": "2024-01-05T12:00:00.000Z",
+        "updatedAt": "2024-01-05T12:00:00.000Z",
+    })
+    assert response.status_code == 200, response.text
+
+
+def revalidate(client, url, etag, **params):
+    return client.get(url, params=params, headers={"If-None-Match": etag})
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_repeated_request_with_if_none_match_is_not_modified(client, url):
+    first = client.get(url, params={"limit": 2})
+    etag = first.headers["etag"]
+    assert first.status_code == 200
+    assert first.headers["cache-control"] == "no-cache"
+
+    again = revalidate(client, url, etag, limit=2)
+
+    assert again.status_code == 304
+    assert again.content == b""
+    assert again.headers["etag"] == etag
+    # Weak and listed validators match too
+    assert revalidate(client, url, f'"other", W/{etag}', limit=2).status_code == 304
+    assert revalidate(client, url, '"other"', limit=2).status_code == 200
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_create_changes_the_etag(client, url):
+    etag = client.get(url).headers["etag"]
+
+    create(client, "k-new")
+
+    response = revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_delete_changes_the_etag(client, url):
+    etag = client.get(url).headers["etag"]
+
+    assert client.delete("/api/admin/restaurants/k1").status_code == 200
+
+    response = revalidate(client, url, etag)
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert revalidate(client, url, response.headers["etag"]).status_code == 304
+
+
+@pytest.mark.parametrize("url", ENDPOINTS)
+def test_each_page_and_projection_has_its_own_etag(client, url):
+    first = client.get(url, params={"limit": 2})
+    page_token = first.json()["next_page_token"]
+    variants = [
+        {"limit": 2},
+        {"limit": 3},
+        {"limit": 2, "page_token": page_token},
+        {"limit": 2, "fields": "restaurant_name"},
+        {"limit": 2, "fields": "restaurant_name,city"},
+        {"limit": 2, "order": "asc"},
+    ]
+
+    etags = [client.get(url, params=params).headers["etag"] for params in variants]
+
+    assert len(set(etags)) == len(variants)
+    # A validator from one page never revalidates another
+    assert revalidate(client, url, etags[0], **variants[2]).status_code == 200
+
+
+def test_write_changes_the_etag_through_the_read_cache(client, monkeypatch):
+    monkeypatch.setattr(server, "restaurant_cache", TTLCache(max_entries=100, ttl_seconds=60))
+    etag = client.get("/api/restaurants").headers["etag"]
+    assert revalidate(client, "/api/restaurants", etag).status_code == 304
+
+    create(client, "k-new")
+
+    assert revalidate(client, "/api/restaurants", etag).status_code == 200
@@ -0,0 +1,115 @@
+"""GET /api/admin/restaurants/export: NDJSON and CSV rows, gzip encoding and flat memory"""
+
+import csv
+import io
+import json
+import subprocess
+import sys
+import zlib
+
+import pytest
+from fastapi.testclient import TestClient
+
+import backend_bench
+import server
+from export import EXPORT_FORMATS
+from fake_firestore import FakeFirestore
+from firestore_store import FirestoreRestaurantStore
+
+EXPORT_URL = "/api/admin/restaurants/export"
+
+
+@pytest.fixture
+def client(monkeypatch):
+    store = FirestoreRestaurantStore(FakeFirestore())
+    monkeypatch.setattr(server, "store", store)
+    with TestClient(server.app) as client:
+        yield client
+
+
+def add_restaurants(client, count):
+    rows = [{
+        "restaurantName": f"Restaurant, {i}",
+        "streetAddress": f"{i} Main St",
+        "city": "Austin",
+        "state": "TX",
+        "zipcode": "78701",
+        "primaryPhone": "5125550100",
+        "notes": "line one\nline \"two\"",
+        "restaurantKey": f"k{i:02d}",
+        "createdAt": "2024-01-05T12:00:00.000Z",
+        "updatedAt": "2024-01-05T12:00:00.000Z",
+    } for i in range(count)]
+    assert client.post("/api/restaurants/bulk", json=rows).json()["created"] == count
+
+
+def test_ndjson_export_has_one_document_per_line(client):
+    add_restaurants(client, 12)
+
+    response = client.get(EXPORT_URL)
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"] == 'attachment; filename="restaurants.ndjson"'
+    assert "content-encoding" not in response.headers
+    assert response.text.endswith("\n")
+    restaurants = [json.loads(line) for line in response.text.splitlines()]
+    assert sorted(restaurant["id"] for restaurant in restaurants) == [f"k{i:02d}" for i in range(12)]
+    first = next(restaurant for restaurant in restaurants if restaurant["id"] == "k00")
+    assert first["restaurant_name"] == "Restaurant, 0"
+    assert first["notes"] == "line one\nline \"two\""
+
+
+def test_csv_export_has_header_and_quoted_rows(client):
+    add_restaurants(client, 12)
+
+    response = client.get(EXPORT_URL, params={"format": "csv"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    assert response.headers["content-disposition"] == 'attachment; filename="restaurants.csv"'
+    reader = csv.DictReader(io.StringIO(response.text))
+    assert reader.fieldnames[:3] == ["id", "restaurant_key", "restaurant_name"]
+    rows = sorted(reader, key=lambda row: row["id"])
+    assert len(rows) == 12
+    assert rows[3]["restaurant_name"] == "Restaurant, 3"
+    assert rows[3]["notes"] == "line one\nline \"two\""
+    # Columns the document doesn't have are left empty
+    assert rows[3]["gm_name"] == ""
+
+
+@pytest.mark.parametrize("format", ["ndjson", "csv"])
+def test_gzip_export_is_content_encoded(client, format):
+    add_restaurants(client, 5)
+    plain = client.get(EXPORT_URL, params={"format": format}).text
+
+    response = client.get(EXPORT_URL, params={"format": format, "gzip": "true"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["content-type"].startswith(EXPORT_FORMATS[format])
+    assert response.headers["content-disposition"] == f'attachment; filename="restaurants.{format}"'
+    # httpx decodes the body; the raw bytes on the wire are one gzip member
+    assert response.text == plain
+    with client.stream("GET", EXPORT_URL, params={"format": format, "gzip": "true"}) as raw:
+        compressed = b"".join(raw.iter_raw())
+    assert compressed[:2] == b"\x1f\x8b"
+    assert zlib.decompress(compressed, wbits=31).decode("utf-8") == plain
+
+
+def test_unknown_format_is_rejected(client):
+    assert client.get(EXPORT_URL, params={"format": "xml"}).status_code == 422
+
+
+def export_rss_growth_mb(rows):
+    """Peak RSS growth of one streaming export over ``rows`` documents, in a fresh process"""
+    output = subprocess.run(
+        [sys.executable, backend_bench.__file__, "_export_rss", "streaming", str(rows)],
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])["rss_growth_mb"]
+
+
+def test_streaming_export_memory_is_flat_in_collection_size():
+    small, large = export_rss_growth_mb(20000), export_rss_growth_mb(80000)
+    # Buffering 80000 documents grows RSS by ~100MB; streaming them may only cost a few MB more
+    assert large - small <= 4.0, f"export RSS grew {small}MB -> {large}MB"
@@ -0,0 +1,153 @@
+"""Geohash radius search against brute-force haversine, at radius edges and cell boundaries"""
+
+import asyncio
+import math
+import random
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from fake_firestore import FakeFirestore
+from firestore_store import FirestoreRestaurantStore
+from geo import (
+    EARTH_RADIUS_KM,
+    cell_size_degrees,
+    covering_cells,
+    encode_geohash,
+    haversine_km,
+    query_ranges,
+    within_radius,
+)
+from memory_store import MemoryRestaurantStore
+
+STORES = {
+    "memory": MemoryRestaurantStore,
+    "firestore": lambda: FirestoreRestaurantStore(FakeFirestore()),
+}
+
+# A point on a precision-5 cell corner: every neighbouring cell starts right here
+LAT_STEP, LNG_STEP = cell_size_degrees(5)
+CELL_CORNER = (LAT_STEP * math.floor(30.27 / LAT_STEP), LNG_STEP * math.floor(-97.74 / LNG_STEP))
+
+CENTERS = {
+    "austin": (30.27, -97.74),
+    "cell corner": CELL_CORNER,
+    "equator and prime meridian": (0.0, 0.0),
+    "antimeridian": (-16.5, 179.99),
+    "far north": (78.2, 15.6),
+}
+
+
+def destination(lat, lng, bearing_degrees, distance_km):
+    """The point ``distance_km`` from (lat, lng) along ``bearing_degrees``"""
+    phi, lam = math.radians(lat), math.radians(lng)
+    theta, delta = math.radians(bearing_degrees), distance_km / EARTH_RADIUS_KM
+    phi2 = math.asin(math.sin(phi) * math.cos(delta) + math.cos(phi) * math.sin(delta) * math.cos(theta))
+    lam2 = lam + math.atan2(math.sin(theta) * math.sin(delta) * math.cos(phi),
+                            math.cos(delta) - math.sin(phi) * math.sin(phi2))
+    return math.degrees(phi2), (math.degrees(lam2) + 540.0) % 360.0 - 180.0
+
+
+def points_around(lat, lng, radius_km, rng):
+    """Random points out to twice the radius, plus points just inside and outside its edge"""
+    points = [destination(lat, lng, rng.uniform(0, 360), rng.uniform(0, 2 * radius_km)) for _ in range(300)]
+    for bearing in range(0, 360, 15):
+        for factor in (0.999, 0.99999, 1.00001, 1.001):
+            points.append(destination(lat, lng, bearing, radius_km * factor))
+    # Points straddling the geohash cell edges nearest the center
+    for precision in (4, 5, 6):
+        lat_size, lng_size = cell_size_degrees(precision)
+        edge_lat, edge_lng = lat_size * round(lat / lat_size), lng_size * round(lng / lng_size)
+        for nudge in (-1e-9, 0.0, 1e-9):
+            points.append((edge_lat + nudge, lng))
+            points.append((lat, (edge_lng + nudge + 180.0) % 360.0 - 180.0))
+            points.append((edge_lat + nudge, (edge_lng + nudge + 180.0) % 360.0 - 180.0))
+    return points
+
+
+def located(i, lat, lng):
+    return {
+        "restaurant_name": f"Restaurant {i}",
+        "restaurant_key": f"r{i:04d}",
+        "created_at": "2024-01-01T00:00:00.000Z",
+        "latitude": lat,
+        "longitude": lng,
+    }
+
+
+@pytest.fixture(params=sorted(STORES))
+def store(request):
+    store = STORES[request.param]()
+    yield store
+    store.close()
+
+
+@pytest.mark.parametrize("center", sorted(CENTERS))
+@pytest.mark.parametrize("radius_km", [0.05, 1.0, 5.0, 50.0])
+def test_geohash_ranges_find_exactly_what_brute_force_finds(store, center, radius_km):
+    lat, lng = CENTERS[center]
+    points = points_around(lat, lng, radius_km, random.Random(f"{center}-{radius_km}"))
+    restaurants = [located(i, *point) for i, point in enumerate(points)]
+
+    async def run():
+        await store.bulk_add(restaurants)
+        return await store.geohash_candidates(query_ranges(lat, lng, radius_km))
+
+    candidates = asyncio.run(run())
+    expected = within_radius([dict(data, id=data["restaurant_key"]) for data in restaurants], lat, lng, radius_km)
+
+    found = within_radius(candidates, lat, lng, radius_km)
+    assert [hit["id"] for hit in found] == [hit["id"] for hit in expected]
+    # The edge points just inside are found and the ones just outside are not
+    assert len(expected) >= 24 * 2
+
+
+@pytest.mark.parametrize("center", sorted(CENTERS))
+def test_covering_cells_include_every_neighbour_the_circle_touches(center):
+    lat, lng = CENTERS[center]
+    radius_km = 2.0
+    cells = covering_cells(lat, lng, radius_km)
+    precision = len(cells[0])
+
+    assert len(cells) <= 16
+    assert len({len(cell) for cell in cells}) == 1
+    for bearing in range(0, 360, 5):
+        for factor in (0.0, 0.5, 1.0):
+            point = destination(lat, lng, bearing, radius_km * factor)
+            assert encode_geohash(*point, precision) in cells, (bearing, factor)
+
+
+def test_haversine_matches_known_distances():
+    assert haversine_km(30.27, -97.74, 30.27, -97.74) == 0.0
+    # Austin to Dallas, and a quarter of the way around the equator
+    assert haversine_km(30.2672, -97.7431, 32.7767, -96.7970) == pytest.approx(292.0, abs=2.0)
+    assert haversine_km(0.0, 0.0, 0.0, 90.0) == pytest.approx(math.pi * EARTH_RADIUS_KM / 2)
+    # Crossing the antimeridian is the short way round
+    assert haversine_km(0.0, 179.9, 0.0, -179.9) == pytest.approx(22.24, abs=0.01)
+
+
+def test_nearby_endpoint_returns_nearest_first_within_the_radius(monkeypatch):
+    monkeypatch.setattr(server, "store", MemoryRestaurantStore())
+    lat, lng = CENTERS["cell corner"]
+    rows = [{
+        "restaurantName": f"Restaurant {i}",
+        "streetAddress": "1 Main St",
+        "city": "Austin",
+        "state": "TX",
+        "zipcode": "78701",
+        "primaryPhone": "5125550100",
+        "restaurantKey": f"r{i}",
+        "createdAt": "2024-01-01T00:00:00.000Z",
+        "updatedAt": "2024-01-01T00:00:00.000Z",
+        "latitude": point[0],
+        "longitude": point[1],
+    } for i, point in enumerate(destination(lat, lng, bearing, distance)
+                                for bearing, distance in [(0, 0.5), (90, 0.999), (180, 1.001), (270, 0.2), (45, 3.0)])]
+
+    with TestClient(server.app) as client:
+        assert client.post("/api/restaurants/bulk", json=rows).json()["created"] == len(rows)
+        body = client.get("/api/restaurants/nearby", params={"lat": lat, "lng": lng, "radius_km": 1.0}).json()
+
+    assert [restaurant["id"] for restaurant in body["restaurants"]] == ["r3", "r0", "r1"]
+    assert [restaurant["distance_km"] for restaurant in body["restaurants"]] == [0.2, 0.5, 0.999]
@@ -0,0 +1,154 @@
+"""Create idempotency: the Coalescer, the stores' idempotency_key and POST /api/restaurants"""
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from fake_firestore import FakeFirestore
+from firestore_store import FirestoreRestaurantStore
+from idempotency import Coalescer, IdempotencyKeyReused
+from memory_store import MemoryRestaurantStore
+from store import DuplicateRestaurantKey
+
+
+class SlowCountingStore(MemoryRestaurantStore):
+    """Memory store whose creates take a while and are counted"""
+
+    def __init__(self, delay=0.05):
+        super().__init__()
+        self.delay = delay
+        self.adds = 0
+
+    async def add(self, data, idempotency_key=None):
+        self.adds += 1
+        await asyncio.sleep(self.delay)
+        return await super().add(data, idempotency_key=idempotency_key)
+
+
+@pytest.fixture
+def app_store(monkeypatch):
+    store = SlowCountingStore()
+    monkeypatch.setattr(server, "store", store)
+    monkeypatch.setattr(server, "create_coalescer", Coalescer())
+    return store
+
+
+def create_body(key="k1", name="Taco Stand"):
+    return {
+        "restaurantName": name,
+        "streetAddress": "1 Main St",
+        "city": "Austin",
+        "state": "TX",
+        "zipcode": "78701",
+        "primaryPhone": "5125550100",
+        "restaurantKey": key,
+        "createdAt": "2024-01-01T00:00:00.000Z",
+        "updatedAt": "2024-01-01T00:00:00.000Z",
+    }
+
+
+def test_coalescer_runs_concurrent_duplicates_once():
+    calls = []
+
+    async def write():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"id": "k1"}
+
+    async def main():
+        coalescer = Coalescer()
+        return coalescer, await asyncio.gather(*(coalescer.run(("key", "a"), "fp", write) for _ in range(5)))
+
+    coalescer, results = asyncio.run(main())
+    assert len(calls) == 1
+    assert results == [{"id": "k1"}] * 5
+    assert coalescer.stats()["coalesced"] == 4
+
+
+def test_coalescer_replays_successes_but_not_failures():
+    calls = []
+
+    async def failing():
+        calls.append("failed")
+        raise RuntimeError("backend down")
+
+    async def succeeding():
+        calls.append("succeeded")
+        return "k1"
+
+    async def main():
+        coalescer = Coalescer()
+        with pytest.raises(RuntimeError):
+            await coalescer.run(("key", "a"), "fp", failing)
+        first = await coalescer.run(("key", "a"), "fp", succeeding)
+        replayed = await coalescer.run(("key", "a"), "fp", succeeding)
+        with pytest.raises(IdempotencyKeyReused):
+            await coalescer.run(("key", "a"), "other", succeeding)
+        return coalescer, first, replayed
+
+    coalescer, first, replayed = asyncio.run(main())
+    assert calls == ["failed", "succeeded"]
+    assert first == replayed == "k1"
+    assert coalescer.stats()["replayed"] == 1
+
+
+@pytest.mark.parametrize("make_store", [MemoryRestaurantStore, lambda: FirestoreRestaurantStore(FakeFirestore())],
+                         ids=["memory", "firestore"])
+def test_store_add_is_idempotent_per_key(make_store):
+    store = make_store()
+    data = server.restaurant_to_document(server.RestaurantCreate(**create_body()))
+
+    async def main():
+        first = await store.add(data, idempotency_key="attempt-1")
+        # A retry that reached another worker: the stored key identifies it
+        retried = await store.add(data, idempotency_key="attempt-1")
+        with pytest.raises(DuplicateRestaurantKey):
+            await store.add(data, idempotency_key="someone-else")
+        with pytest.raises(DuplicateRestaurantKey):
+            await store.add(data)
+        return first, retried, await store.count()
+
+    try:
+        assert asyncio.run(main()) == ("k1", "k1", 1)
+    finally:
+        store.close()
+
+
+def test_replayed_create_returns_the_same_id(app_store):
+    with TestClient(server.app) as client:
+        headers = {"Idempotency-Key": "attempt-1"}
+        first = client.post("/api/restaurants", json=create_body(), headers=headers)
+        replay = client.post("/api/restaurants", json=create_body(), headers=headers)
+
+    assert first.status_code == replay.status_code == 200
+    assert first.json()["id"] == replay.json()["id"] == "k1"
+    assert app_store.adds == 1
+
+
+def test_concurrent_duplicate_creates_write_once(app_store):
+    async def main():
+        transport = httpx.ASGITransport(app=server.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(
+                client.post("/api/restaurants", json=create_body(), headers={"Idempotency-Key": "attempt-1"})
+                for _ in range(5)
+            ))
+
+    responses = asyncio.run(main())
+    assert [response.status_code for response in responses] == [200] * 5
+    assert {response.json()["id"] for response in responses} == {"k1"}
+    assert app_store.adds == 1
+
+
+def test_reused_key_with_another_body_is_rejected(app_store):
+    with TestClient(server.app) as client:
+        headers = {"Idempotency-Key": "attempt-1"}
+        assert client.post("/api/restaurants", json=create_body(), headers=headers).status_code == 200
+        reused = client.post("/api/restaurants", json=create_body(name="Other Name"), headers=headers)
+
+    assert reused.status_code == 422
+    assert "attempt-1" in reused.json()["detail"]
+    assert app_store.adds == 1
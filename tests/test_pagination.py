@@ -0,0 +1,155 @@
+"""Cursor pagination of the memory and Firestore stores (the latter on the in-process fake)"""
+
+import asyncio
+import base64
+import json
+
+import pytest
+from fastapi.testclient import TestClient
+
+import server
+from fake_firestore import FakeFirestore
+from firestore_store import FirestoreRestaurantStore
+from memory_store import MemoryRestaurantStore
+from store import InvalidPageToken, encode_page_token
+
+STORES = {
+    "memory": MemoryRestaurantStore,
+    "firestore": lambda: FirestoreRestaurantStore(FakeFirestore()),
+}
+
+
+@pytest.fixture(params=sorted(STORES))
+def store(request):
+    store = STORES[request.param]()
+    yield store
+    store.close()
+
+
+def restaurant(key, created_at, name="Same Name"):
+    return {
+        "restaurant_name": name,
+        "street_address": "1 Main St",
+        "city": "Austin",
+        "state": "TX",
+        "zipcode": "78701",
+        "primary_phone": "5125550100",
+        "restaurant_key": key,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "created_by": "data-entry1",
+    }
+
+
+def add_tied(store, count=11):
+    """``count`` restaurants in runs of three sharing one created_at, and all sharing one name"""
+    async def add():
+        for i in range(count):
+            await store.add(restaurant(f"k{i:02d}", f"2024-01-0{1 + i // 3}T00:00:00.000Z"))
+
+    asyncio.run(add())
+    return [f"k{i:02d}" for i in range(count)]
+
+
+def read_all(store, sort_by, order, limit, fields=None):
+    """Every page in turn: (the ids in order, the number of pages)"""
+    async def read():
+        ids, pages, token = [], 0, None
+        while True:
+            restaurants, token = await store.list_page(sort_by, order, limit, token, fields)
+            pages += 1
+            assert len(restaurants) <= limit
+            ids.extend(restaurant["id"] for restaurant in restaurants)
+            if token is None:
+                return ids, pages
+
+    return asyncio.run(read())
+
+
+@pytest.mark.parametrize("sort_by", ["created_at", "restaurant_name"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 2, 3, 4])
+def test_pages_cover_tied_sort_values_without_duplicates_or_gaps(store, sort_by, order, limit):
+    keys = add_tied(store)
+
+    ids, pages = read_all(store, sort_by, order, limit)
+
+    assert len(ids) == len(set(ids)) == len(keys)
+    assert set(ids) == set(keys)
+    assert pages == -(-len(keys) // limit)
+    # The document ID breaks ties in the requested direction
+    created = {key: f"2024-01-0{1 + i // 3}" for i, key in enumerate(keys)}
+    sort_key = (lambda key: (created[key], key)) if sort_by == "created_at" else (lambda key: key)
+    assert ids == sorted(keys, key=sort_key, reverse=order == "desc")
+
+
+def test_pages_with_projection_match_full_pages(store):
+    add_tied(store)
+
+    projected, _ = read_all(store, "created_at", "desc", 4, fields=["restaurant_name"])
+
+    assert projected == read_all(store, "created_at", "desc", 4)[0]
+
+
+def test_writes_between_pages_do_not_repeat_earlier_documents(store):
+    add_tied(store)
+
+    async def read():
+        first, token = await store.list_page("created_at", "asc", 4)
+        # Sorts before the cursor, so it belongs to a page already read
+        await store.add(restaurant("k-early", "2023-12-31T00:00:00.000Z"))
+        rest = []
+        while token:
+            page, token = await store.list_page("created_at", "asc", 4, token)
+            rest.extend(restaurant["id"] for restaurant in page)
+        return [restaurant["id"] for restaurant in first], rest
+
+    first, rest = asyncio.run(read())
+    assert not set(first) & set(rest)
+    assert "k-early" not in rest
+    assert len(first) + len(rest) == 11
+
+
+@pytest.mark.parametrize("token", [
+    "not-a-token",
+    "!!!",
+    base64.urlsafe_b64encode(b"[1, 2]").decode(),
+    base64.urlsafe_b64encode(json.dumps({"s": "created_at"}).encode()).decode(),
+])
+def test_malformed_token_is_rejected(store, token):
+    add_tied(store)
+
+    with pytest.raises(InvalidPageToken, match="Malformed"):
+        asyncio.run(store.list_page("created_at", "desc", 2, token))
+
+
+@pytest.mark.parametrize("sort_by, order", [("created_at", "asc"), ("updated_at", "desc"), ("restaurant_name", "desc")])
+def test_token_for_a_different_sort_is_rejected(store, sort_by, order):
+    add_tied(store)
+    _, token = asyncio.run(store.list_page("created_at", "desc", 2))
+
+    with pytest.raises(InvalidPageToken, match="different sort_by/order"):
+        asyncio.run(store.list_page(sort_by, order, 2, token))
+
+
+@pytest.fixture
+def client(monkeypatch):
+    store = MemoryRestaurantStore()
+    add_tied(store)
+    monkeypatch.setattr(server, "store", store)
+    with TestClient(server.app) as client:
+        yield client
+
+
+@pytest.mark.parametrize("url", ["/api/restaurants", "/api/admin/restaurants"])
+def test_api_returns_400_for_bad_tokens(client, url):
+    token = client.get(url, params={"limit": 2}).json()["next_page_token"]
+    forged = encode_page_token("created_at", "asc", {"id": "k00", "created_at": "x"})
+
+    assert client.get(url, params={"limit": 2, "page_token": token}).status_code == 200
+    malformed = client.get(url, params={"limit": 2, "page_token": "garbage"})
+    assert malformed.status_code == 400
+    assert "Malformed" in malformed.json()["detail"]
+    assert client.get(url, params={"limit": 2, "page_token": token, "order": "asc"}).status_code == 400
+    assert client.get(url, params={"limit": 2, "page_token": token, "sort_by": "updated_at"}).status_code == 400
+    assert client.get(url, params={"limit": 2, "page_token": forged}).status_code == 400
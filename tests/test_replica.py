@@ -0,0 +1,110 @@
+"""RestaurantReplica driven by a synthetic snapshot feed"""
+
+import threading
+import time
+from types import SimpleNamespace
+
+from replica import RestaurantReplica
+
+
+class SyntheticWatch:
+    def __init__(self):
+        self.is_active = True
+
+    def unsubscribe(self):
+        self.is_active = False
+
+
+class SyntheticCollection:
+    """Stands in for a collection reference; the test delivers snapshots itself"""
+
+    def __init__(self):
+        self.callbacks = []
+        self.watches = []
+        self.subscribed = threading.Event()
+
+    def on_snapshot(self, callback):
+        self.callbacks.append(callback)
+        self.watches.append(SyntheticWatch())
+        self.subscribed.set()
+        return self.watches[-1]
+
+    def deliver(self, docs=(), changes=()):
+        self.callbacks[-1](list(docs), list(changes), time.time())
+
+
+def doc(doc_id, **fields):
+    data = {"restaurant_name": doc_id, "restaurant_key": doc_id, "city": "Austin", "state": "TX",
+            "created_by": "data-entry1", "created_at": "2024-01-01T00:00:00.000Z", **fields}
+    return SimpleNamespace(id=doc_id, to_dict=lambda: dict(data))
+
+
+def change(kind, document):
+    return SimpleNamespace(type=SimpleNamespace(name=kind), document=document)
+
+
+def listed_ids(replica):
+    restaurants, _ = replica.list_page(None, "asc", 100)
+    return [restaurant["id"] for restaurant in restaurants]
+
+
+def test_ready_after_first_snapshot():
+    collection = SyntheticCollection()
+    replica = RestaurantReplica(collection, check_interval=60)
+    replica.start()
+    try:
+        assert not replica.ready
+        collection.deliver(docs=[doc("a"), doc("b")])
+        assert replica.ready
+        assert listed_ids(replica) == ["a", "b"]
+        assert replica.stats()["count"] == 2
+    finally:
+        replica.stop()
+    assert not replica.ready
+
+
+def test_applies_upserts_and_deletes():
+    collection = SyntheticCollection()
+    replica = RestaurantReplica(collection, check_interval=60)
+    replica.start()
+    try:
+        collection.deliver(docs=[doc("a"), doc("b")])
+        version = replica.version
+
+        collection.deliver(changes=[
+            change("ADDED", doc("c", city="Dallas")),
+            change("MODIFIED", doc("a", restaurant_name="Renamed")),
+            change("REMOVED", doc("b")),
+        ])
+
+        assert listed_ids(replica) == ["a", "c"]
+        assert replica.get_by_key("a")["restaurant_name"] == "Renamed"
+        assert replica.get_by_key("b") is None
+        assert replica.stats()["cities"] == {"Austin": 1, "Dallas": 1}
+        assert replica.version != version
+    finally:
+        replica.stop()
+
+
+def test_monitor_resubscribes_when_listener_dies():
+    collection = SyntheticCollection()
+    replica = RestaurantReplica(collection, check_interval=0.01)
+    replica.start()
+    try:
+        collection.deliver(docs=[doc("a"), doc("b")])
+        assert replica.ready
+
+        collection.subscribed.clear()
+        collection.watches[-1].is_active = False
+        assert not replica.ready
+        assert collection.subscribed.wait(5), "monitor never re-subscribed"
+        assert len(collection.callbacks) == 2
+        assert replica.resyncs == 1
+        assert replica.last_error == "listener stopped"
+        # Not ready until the new listener has delivered the full collection, which replaces the old contents
+        assert not replica.ready
+        collection.deliver(docs=[doc("b"), doc("c")])
+        assert replica.ready
+        assert listed_ids(replica) == ["b", "c"]
+    finally:
+        replica.stop()
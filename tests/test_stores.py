@@ -0,0 +1,248 @@
+"""The in-memory index behind the memory store and replica, and every engine against the RestaurantStore protocol"""
+
+import asyncio
+import inspect
+import random
+
+import pytest
+
+from fake_firestore import FakeFirestore
+from firestore_store import FirestoreRestaurantStore
+from memory_store import MemoryRestaurantStore, RestaurantIndex
+from mongo_store import MongoRestaurantStore, ensure_indexes_sync
+from search import document_tokens
+from store import SORT_FIELDS, DuplicateRestaurantKey, RestaurantStore
+
+ENGINES = [MemoryRestaurantStore, FirestoreRestaurantStore, MongoRestaurantStore]
+
+STORES = {
+    "memory": MemoryRestaurantStore,
+    "firestore": lambda: FirestoreRestaurantStore(FakeFirestore()),
+}
+
+CITIES = ["Austin", "Dallas", "Denver", None]
+
+
+def restaurant(key, city="Austin", created_at="2024-01-01T00:00:00.000Z", **fields):
+    return {
+        "restaurant_name": f"Restaurant {key}",
+        "street_address": "1 Main St",
+        "city": city,
+        "state": "TX",
+        "zipcode": "78701",
+        "primary_phone": "5125550100",
+        "restaurant_key": key,
+        "created_at": created_at,
+        "updated_at": created_at,
+        "created_by": "data-entry1",
+        **fields,
+    }
+
+
+def protocol_methods():
+    return sorted(name for name, value in vars(RestaurantStore).items()
+                  if callable(value) and not name.startswith("_"))
+
+
+def test_protocol_covers_the_store_api():
+    assert {"add", "get_by_key", "list_page", "delete", "count", "stats"} <= set(protocol_methods())
+
+
+@pytest.mark.parametrize("engine", ENGINES, ids=lambda engine: engine.__name__)
+@pytest.mark.parametrize("name", protocol_methods())
+def test_engine_implements_protocol_method(engine, name):
+    expected = getattr(RestaurantStore, name)
+    actual = getattr(engine, name, None)
+    assert actual is not None, f"{engine.__name__} has no {name}()"
+
+    if name == "scan":
+        # Declared as a plain def returning an async iterator; engines write it as an async generator
+        assert inspect.isasyncgenfunction(actual) or not inspect.iscoroutinefunction(actual)
+    else:
+        assert inspect.iscoroutinefunction(actual) == inspect.iscoroutinefunction(expected)
+    # Callers pass these by name and rely on the defaults, so both must match
+    expected_parameters = list(inspect.signature(expected).parameters.values())[1:]
+    actual_parameters = inspect.signature(actual).parameters
+    for parameter in expected_parameters:
+        assert parameter.name in actual_parameters, f"{engine.__name__}.{name}() lacks {parameter.name}"
+        assert actual_parameters[parameter.name].default == parameter.default
+
+
+class RecordingDatabase:
+    """Just enough of a pymongo or Motor database to record create_index() calls"""
+
+    def __init__(self, is_async):
+        self.is_async = is_async
+        self.created = []
+
+    def __getitem__(self, name):
+        database = self
+
+        class Collection:
+            def create_index(self, keys, **options):
+                database.created.append((name, keys, options))
+                if database.is_async:
+                    return asyncio.sleep(0)
+
+        collection = Collection()
+        collection.name = name
+        return collection
+
+
+def test_admin_creates_the_same_indexes_as_the_api():
+    api, admin = RecordingDatabase(is_async=True), RecordingDatabase(is_async=False)
+
+    asyncio.run(MongoRestaurantStore(api).ensure_indexes())
+    ensure_indexes_sync(admin)
+
+    assert admin.created == api.created
+    assert ("restaurants", [("city", 1), ("created_at", -1), ("_id", -1)], {}) in admin.created
+    assert ("restaurants_tombstones", "expire_at", {"expireAfterSeconds": 0}) in admin.created
+
+
+# RestaurantIndex
+
+def brute_force_page(documents, sort_by, order):
+    """Every document id in the order list_page() walks them"""
+    present = [data for data in documents.values() if sort_by in data]
+    ordered = sorted(present, key=lambda data: (data[sort_by], data["id"]), reverse=order == "desc")
+    return [data["id"] for data in ordered]
+
+
+def walk(index, sort_by, order, limit=7):
+    ids, token = [], None
+    while True:
+        page, token = index.list_page(sort_by, order, limit, token)
+        ids.extend(restaurant["id"] for restaurant in page)
+        if token is None:
+            return ids
+
+
+def test_index_stays_consistent_with_its_documents_under_random_writes():
+    index, model = RestaurantIndex(), {}
+    rng = random.Random(7)
+    # Build the sorted indexes first, so later writes go through the incremental path
+    for sort_by in SORT_FIELDS:
+        walk(index, sort_by, "asc")
+
+    for step in range(400):
+        doc_id = f"k{rng.randrange(60):02d}"
+        if rng.random() < 0.3:
+            index.remove(doc_id)
+            model.pop(doc_id, None)
+            continue
+        data = restaurant(doc_id, city=rng.choice(CITIES), created_at=f"2024-01-{rng.randrange(1, 9):02d}")
+        if rng.random() < 0.2:
+            del data["updated_at"]
+        index.upsert(doc_id, data)
+        model[doc_id] = dict(data, id=doc_id)
+
+    assert len(index) == len(model)
+    for sort_by in SORT_FIELDS:
+        for order in ("asc", "desc"):
+            assert walk(index, sort_by, order) == brute_force_page(model, sort_by, order)
+    stats = index.stats()
+    cities = {}
+    for data in model.values():
+        cities[data["city"] or "Unknown"] = cities.get(data["city"] or "Unknown", 0) + 1
+    assert stats["count"] == len(model)
+    assert stats["cities"] == cities
+    # A fresh index over the same documents builds the same sorted lists
+    rebuilt = RestaurantIndex()
+    for doc_id, data in model.items():
+        rebuilt.upsert(doc_id, data)
+    for sort_by in SORT_FIELDS:
+        assert rebuilt.list_page(sort_by, "asc", 1000)[0] == index.list_page(sort_by, "asc", 1000)[0]
+
+
+def test_index_version_changes_on_every_write_only():
+    index = RestaurantIndex()
+    versions = [index.version]
+    index.upsert("k1", restaurant("k1"))
+    versions.append(index.version)
+    index.upsert("k1", restaurant("k1", city="Dallas"))
+    versions.append(index.version)
+    index.list_page()
+    index.stats()
+    assert index.version == versions[-1]
+    index.remove("k1")
+    versions.append(index.version)
+    assert index.remove("k1") is None
+    assert index.version == versions[-1]
+
+    assert len(set(versions)) == 4
+    # Another index (e.g. after a restart) never hands out the same version
+    assert RestaurantIndex().version not in versions
+
+
+def test_replacing_a_document_moves_it_between_buckets_and_postings():
+    index = RestaurantIndex()
+    index.upsert("k1", restaurant("k1", city="Austin", restaurant_name="Blue Taco"))
+
+    index.upsert("k1", restaurant("k1", city="Dallas", restaurant_name="Red Curry"))
+
+    assert index.stats()["cities"] == {"Dallas": 1}
+    assert index.search(document_tokens({"restaurant_name": "taco"})) == []
+    assert [hit["id"] for hit in index.search(document_tokens({"restaurant_name": "curry"}))] == ["k1"]
+
+
+def test_documents_keyed_by_another_id_are_found_by_key():
+    index = RestaurantIndex()
+    index.upsert("507f1f77bcf86cd799439011", restaurant("legacy"))
+
+    assert index.get_by_key("legacy")["id"] == "507f1f77bcf86cd799439011"
+    index.remove("507f1f77bcf86cd799439011")
+    assert index.get_by_key("legacy") is None
+
+
+def test_internal_fields_are_not_served():
+    index = RestaurantIndex()
+    index.upsert("k1", dict(restaurant("k1"), search_tokens=["x"], idempotency_key="abc", changed_at=1))
+
+    assert set(index.get("k1")) == set(restaurant("k1")) | {"id"}
+
+
+def test_geohash_candidates_use_inclusive_ranges():
+    index = RestaurantIndex()
+    for doc_id, geohash in [("a", "9v6k"), ("b", "9v6kz"), ("c", "9v6m"), ("d", None)]:
+        index.upsert(doc_id, restaurant(doc_id, **({"geohash": geohash} if geohash else {})))
+
+    found = index.geohash_candidates([("9v6k", "9v6k~"), ("9v6m", "9v6m")])
+
+    assert sorted(hit["id"] for hit in found) == ["a", "b", "c"]
+
+
+# Behaviour every engine shares
+
+@pytest.fixture(params=sorted(STORES))
+def store(request):
+    store = STORES[request.param]()
+    yield store
+    store.close()
+
+
+def test_store_round_trip(store):
+    async def run():
+        versions = [await store.version()]
+        assert await store.add(restaurant("k1", city="Austin")) == "k1"
+        await store.bulk_add([restaurant("k2", city="Dallas"), restaurant("k3", city="Dallas")])
+        versions.append(await store.version())
+        with pytest.raises(DuplicateRestaurantKey):
+            await store.add(restaurant("k1"))
+
+        assert (await store.get_by_key("k2"))["city"] == "Dallas"
+        assert await store.get_by_key("missing") is None
+        page, _ = await store.list_page("created_at", "asc", 10)
+        assert [hit["id"] for hit in page] == ["k1", "k2", "k3"]
+
+        deleted = await store.delete("k2")
+        assert deleted["id"] == "k2"
+        assert await store.delete("k2") is None
+        versions.append(await store.version())
+
+        stats = await store.stats()
+        assert await store.count() == stats["count"] == 2
+        assert stats["cities"] == {"Austin": 1, "Dallas": 1}
+        assert len(set(versions)) == len(versions)
+
+    asyncio.run(run())